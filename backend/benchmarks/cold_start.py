@@ -0,0 +1,94 @@
+"""
+Cold-start benchmark.
+
+Starts a fresh uvicorn process per run and measures, from process launch:
+
+    import_ms     importing backend.main in a bare interpreter
+    listening_ms  until /health answers
+    ready_ms      until /ready reports 200, i.e. pool and caches are warm
+    first_menu_ms latency of the first /menu_items request once ready
+
+    python -m backend.benchmarks.cold_start --runs 5
+
+Prints one JSON record per run, then a summary with the median of each
+measurement. DATABASE_URL must point at a seeded database with its schema
+created (python -m backend.db.migrate).
+"""
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+import httpx
+
+IMPORT_SNIPPET = "import time; started = time.perf_counter(); import backend.main; print((time.perf_counter() - started) * 1000)"
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def measure_import():
+    output = subprocess.run([sys.executable, "-c", IMPORT_SNIPPET], capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+def wait_for(client, url, started, timeout):
+    """Poll url until it answers 200; returns ms since started."""
+    while time.perf_counter() - started < timeout:
+        try:
+            if client.get(url).status_code == 200:
+                return (time.perf_counter() - started) * 1000
+        except httpx.TransportError:
+            pass
+        time.sleep(0.005)
+    raise TimeoutError(f"{url} not ready after {timeout}s")
+
+def measure_boot(date, timeout):
+    port = free_port()
+    base_url = f"http://127.0.0.1:{port}"
+    command = [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port), "--log-level", "warning"]
+    started = time.perf_counter()
+    server = subprocess.Popen(command, env=os.environ.copy(), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        with httpx.Client(timeout=5) as client:
+            listening_ms = wait_for(client, f"{base_url}/health", started, timeout)
+            ready_ms = wait_for(client, f"{base_url}/ready", started, timeout)
+            request_started = time.perf_counter()
+            client.get(f"{base_url}/menu_items", params={"date": date}).raise_for_status()
+            first_menu_ms = (time.perf_counter() - request_started) * 1000
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+    return {
+        "listening_ms": round(listening_ms, 1),
+        "ready_ms": round(ready_ms, 1),
+        "first_menu_ms": round(first_menu_ms, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend cold-start time.")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--date", default="2026-02-02", help="Date for the first /menu_items request")
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for each stage")
+    parser.add_argument("--label", default="run", help="Tag copied into every result record")
+    args = parser.parse_args()
+
+    runs = []
+    for run in range(1, args.runs + 1):
+        result = {"label": args.label, "run": run, "import_ms": round(measure_import(), 1)}
+        result.update(measure_boot(args.date, args.timeout))
+        runs.append(result)
+        print(json.dumps(result), flush=True)
+
+    summary = {"label": args.label, "runs": len(runs)}
+    for key in ("import_ms", "listening_ms", "ready_ms", "first_menu_ms"):
+        summary[f"median_{key}"] = round(statistics.median(run[key] for run in runs), 2)
+    print(json.dumps(summary))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""
+Concurrency benchmark for a running backend.
+
+Drives the given paths with N concurrent clients for a fixed duration and
+prints one JSON record per concurrency level. To compare the sync and async
+database paths, start the server once per mode and run the same benchmark:
+
+    DB_ASYNC=0 MENU_CACHE_MAX_ENTRIES=0 uvicorn backend.main:app --port 8000
+    python -m backend.benchmarks.concurrency --label sync --clients 50 200
+
+    DB_ASYNC=1 MENU_CACHE_MAX_ENTRIES=0 uvicorn backend.main:app --port 8000
+    python -m backend.benchmarks.concurrency --label async --clients 50 200
+
+MENU_CACHE_MAX_ENTRIES=0 keeps the menu cache from absorbing the load, so
+every /menu_items request reaches the database. Raise DB_POOL_SIZE and
+DB_MAX_OVERFLOW to see how the pool limits each mode.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+
+import httpx
+
+DEFAULT_PATHS = [
+    "/menu_items?date=2026-02-03",
+    "/menu_items?date=2026-02-04&location_id=1",
+]
+
+
+@contextlib.asynccontextmanager
+async def running_app(app):
+    """
+    Run the app's lifespan in-process and wait for startup warmup to finish.
+    Yields a transport for httpx clients.
+    """
+    async with app.router.lifespan_context(app):
+        await app.state.ready_event.wait()
+        yield httpx.ASGITransport(app=app)
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def summarize(label, clients, latencies, errors, elapsed):
+    latencies = sorted(latencies)
+    return {
+        "label": label,
+        "clients": clients,
+        "requests": len(latencies),
+        "errors": errors,
+        "duration_s": round(elapsed, 3),
+        "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 2),
+    }
+
+async def run_level(base_url, paths, clients, duration, label, method="GET", transport=None):
+    """
+    Drive paths with `clients` concurrent workers for `duration` seconds.
+    Pass an httpx.ASGITransport to benchmark the app in-process instead of over the network.
+    """
+    latencies = []
+    errors = 0
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60, transport=transport) as client:
+        deadline = time.perf_counter() + duration
+
+        async def worker(offset):
+            nonlocal errors
+            i = offset
+            while time.perf_counter() < deadline:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    response = await client.request(method, path)
+                    if response.status_code >= 400:
+                        errors += 1
+                        continue
+                except httpx.HTTPError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - started)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker(n) for n in range(clients)))
+        elapsed = time.perf_counter() - started
+
+    return summarize(label, clients, latencies, errors, elapsed)
+
+async def main_async(args):
+    for clients in args.clients:
+        result = await run_level(args.base_url, args.path or DEFAULT_PATHS, clients, args.duration, args.label)
+        print(json.dumps(result), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure backend throughput at fixed concurrency levels.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--clients", type=int, nargs="+", default=[50, 200])
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run each concurrency level")
+    parser.add_argument("--path", action="append", help="Path to request; repeat to rotate through several")
+    parser.add_argument("--label", default="run", help="Tag copied into every result record")
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
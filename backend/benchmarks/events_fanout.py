@@ -0,0 +1,110 @@
+"""
+/events fan-out check for a running backend.
+
+Opens --clients Server-Sent Events connections, waits for every "hello",
+then records a new data generation in the database and times how long each
+client takes to receive the "generation" event for it:
+
+    EVENTS_POLL_SECONDS=1 uvicorn backend.main:app --port 8000
+    python -m backend.benchmarks.events_fanout --clients 1000 \
+        --database-url sqlite:///benchmark.db
+
+Prints one JSON record with the connections made, the clients that got the
+event and the delivery latency percentiles, measured from the insert, so
+they include up to EVENTS_POLL_SECONDS of polling delay. Exits with status 1
+unless every client got it. Raise EVENTS_MAX_CLIENTS above --clients, and
+the open file limit (ulimit -n) for both processes.
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+
+import httpx
+from sqlalchemy import create_engine, text
+
+from .concurrency import percentile
+
+
+async def listen(client, connected, published, delivered, stop):
+    """Hold one /events stream; record when the first generation event after publishing arrives."""
+    async with client.stream("GET", "/events") as response:
+        response.raise_for_status()
+        event = None
+        async for line in response.aiter_lines():
+            if line.startswith("event:"):
+                event = line.split(":", 1)[1].strip()
+            elif line == "" and event == "hello":
+                connected.release()
+            elif line == "" and event == "generation" and published:
+                delivered.append(time.perf_counter() - published[0])
+                break
+            if line == "":
+                event = None
+            if stop.is_set():
+                break
+
+def publish_generation(database_url):
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("INSERT INTO data_generation (source) VALUES ('events_fanout')"))
+    finally:
+        engine.dispose()
+
+async def run(base_url, database_url, clients, timeout):
+    connected = asyncio.Semaphore(0)
+    published = []
+    delivered = []
+    stop = asyncio.Event()
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=0)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=None) as client:
+        tasks = [asyncio.create_task(listen(client, connected, published, delivered, stop)) for _ in range(clients)]
+        started = time.perf_counter()
+        hellos = 0
+        try:
+            for _ in range(clients):
+                await asyncio.wait_for(connected.acquire(), timeout)
+                hellos += 1
+        except asyncio.TimeoutError:
+            pass
+        connect_s = time.perf_counter() - started
+
+        published.append(time.perf_counter())
+        await asyncio.to_thread(publish_generation, database_url)
+        await asyncio.wait(tasks, timeout=timeout)
+        stop.set()
+        for task in tasks:
+            task.cancel()
+        errors = sum(
+            1 for result in await asyncio.gather(*tasks, return_exceptions=True)
+            if isinstance(result, Exception) and not isinstance(result, asyncio.CancelledError)
+        )
+
+    delivered.sort()
+    return {
+        "clients": clients,
+        "connected": hellos,
+        "connect_s": round(connect_s, 2),
+        "delivered": len(delivered),
+        "errors": errors,
+        "p50_ms": round(percentile(delivered, 0.50) * 1000, 1),
+        "p99_ms": round(percentile(delivered, 0.99) * 1000, 1),
+        "max_ms": round(delivered[-1] * 1000, 1) if delivered else None,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Time a data generation event's delivery to many /events clients.")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--database-url", required=True, help="The database the server reads, to record a generation in")
+    parser.add_argument("--clients", type=int, default=1000)
+    parser.add_argument("--timeout", type=float, default=60.0, help="Seconds to wait for connections and for delivery")
+    args = parser.parse_args()
+
+    record = asyncio.run(run(args.base_url, args.database_url, args.clients, args.timeout))
+    print(json.dumps(record), flush=True)
+    sys.exit(0 if record["delivered"] == args.clients else 1)
+
+if __name__ == "__main__":
+    main()
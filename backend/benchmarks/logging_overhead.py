@@ -0,0 +1,102 @@
+"""
+Per-request logging overhead benchmark.
+
+Runs the same in-process /menu_items workload once per logging mode, each in
+its own interpreter so the logging configuration in backend.main applies
+cleanly, and prints one JSON record per mode:
+
+    off      logging disabled, the baseline
+    summary  one summary record per request (the default)
+    verbose  LOG_MODE=verbose with every per-item line sampled, roughly the
+             volume the query layer logged at INFO before summary mode
+
+    python -m backend.benchmarks.logging_overhead --requests 2000
+    python -m backend.benchmarks.logging_overhead --uncached
+
+--uncached sets MENU_CACHE_MAX_ENTRIES=0 so every request rebuilds its menu and
+the query-layer logging runs too. Log output goes to a temporary file, so the
+cost of writing records is included. DATABASE_URL must point at a seeded
+database.
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from .concurrency import percentile, running_app
+
+MODES = {
+    "off": {},
+    "summary": {"LOG_MODE": "summary"},
+    "verbose": {"LOG_MODE": "verbose", "LOG_ITEM_SAMPLE_RATE": "1"},
+}
+
+
+async def run_worker(mode, requests, dates):
+    import logging
+    import httpx
+    from backend.main import app
+
+    if mode == "off":
+        logging.disable(logging.CRITICAL)
+
+    latencies = []
+    async with running_app(app) as transport:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for i in range(requests):
+                started = time.perf_counter()
+                response = await client.get("/menu_items", params={"date": dates[i % len(dates)]})
+                latencies.append(time.perf_counter() - started)
+                response.raise_for_status()
+
+    latencies.sort()
+    return {
+        "mode": mode,
+        "requests": requests,
+        "mean_us": round(sum(latencies) / len(latencies) * 1e6, 1),
+        "p50_us": round(percentile(latencies, 0.50) * 1e6, 1),
+        "p99_us": round(percentile(latencies, 0.99) * 1e6, 1),
+    }
+
+def run_mode(mode, args):
+    env = dict(os.environ, **MODES[mode])
+    if args.uncached:
+        env["MENU_CACHE_MAX_ENTRIES"] = "0"
+    command = [
+        sys.executable, "-m", "backend.benchmarks.logging_overhead",
+        "--worker", mode, "--requests", str(args.requests), "--dates", *args.dates,
+    ]
+    with tempfile.TemporaryFile() as log_file:
+        output = subprocess.run(command, env=env, stdout=subprocess.PIPE, stderr=log_file, check=True)
+        log_bytes = log_file.tell()
+    result = json.loads(output.stdout.decode().strip().splitlines()[-1])
+    result["log_bytes_per_request"] = round(log_bytes / args.requests, 1)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare per-request cost of the logging modes.")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--dates", nargs="+", default=["2026-02-02", "2026-02-03", "2026-02-04"])
+    parser.add_argument("--uncached", action="store_true", help="Bypass the menu cache so the query layer runs every time")
+    parser.add_argument("--worker", choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(asyncio.run(run_worker(args.worker, args.requests, args.dates))))
+        return
+
+    baseline = None
+    for mode in MODES:
+        result = run_mode(mode, args)
+        if baseline is None:
+            baseline = result["mean_us"]
+        result["overhead_us"] = round(result["mean_us"] - baseline, 1)
+        result["uncached"] = args.uncached
+        print(json.dumps(result), flush=True)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""
+Query budget check.
+
+Calls each route in-process with the menu and reference caches cleared before
+every request, the worst case a client can trigger, and fails if a route runs
+more SQL statements or takes longer than its entry in ROUTE_QUERY_BUDGETS:
+
+    python -m backend.benchmarks.query_budgets
+    python -m backend.benchmarks.query_budgets --verbose
+
+Prints one JSON record per route and exits with status 1 if any route is over
+budget. --verbose also prints each route's statements, slowest first.
+DATABASE_URL must point at a seeded database.
+"""
+import argparse
+import asyncio
+import json
+import sys
+
+from .concurrency import running_app
+
+# date used for the dated routes; the range covers the longest span it allows. Paths are the
+# route templates budgets are keyed by, with {item_id} filled in as 13, the first item on the sample menus.
+CHECKS = [
+    ("/menu_items", {"date": "{date}"}),
+    ("/menu_items/range", {"start": "{date}", "end": "{range_end}"}),
+    ("/menu_items/week", {"date": "{date}"}),
+    ("/bootstrap", {}),
+    ("/search", {"q": "chicken", "start": "{date}"}),
+    ("/now", {"at": "{date}T12:00"}),
+    ("/items/next", {"item_id": ["13", "14", "15"], "after": "{date}"}),
+    ("/items/{item_id}/next", {"after": "{date}"}),
+    ("/always_available_items", {}),
+    ("/locations", {}),
+    ("/meal_types", {}),
+    ("/days", {}),
+    ("/allergens", {}),
+]
+
+
+async def run_checks(date, verbose):
+    import datetime
+    import logging
+    import httpx
+    from backend.cache import menu_cache, reference_cache
+    from backend.main import MAX_MENU_RANGE_DAYS, ROUTE_QUERY_BUDGETS, app
+    from backend.query_profile import QueryBudgetExceeded, query_budget
+
+    logging.disable(logging.CRITICAL)
+    range_end = (datetime.date.fromisoformat(date) + datetime.timedelta(days=MAX_MENU_RANGE_DAYS - 1)).isoformat()
+
+    failures = 0
+    async with running_app(app) as transport:
+        async with httpx.AsyncClient(transport=transport, base_url="http://budget") as client:
+            for path, params in CHECKS:
+                params = {
+                    key: value.format(date=date, range_end=range_end) if isinstance(value, str) else value
+                    for key, value in params.items()
+                }
+                budget = ROUTE_QUERY_BUDGETS[path]
+                menu_cache.clear()
+                reference_cache.clear()
+
+                error = None
+                try:
+                    with query_budget(budget.max_queries, budget.max_ms, label=f"GET {path}") as profile:
+                        response = await client.get(path.format(item_id=13), params=params)
+                        response.raise_for_status()
+                except QueryBudgetExceeded as e:
+                    error = str(e).splitlines()[0]
+                    failures += 1
+
+                print(json.dumps({
+                    "route": path,
+                    "queries": profile.count,
+                    "max_queries": budget.max_queries,
+                    "db_ms": round(profile.db_ms, 2),
+                    "elapsed_ms": round(profile.elapsed_ms, 2),
+                    "max_ms": budget.max_ms,
+                    "ok": error is None,
+                    **({"error": error} if error else {}),
+                }), flush=True)
+                if verbose:
+                    print(profile.summary(), file=sys.stderr)
+    return failures
+
+def main():
+    parser = argparse.ArgumentParser(description="Check every route against its query budget.")
+    parser.add_argument("--date", default="2026-02-02", help="Date for the dated routes")
+    parser.add_argument("--verbose", action="store_true", help="Print each route's statements to stderr")
+    args = parser.parse_args()
+
+    failures = asyncio.run(run_checks(args.date, args.verbose))
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
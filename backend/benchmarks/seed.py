@@ -0,0 +1,241 @@
+"""
+Benchmark database seeding.
+
+Builds a database with the backend's schema from the checked-in
+dining-hall-scrapper/dining_menu.json, laid out the way parse_json.py loads
+it, optionally scaled up with synthetic data:
+
+    python -m backend.benchmarks.seed --database-url sqlite:///benchmark.db
+    python -m backend.benchmarks.seed --database-url sqlite:///benchmark-10x.db \
+        --halls 2 --items 5 --cycles 3
+
+--halls adds copies of every dining hall, --items adds variants of every menu
+item, and --cycles repeats each term in later years under new cycle
+identifiers. Every table is dropped and recreated, so never point this at a
+database you care about. Prints a JSON record with the row counts.
+"""
+import argparse
+import copy
+import datetime
+import json
+import os
+import re
+import time
+
+from sqlalchemy import create_engine, insert, text
+
+from ..db.migrate import schema_version, upgrade
+from ..db.models import (
+    Allergen,
+    AlwaysAvailable,
+    Base,
+    Cycle,
+    DataGeneration,
+    Day,
+    Location,
+    MealType,
+    MenuAvailability,
+    MenuItem,
+    MenuItemAllergen,
+)
+
+DEFAULT_MENU = os.path.join(os.path.dirname(__file__), "..", "..", "dining-hall-scrapper", "dining_menu.json")
+
+# Same fixed reference data parse_json.py inserts
+MEAL_TYPES = ["Breakfast", "Brunch", "Lunch", "Dinner"]
+ALLERGENS = {
+    "E": "Eggs", "M": "Milk", "W": "Wheat", "S": "Soy",
+    "P": "Peanuts", "TN": "Tree Nuts", "F": "Fish", "SF": "Crustacean", "SS": "Sesame Seeds"
+}
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+
+def load_menu(path=DEFAULT_MENU):
+    with open(path) as f:
+        return json.load(f)
+
+def scale_menu(data, halls=1, items=1, cycles=1):
+    """
+    Return a copy of the scraped menu data grown by the given factors, in the
+    same shape as dining_menu.json.
+    """
+    data = copy.deepcopy(data)
+
+    if items > 1:
+        for days in data["Daily Menus"].values():
+            for meals in days.values():
+                for locations in meals.values():
+                    for location, menu in locations.items():
+                        grown = dict(menu)
+                        for variant in range(2, items + 1):
+                            grown.update((f"{name} ({variant})", codes) for name, codes in menu.items())
+                        locations[location] = grown
+
+    if halls > 1:
+        for days in data["Daily Menus"].values():
+            for meals in days.values():
+                for locations in meals.values():
+                    for location, menu in list(locations.items()):
+                        for copy_number in range(2, halls + 1):
+                            locations[f"{location} {copy_number}"] = dict(menu)
+
+    if cycles > 1:
+        identifiers = sorted({entry["menu_cycle"] for entries in data["Cycle Dates"].values() for entry in entries}, key=int)
+        base_count = len(identifiers)
+        terms = list(data["Cycle Dates"].items())
+        menus = dict(data["Daily Menus"])
+        for repeat in range(1, cycles):
+            offset = repeat * base_count
+            for name, entries in terms:
+                later_name = re.sub(r"\b(\d{4})\b", lambda m: str(int(m.group(1)) + repeat), name, count=1)
+                data["Cycle Dates"][later_name] = [
+                    {"week_of": entry["week_of"], "menu_cycle": str(int(entry["menu_cycle"]) + offset)}
+                    for entry in entries
+                ]
+            for menu_name, days in menus.items():
+                identifier = int(menu_name.split()[1])
+                data["Daily Menus"][f"Cycle {identifier + offset} Menu"] = copy.deepcopy(days)
+
+    return data
+
+def build_rows(data):
+    """Turn menu data into per-table row lists with ids assigned up front."""
+    rows = {model: [] for model in (
+        Cycle, Day, MealType, Location, Allergen, MenuItem, AlwaysAvailable,
+        MenuAvailability, MenuItemAllergen, DataGeneration,
+    )}
+
+    def add_named(model, id_field, name_field, names):
+        ids = {}
+        for name in names:
+            ids[name] = len(ids) + 1
+            rows[model].append({id_field: ids[name], name_field: name})
+        return ids
+
+    meal_type_ids = add_named(MealType, "meal_type_id", "meal_type_name", MEAL_TYPES)
+    allergen_ids = {}
+    for code, description in ALLERGENS.items():
+        allergen_ids[code] = len(allergen_ids) + 1
+        rows[Allergen].append({"allergen_id": allergen_ids[code], "allergen_code": code, "description": description})
+
+    location_names = dict.fromkeys(
+        location
+        for days in data["Daily Menus"].values()
+        for meals in days.values()
+        for locations in meals.values()
+        for location in locations
+    )
+    location_ids = add_named(Location, "location_id", "location_name", location_names)
+
+    item_ids = {}
+    def item_id(name):
+        if name not in item_ids:
+            item_ids[name] = len(item_ids) + 1
+            rows[MenuItem].append({"item_id": item_ids[name], "item_name": name})
+        return item_ids[name]
+
+    # Cycles and their days; menus attach to the first cycle row per identifier, as in parse_json.py
+    first_cycle = {}
+    day_ids = {}
+    for cycle_name, entries in data["Cycle Dates"].items():
+        year_match = re.search(r"\b\d{4}\b", cycle_name)
+        year = year_match.group() if year_match else "2025"
+        for entry in entries:
+            cycle_id = len(rows[Cycle]) + 1
+            start_date = datetime.datetime.strptime(f"{entry['week_of'].replace('Sept', 'Sep')} {year}", "%b %d %Y").date()
+            rows[Cycle].append({
+                "cycle_id": cycle_id,
+                "cycle_name": cycle_name,
+                "cycle_identifier": entry["menu_cycle"],
+                "start_date": start_date,
+            })
+            first_cycle.setdefault(entry["menu_cycle"], cycle_id)
+            for day_name in DAY_NAMES:
+                day_id = len(rows[Day]) + 1
+                rows[Day].append({"day_id": day_id, "day_name": day_name, "cycle_id": cycle_id})
+                day_ids[(cycle_id, day_name)] = day_id
+
+    seen_always = set()
+    for meal_type, names in data["Always Available"].items():
+        for name in names:
+            key = (meal_type_ids[meal_type], item_id(name))
+            if key not in seen_always:
+                seen_always.add(key)
+                rows[AlwaysAvailable].append({"meal_type_id": key[0], "item_id": key[1]})
+
+    seen_availability = set()
+    for menu_name, days in data["Daily Menus"].items():
+        cycle_id = first_cycle.get(menu_name.split()[1])
+        if cycle_id is None:
+            continue
+        for day_name, meals in days.items():
+            for meal_type, locations in meals.items():
+                for location, menu in locations.items():
+                    for name, codes in menu.items():
+                        key = (day_ids[(cycle_id, day_name)], meal_type_ids[meal_type], location_ids[location], item_id(name))
+                        if key in seen_availability:
+                            continue
+                        seen_availability.add(key)
+                        availability_id = len(rows[MenuAvailability]) + 1
+                        rows[MenuAvailability].append({
+                            "availability_id": availability_id,
+                            "day_id": key[0],
+                            "meal_type_id": key[1],
+                            "location_id": key[2],
+                            "item_id": key[3],
+                        })
+                        for code in dict.fromkeys(codes):
+                            if code in allergen_ids:
+                                rows[MenuItemAllergen].append({"availability_id": availability_id, "allergen_id": allergen_ids[code]})
+
+    rows[DataGeneration].append({"generation_id": 1, "source": "benchmark_seed"})
+    return rows
+
+def seed_database(database_url, data, chunk_size=5000):
+    """Drop and recreate every table, then bulk insert the menu data. Returns row counts."""
+    engine = create_engine(database_url)
+    rows = build_rows(data)
+    Base.metadata.drop_all(engine)
+    # Built by the migrations, so the backend's startup schema check passes
+    schema_version.drop(engine, checkfirst=True)
+    upgrade(engine)
+    with engine.begin() as conn:
+        for model, table_rows in rows.items():
+            for start in range(0, len(table_rows), chunk_size):
+                conn.execute(insert(model.__table__), table_rows[start:start + chunk_size])
+        if engine.dialect.name == "postgresql":
+            # Ids were assigned explicitly, so move the serial sequences past them
+            for model, table_rows in rows.items():
+                primary_key = model.__table__.primary_key.columns
+                if len(primary_key) == 1 and table_rows:
+                    column = list(primary_key)[0].name
+                    conn.execute(text(
+                        f"SELECT setval(pg_get_serial_sequence('{model.__tablename__}', '{column}'), "
+                        f"(SELECT MAX({column}) FROM {model.__tablename__}))"
+                    ))
+    engine.dispose()
+    return {model.__tablename__: len(table_rows) for model, table_rows in rows.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed a benchmark database from dining_menu.json.")
+    parser.add_argument("--database-url", required=True, help="Database to (re)create, e.g. sqlite:///benchmark.db")
+    parser.add_argument("--menu", default=DEFAULT_MENU, help="Scraped menu JSON to load")
+    parser.add_argument("--halls", type=int, default=1, help="Copies of every dining hall")
+    parser.add_argument("--items", type=int, default=1, help="Variants of every menu item")
+    parser.add_argument("--cycles", type=int, default=1, help="Repeats of every term under new cycle identifiers")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    data = scale_menu(load_menu(args.menu), args.halls, args.items, args.cycles)
+    counts = seed_database(args.database_url, data)
+    print(json.dumps({
+        "database_url": args.database_url,
+        "halls": args.halls,
+        "items": args.items,
+        "cycles": args.cycles,
+        "rows": counts,
+        "seconds": round(time.perf_counter() - started, 2),
+    }))
+
+if __name__ == "__main__":
+    main()
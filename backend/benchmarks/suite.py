@@ -0,0 +1,126 @@
+"""
+Route benchmark suite.
+
+Drives every read route in backend/main.py at each concurrency level and
+prints one JSON record per (route, level) with rps and p50/p95/p99 latency.
+/report-issue is left out because it sends mail. Seed a database first,
+then run the app in-process or against a running server:
+
+    python -m backend.benchmarks.seed --database-url sqlite:///benchmark.db
+    python -m backend.benchmarks.suite --database-url sqlite:///benchmark.db \
+        --clients 1 10 50 --output results.json
+
+    python -m backend.benchmarks.suite --base-url http://127.0.0.1:8000
+
+In-process runs measure the app without network overhead. --uncached turns the
+menu cache off so menu routes reach the database on every request. --output
+writes every record, along with the git commit and settings, to one JSON file
+for comparing runs across commits. --route limits the run to some routes.
+"""
+import argparse
+import asyncio
+import contextlib
+import datetime
+import json
+import os
+import platform
+import subprocess
+
+from .concurrency import run_level, running_app
+
+DEFAULT_DATE = "2026-02-02"
+
+# name -> (method, path); {date} and {week_end} are filled in from --date
+ROUTES = {
+    "root": ("GET", "/"),
+    "root_head": ("HEAD", "/"),
+    "health": ("GET", "/health"),
+    "metrics": ("GET", "/metrics"),
+    "menu_items": ("GET", "/menu_items?date={date}"),
+    "menu_items_filtered": ("GET", "/menu_items?date={date}&location_id=1&meal_type_id=3"),
+    "menu_items_range": ("GET", "/menu_items/range?start={date}&end={week_end}"),
+    "menu_items_week": ("GET", "/menu_items/week?date={date}"),
+    "bootstrap": ("GET", "/bootstrap"),
+    "search": ("GET", "/search?q=orange%20chicken&start={date}"),
+    "now": ("GET", "/now?at={date}T12:00"),
+    "item_next": ("GET", "/items/13/next?after={date}"),
+    "items_next": ("GET", "/items/next?after={date}" + "".join(f"&item_id={item_id}" for item_id in range(13, 63))),
+    "always_available_items": ("GET", "/always_available_items"),
+    "locations": ("GET", "/locations"),
+    "meal_types": ("GET", "/meal_types"),
+    "days": ("GET", "/days"),
+    "allergens": ("GET", "/allergens"),
+    "test_email_config": ("GET", "/test-email-config"),
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def route_paths(date):
+    week_end = (datetime.date.fromisoformat(date) + datetime.timedelta(days=6)).isoformat()
+    return {name: (method, path.format(date=date, week_end=week_end)) for name, (method, path) in ROUTES.items()}
+
+async def run_suite(args):
+    async with contextlib.AsyncExitStack() as stack:
+        transport = None
+        base_url = args.base_url
+        if base_url is None:
+            # Configure the app before importing it; backend.db.database reads these at import
+            os.environ["DATABASE_URL"] = args.database_url or os.environ.get("DATABASE_URL", "")
+            if args.uncached:
+                os.environ["MENU_CACHE_MAX_ENTRIES"] = "0"
+            import logging
+            from backend.main import app
+
+            logging.disable(logging.CRITICAL)
+            transport = await stack.enter_async_context(running_app(app))
+            base_url = "http://bench"
+
+        paths = route_paths(args.date)
+        results = []
+        for name in args.route or list(paths):
+            method, path = paths[name]
+            for clients in args.clients:
+                result = await run_level(base_url, [path], clients, args.duration, args.label, method, transport)
+                result.update(route=name, method=method, path=path)
+                results.append(result)
+                print(json.dumps(result), flush=True)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every backend route at fixed concurrency levels.")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--database-url", help="Run the app in-process against this database (default: DATABASE_URL)")
+    target.add_argument("--base-url", help="Benchmark a running server instead")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds to run each route at each level")
+    parser.add_argument("--date", default=DEFAULT_DATE, help="Date for the menu routes; the range covers its week")
+    parser.add_argument("--route", action="append", choices=ROUTES, help="Route to run; repeat for several (default: all)")
+    parser.add_argument("--uncached", action="store_true", help="Disable the menu cache (in-process only)")
+    parser.add_argument("--label", default="run", help="Tag copied into every result record")
+    parser.add_argument("--output", help="Also write all results and run settings to this JSON file")
+    args = parser.parse_args()
+
+    results = asyncio.run(run_suite(args))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "label": args.label,
+                "commit": git_commit(),
+                "started_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "target": args.base_url or "in-process",
+                "uncached": args.uncached,
+                "date": args.date,
+                "duration_s": args.duration,
+                "results": results,
+            }, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Week view benchmark: one /menu_items/week request against the seven
+/menu_items requests a client would otherwise make for the same week.
+
+    python -m backend.benchmarks.week_menu --rounds 50
+    python -m backend.benchmarks.week_menu --rounds 50 --concurrent
+
+Runs in-process, and each round clears the caches first ("cold"), then
+repeats with them warm. The seven day requests are sent one after another,
+or together with --concurrent. Prints one JSON record per (strategy, cache
+state) with latency and the statements issued per round. DATABASE_URL must
+point at a seeded database.
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import time
+
+from .concurrency import percentile, running_app
+
+
+async def run_round(client, strategy, dates, concurrent):
+    from backend.query_profile import start_profile, stop_profile
+
+    profile, token = start_profile()
+    started = time.perf_counter()
+    try:
+        if strategy == "week":
+            responses = [await client.get("/menu_items/week", params={"date": dates[0]})]
+        elif concurrent:
+            responses = await asyncio.gather(*(client.get("/menu_items", params={"date": date}) for date in dates))
+        else:
+            responses = [await client.get("/menu_items", params={"date": date}) for date in dates]
+    finally:
+        elapsed = time.perf_counter() - started
+        stop_profile(profile, token)
+    for response in responses:
+        response.raise_for_status()
+    return elapsed, profile.count, sum(len(response.content) for response in responses)
+
+async def run(args):
+    import logging
+    import httpx
+    from backend.cache import menu_cache
+    from backend.main import app
+
+    logging.disable(logging.CRITICAL)
+    monday = datetime.date.fromisoformat(args.date)
+    monday -= datetime.timedelta(days=monday.weekday())
+    dates = [(monday + datetime.timedelta(days=offset)).isoformat() for offset in range(7)]
+    days_label = "7_days_concurrent" if args.concurrent else "7_days"
+
+    async with running_app(app) as transport:
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            for cache_state in ("cold", "warm"):
+                for strategy in ("week", days_label):
+                    latencies = []
+                    queries = []
+                    for _ in range(args.rounds):
+                        if cache_state == "cold":
+                            menu_cache.clear()
+                        elapsed, count, size = await run_round(client, strategy, dates, args.concurrent)
+                        latencies.append(elapsed)
+                        queries.append(count)
+                    latencies.sort()
+                    print(json.dumps({
+                        "strategy": strategy,
+                        "cache": cache_state,
+                        "rounds": args.rounds,
+                        "requests_per_round": 1 if strategy == "week" else 7,
+                        "queries_per_round": round(sum(queries) / len(queries), 1),
+                        "response_bytes": size,
+                        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 2),
+                        "p50_ms": round(percentile(latencies, 0.50) * 1000, 2),
+                        "p95_ms": round(percentile(latencies, 0.95) * 1000, 2),
+                    }), flush=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare /menu_items/week with seven /menu_items calls.")
+    parser.add_argument("--date", default="2026-02-02", help="Any date in the week to fetch")
+    parser.add_argument("--rounds", type=int, default=30)
+    parser.add_argument("--concurrent", action="store_true", help="Send the seven day requests concurrently")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from .request_log import annotate
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+
+def encode_json(data):
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+
+
+class CachedResponse:
+    """
+    A JSON payload encoded once, with a strong ETag derived from its bytes.
+    """
+
+    __slots__ = ("data", "body", "etag")
+
+    def __init__(self, data, body=None):
+        # body can be passed in when it was assembled from other pre-encoded payloads
+        self.data = data
+        if body is None:
+            body = encode_json(data)
+        self.body = body
+        self.etag = '"' + hashlib.sha256(self.body).hexdigest()[:32] + '"'
+
+    def __len__(self):
+        return len(self.data)
+
+    def matches(self, if_none_match):
+        """Check an If-None-Match header value against this payload's ETag."""
+        if not if_none_match:
+            return False
+        if if_none_match.strip() == "*":
+            return True
+        # If-None-Match uses the weak comparison, so ignore any W/ prefix
+        tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+        return self.etag in tags
+
+
+class GenerationCache:
+    """
+    In-process cache whose entries are dropped whenever the data generation changes.
+
+    The menu repeats on a 5-week rotation, so every date resolves to one of ~35
+    cycle-days. Menus are keyed by the resolved (cycle_id, day_id, location
+    filter, meal filter); reference tables are keyed by endpoint name.
+    """
+
+    def __init__(self, name, max_entries=1024, generation_check_interval=30.0):
+        self.name = name
+        self.max_entries = max_entries
+        self.generation_check_interval = generation_check_interval
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation_checked_at = 0.0
+
+    @staticmethod
+    def make_key(cycle_id, day_id, location_ids, meal_type_ids):
+        """Normalize filters so equivalent requests share an entry."""
+        return (
+            cycle_id,
+            day_id,
+            tuple(sorted(set(location_ids or ()))),
+            tuple(sorted(set(meal_type_ids or ()))),
+        )
+
+    async def sync_generation(self, load_generation, force=False):
+        """
+        Compare the cached data generation against the database, at most once
+        per check interval, and clear every entry when it has moved on.
+        load_generation is an async callable returning the current generation.
+        """
+        now = time.monotonic()
+        if not force and now - self._generation_checked_at < self.generation_check_interval:
+            return self.generation
+
+        generation = await load_generation()
+        with self._lock:
+            self._generation_checked_at = now
+            if generation != self.generation:
+                if self.generation is not None:
+                    logger.info(f"Data generation changed from {self.generation} to {generation}, clearing {len(self._entries)} cached entries")
+                    self.invalidations += 1
+                self._entries.clear()
+                self.generation = generation
+        return generation
+
+    async def get_or_build(self, key, builder, should_store=None):
+        """
+        Return the cached value for key, awaiting the async builder and storing its result on a miss.
+        should_store can veto caching a value, e.g. an empty result from a failed query.
+        """
+        with self._lock:
+            if key in self._entries:
+                self.hits += 1
+                self._entries.move_to_end(key)
+                annotate(**{f"{self.name}_cache": "hit"})
+                return self._entries[key]
+            self.misses += 1
+            generation = self.generation
+        annotate(**{f"{self.name}_cache": "miss"})
+
+        value = await builder()
+
+        with self._lock:
+            # Don't store a value built from data that was invalidated meanwhile
+            if generation == self.generation and (should_store is None or should_store(value)):
+                self._entries[key] = value
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        return value
+
+    def peek(self, key):
+        """Return the cached value for key, or None, without building or counting a lookup."""
+        with self._lock:
+            return self._entries.get(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generation_checked_at = 0.0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "generation": self.generation,
+                "entries": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "invalidations": self.invalidations,
+            }
+
+
+menu_cache = GenerationCache(
+    "menu",
+    max_entries=int(os.getenv("MENU_CACHE_MAX_ENTRIES", 1024)),
+    generation_check_interval=float(os.getenv("MENU_CACHE_GENERATION_CHECK_SECONDS", 30)),
+)
+reference_cache = GenerationCache(
+    "reference",
+    max_entries=16,
+    generation_check_interval=float(os.getenv("MENU_CACHE_GENERATION_CHECK_SECONDS", 30)),
+)
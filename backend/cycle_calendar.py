@@ -0,0 +1,155 @@
+from collections import namedtuple
+import bisect
+import datetime
+import logging
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+# Reference start date for Cycle 1 EDIT THIS
+CYCLE_REFERENCE_DATE = datetime.date(2026, 1, 20)
+
+# The resolved menu day for a date
+CycleDay = namedtuple("CycleDay", ["cycle_id", "day_id"])
+
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# The fallback rotation repeats every 5 weeks from CYCLE_REFERENCE_DATE
+ROTATION_DAYS = 35
+
+
+def get_cycle_number(date_obj, reference_date, cycle_length_days=7):
+    logger.debug("Calculating cycle number for date: %s, reference: %s", date_obj, reference_date)
+    delta_days = (date_obj - reference_date).days
+    cycle_number = ((delta_days // cycle_length_days) % 5) + 1# Cycles 1-5
+    logger.debug("Calculated cycle number: %s (delta_days: %s)", cycle_number, delta_days)
+    return cycle_number
+
+
+class CycleCalendar:
+    """
+    Date to cycle-day index built from the Cycle table.
+
+    Each Cycle row is one scraped "week of" entry, so the dates it covers map to
+    the menu days of its cycle identifier. Dates inside the scraped span that no
+    week covers (breaks, gaps between terms) have no menu. Dates outside the span
+    fall back to the reference-date rotation so the site keeps working before a
+    new term's cycle dates are loaded.
+    """
+
+    def __init__(self, cycles=(), days=(), generation=None):
+        self.load(cycles, days, generation)
+
+    def load(self, cycles, days, generation):
+        """
+        Rebuild the index in place from fresh rows.
+        cycles: (cycle_id, cycle_identifier, start_date) rows
+        days: (cycle_id, day_id, day_name) rows
+        """
+        days_by_cycle = {}
+        for cycle_id, day_id, day_name in sorted(days, key=lambda row: row[1]):
+            days_by_cycle.setdefault((cycle_id, day_name), day_id)
+
+        # Menus are attached to the first cycle row of each identifier, matching
+        # how parse_json.py looks cycles up
+        by_identifier = {}
+        seen_identifiers = set()
+        for cycle_id, cycle_identifier, _ in sorted(cycles, key=lambda row: row[0]):
+            if cycle_identifier in seen_identifiers:
+                continue
+            seen_identifiers.add(cycle_identifier)
+            for day_name in DAY_NAMES:
+                day_id = days_by_cycle.get((cycle_id, day_name))
+                if day_id is not None:
+                    by_identifier[(cycle_identifier, day_name)] = CycleDay(cycle_id, day_id)
+
+        by_date = {}
+        for _, cycle_identifier, start_date in sorted(cycles, key=lambda row: (row[2], row[0])):
+            for offset in range(7):
+                date_obj = start_date + datetime.timedelta(days=offset)
+                cycle_day = by_identifier.get((cycle_identifier, date_obj.strftime("%A")))
+                if cycle_day:
+                    by_date.setdefault(date_obj, cycle_day)
+
+        # Sorted dates each cycle-day serves inside the scraped span, and its
+        # day offsets within one period of the fallback rotation
+        dates_by_day = {}
+        for date_obj, cycle_day in sorted(by_date.items()):
+            dates_by_day.setdefault(cycle_day.day_id, []).append(date_obj)
+        rotation_by_day = {}
+        for offset in range(ROTATION_DAYS):
+            date_obj = CYCLE_REFERENCE_DATE + datetime.timedelta(days=offset)
+            cycle_day = by_identifier.get((str(get_cycle_number(date_obj, CYCLE_REFERENCE_DATE)), date_obj.strftime("%A")))
+            if cycle_day:
+                rotation_by_day.setdefault(cycle_day.day_id, []).append(offset)
+
+        # Swap the finished tables in so concurrent lookups never see a partial index
+        self._by_identifier = by_identifier
+        self._by_date = by_date
+        self._dates_by_day = dates_by_day
+        self._rotation_by_day = rotation_by_day
+        self.first_date = min((row[2] for row in cycles), default=None)
+        self.last_date = max((row[2] + datetime.timedelta(days=6) for row in cycles), default=None)
+        self.generation = generation
+        if cycles:
+            logger.info(f"Cycle calendar loaded: {len(by_date)} dates from {self.first_date} to {self.last_date}")
+
+    def __len__(self):
+        return len(self._by_date)
+
+    def lookup(self, date_obj):
+        """Return the CycleDay serving date_obj, or None when it has no menu."""
+        cycle_day = self._by_date.get(date_obj)
+        if cycle_day or self.first_date is None:
+            return cycle_day
+        if self.first_date <= date_obj <= self.last_date:
+            # A break inside the scraped calendar
+            return None
+
+        cycle_identifier = str(get_cycle_number(date_obj, CYCLE_REFERENCE_DATE))
+        return self._by_identifier.get((cycle_identifier, date_obj.strftime("%A")))
+
+    def next_date(self, day_id, after):
+        """
+        Return the first date on or after `after` that day_id serves, following
+        lookup(): the rotation before and after the scraped span, the scraped
+        weeks inside it. None when day_id is never served from then on.
+        """
+        if self.first_date is None:
+            return None
+        if after < self.first_date:
+            found = self._next_rotation_date(day_id, after)
+            if found and found < self.first_date:
+                return found
+            after = self.first_date
+        if after <= self.last_date:
+            dates = self._dates_by_day.get(day_id, ())
+            position = bisect.bisect_left(dates, after)
+            if position < len(dates):
+                return dates[position]
+            after = self.last_date + datetime.timedelta(days=1)
+        return self._next_rotation_date(day_id, after)
+
+    def _next_rotation_date(self, day_id, after):
+        offsets = self._rotation_by_day.get(day_id)
+        if not offsets:
+            return None
+        period_start = after - datetime.timedelta(days=(after - CYCLE_REFERENCE_DATE).days % ROTATION_DAYS)
+        position = bisect.bisect_left(offsets, (after - period_start).days)
+        if position == len(offsets):
+            # Nothing left this period; take the first slot of the next one
+            return period_start + datetime.timedelta(days=ROTATION_DAYS + offsets[0])
+        return period_start + datetime.timedelta(days=offsets[position])
+
+    def lookup_str(self, date_str):
+        """lookup() for a YYYY-MM-DD string; invalid dates have no menu."""
+        try:
+            date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            logger.error(f"Invalid date format '{date_str}'")
+            return None
+        return self.lookup(date_obj)
+
+
+# Reloaded whenever the data generation changes
+cycle_calendar = CycleCalendar()
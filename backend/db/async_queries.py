@@ -0,0 +1,92 @@
+"""
+Async versions of the functions in queries.py.
+
+Each function accepts either an AsyncSession or a regular Session. With an
+AsyncSession the query runs through SQLAlchemy's greenlet bridge on the async
+driver; with a regular Session it runs in a worker thread. Either way the
+event loop is never blocked on database I/O. A MenuSnapshot (see
+backend/snapshot.py) is also accepted and answers from memory.
+"""
+import time
+from anyio import to_thread
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import queries
+from ..request_log import add_timing
+from ..snapshot import MenuSnapshot
+
+
+def _run_and_release(db, query, *args):
+    try:
+        return query(db, *args)
+    finally:
+        db.close()
+
+async def run_query(db, query, *args):
+    """
+    Run a sync query function from queries.py against db without blocking the event loop.
+
+    The session is closed afterwards so its connection goes back to the pool
+    straight away. Otherwise a request would keep holding a connection while it
+    awaits its next step, and with the sync path, worker threads blocked on pool
+    checkout could starve the requests that hold every connection.
+    """
+    if isinstance(db, MenuSnapshot):
+        # Served from the memory-mapped snapshot by the method named after the query
+        started = time.perf_counter()
+        try:
+            return getattr(db, query.__name__)(*args)
+        finally:
+            add_timing("snapshot", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    try:
+        if isinstance(db, AsyncSession):
+            try:
+                return await db.run_sync(query, *args)
+            finally:
+                await db.close()
+        return await to_thread.run_sync(_run_and_release, db, query, *args)
+    finally:
+        add_timing("db", time.perf_counter() - started)
+
+async def build_menu_items(db, day_id, location_ids, meal_type_ids):
+    return await run_query(db, queries.build_menu_items, day_id, location_ids, meal_type_ids)
+
+async def build_week_menu_items(db, day_ids, location_ids, meal_type_ids):
+    return await run_query(db, queries.build_week_menu_items, day_ids, location_ids, meal_type_ids)
+
+async def get_always_available_items(db):
+    return await run_query(db, queries.get_always_available_items)
+
+async def get_locations(db):
+    return await run_query(db, queries.get_locations)
+
+async def get_meal_types(db):
+    return await run_query(db, queries.get_meal_types)
+
+async def get_days(db):
+    return await run_query(db, queries.get_days)
+
+async def get_allergens(db):
+    return await run_query(db, queries.get_allergens)
+
+async def get_data_generation(db):
+    return await run_query(db, queries.get_data_generation)
+
+async def get_generations_since(db, generation):
+    return await run_query(db, queries.get_generations_since, generation)
+
+async def get_menu_days(db):
+    return await run_query(db, queries.get_menu_days)
+
+async def get_cycles(db):
+    return await run_query(db, queries.get_cycles)
+
+async def get_cycle_days(db):
+    return await run_query(db, queries.get_cycle_days)
+
+async def get_menu_item_names(db):
+    return await run_query(db, queries.get_menu_item_names)
+
+async def get_item_occurrences(db):
+    return await run_query(db, queries.get_item_occurrences)
@@ -1,16 +1,106 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .models import Base
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from ..metrics import instrument_engine, observe_pool_wait
+from ..query_profile import profile_engine
+from .generations import MENU_GENERATIONS, pin_live_generation
 import os
+import time
 
-DATABASE_URL = os.getenv("DATABASE_URL")
+def timed_pool(base, engine_name):
+    """Pool class that reports how long each checkout waited for a connection."""
+    class TimedPool(base):
+        def _do_get(self):
+            started = time.perf_counter()
+            try:
+                return super()._do_get()
+            finally:
+                observe_pool_wait(engine_name, time.perf_counter() - started)
 
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set!")
+    return TimedPool
 
-# Use a global engine and sessionmaker
-engine = create_engine(DATABASE_URL, pool_size=3, max_overflow=0)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+class MenuSession(Session):
+    """Sessions the API reads through, sync or async; see MENU_GENERATIONS in init_engines."""
 
-# Create tables (you might want to handle migrations separately)
-Base.metadata.create_all(bind=engine)
+def get_async_database_url(url):
+    """Point a postgres URL at the async psycopg driver; other URLs are used as given."""
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+psycopg://" + url[len(prefix):]
+    return url
+
+# Global engines and session factories, created by init_engines(). The async
+# ones stay None unless DB_ASYNC=1.
+engine = None
+SessionLocal = None
+async_engine = None
+AsyncSessionLocal = None
+
+def init_engines():
+    """
+    Create the engines and session factories from the environment, once.
+    Importing this module doesn't, so a missing DATABASE_URL shows up through
+    the backend's /ready probe rather than failing the import. The schema is
+    created with `python -m backend.db.migrate`, and the pool is opened by the
+    backend's startup warmup.
+    """
+    global engine, SessionLocal, async_engine, AsyncSessionLocal
+    if engine is not None:
+        return engine
+
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        raise ValueError("DATABASE_URL environment variable is not set!")
+
+    # Pool settings are shared by the sync and async engines
+    pool_settings = {
+        "pool_size": int(os.getenv("DB_POOL_SIZE", 3)),
+        "max_overflow": int(os.getenv("DB_MAX_OVERFLOW", 0)),
+        "pool_timeout": float(os.getenv("DB_POOL_TIMEOUT", 30)),
+    }
+
+    sync_engine = create_engine(database_url, poolclass=timed_pool(QueuePool, "sync"), **pool_settings)
+    instrument_engine(sync_engine)
+    profile_engine(sync_engine)
+    SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine, class_=MenuSession)
+
+    if os.getenv("DB_ASYNC", "0") == "1":
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        async_database_url = os.getenv("ASYNC_DATABASE_URL") or get_async_database_url(database_url)
+        async_engine = create_async_engine(
+            async_database_url, poolclass=timed_pool(AsyncAdaptedQueuePool, "async"), **pool_settings
+        )
+        instrument_engine(async_engine.sync_engine)
+        profile_engine(async_engine.sync_engine)
+        AsyncSessionLocal = async_sessionmaker(
+            async_engine, autoflush=False, expire_on_commit=False, sync_session_class=MenuSession
+        )
+
+    # Read menus from the live menu generation's schema (see db/generations.py)
+    if MENU_GENERATIONS:
+        event.listen(MenuSession, "after_begin", pin_live_generation)
+
+    engine = sync_engine
+    return engine
+
+def warm_pool():
+    """Open pool_size connections up front so the first requests don't pay for connecting."""
+    connections = []
+    try:
+        for _ in range(engine.pool.size()):
+            connections.append(engine.connect())
+            connections[-1].execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            connection.close()
+
+async def warm_async_pool():
+    connections = []
+    try:
+        for _ in range(async_engine.pool.size()):
+            connections.append(await async_engine.connect())
+            await connections[-1].execute(text("SELECT 1"))
+    finally:
+        for connection in connections:
+            await connection.close()
@@ -0,0 +1,43 @@
+"""
+Serving menu generations.
+
+parse_json.py --new-generation loads each menu into its own schema
+(menu_gen_<n>) and makes it live by flipping menu_generation.status in a short
+transaction that holds the table's exclusive lock and also bumps the data
+generation (dining-hall-scrapper/generations.py).
+
+With MENU_GENERATIONS=1, every session transaction on Postgres starts by
+putting the live schema first on its search_path, so the unqualified menu
+tables resolve to it while data_generation and the other shared tables still
+come from public. That one statement also takes a share lock on
+menu_generation for the rest of the transaction, which the swap waits for:
+a transaction reads one generation from start to end, and never pairs the new
+data generation number (which the caches are keyed by) with the old tables.
+Before the first generation is loaded, sessions keep reading public.
+"""
+import os
+
+from sqlalchemy import text
+
+MENU_GENERATIONS = os.getenv("MENU_GENERATIONS", "0") == "1"
+
+PIN_LIVE_GENERATION = text(
+    """
+    SELECT set_config(
+        'search_path',
+        COALESCE((SELECT quote_ident(schema_name) FROM menu_generation WHERE status = 'live'), 'public')
+            || ', ' || current_setting('search_path'),
+        true
+    )
+    """
+).execution_options(query_profile=False)
+
+
+def pin_live_generation(session, transaction, connection):
+    """
+    Session after_begin hook: read this transaction's menu from the live
+    generation. Left out of query profiles, so routes keep the budgets in
+    ROUTE_QUERY_BUDGETS whether or not generations are on.
+    """
+    if connection.dialect.name == "postgresql":
+        connection.execute(PIN_LIVE_GENERATION)
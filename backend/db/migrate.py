@@ -0,0 +1,105 @@
+"""
+Versioned schema migrations for the backend tables, run as an explicit step
+before starting the server rather than on import:
+
+    python -m backend.db.migrate             apply every pending migration
+    python -m backend.db.migrate --status    list migrations and whether they ran
+    python -m backend.db.migrate --to 1      apply migrations up to version 1
+
+Migrations live in backend/db/migrations (see its docstring). Applied versions
+are recorded in the schema_version table. On Postgres an advisory lock keeps
+concurrent deploys from applying the same migration twice.
+"""
+import argparse
+import importlib
+import logging
+import pkgutil
+import re
+
+from dotenv import load_dotenv
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, func, insert, inspect, select, text
+
+from . import migrations
+from . import database
+
+logger = logging.getLogger(__name__)
+
+# Arbitrary key for pg_advisory_xact_lock, shared by every migrate run
+MIGRATION_LOCK_ID = 7_301_2024
+
+schema_version = Table(
+    "schema_version",
+    MetaData(),
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def load_migrations():
+    """(version, module) for every migration module, in version order."""
+    found = []
+    for module_info in pkgutil.iter_modules(migrations.__path__):
+        match = re.match(r"v(\d{4})_", module_info.name)
+        if match:
+            module = importlib.import_module(f"{migrations.__name__}.{module_info.name}")
+            found.append((int(match.group(1)), module))
+    return sorted(found, key=lambda migration: migration[0])
+
+def applied_versions(connection):
+    schema_version.create(connection, checkfirst=True)
+    return set(connection.execute(select(schema_version.c.version)).scalars())
+
+def upgrade(bind=None, target=None):
+    """Apply pending migrations up to target (default: all) on bind, or the backend's engine. Returns the versions applied."""
+    bind = bind or database.init_engines()
+    applied = []
+    for version, module in load_migrations():
+        if target is not None and version > target:
+            break
+        with bind.begin() as connection:
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("SELECT pg_advisory_xact_lock(:id)"), {"id": MIGRATION_LOCK_ID})
+            if version in applied_versions(connection):
+                continue
+            logger.info(f"Applying migration {version:04d}: {module.DESCRIPTION}")
+            module.upgrade(connection)
+            connection.execute(insert(schema_version).values(version=version, description=module.DESCRIPTION))
+        applied.append(version)
+    return applied
+
+def status(bind=None):
+    """(version, description, applied) for every known migration."""
+    bind = bind or database.init_engines()
+    with bind.begin() as connection:
+        done = applied_versions(connection)
+    return [(version, module.DESCRIPTION, version in done) for version, module in load_migrations()]
+
+def pending_versions(bind=None):
+    """Versions of the known migrations not yet applied on bind. Read-only, unlike status()."""
+    bind = bind or database.init_engines()
+    with bind.connect() as connection:
+        if inspect(connection).has_table(schema_version.name):
+            done = set(connection.execute(select(schema_version.c.version)).scalars())
+        else:
+            done = set()
+    return [version for version, _ in load_migrations() if version not in done]
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply backend schema migrations.")
+    parser.add_argument("--status", action="store_true", help="List migrations without applying any")
+    parser.add_argument("--to", type=int, dest="target", help="Apply migrations up to this version")
+    args = parser.parse_args()
+
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    if args.status:
+        for version, description, done in status():
+            print(f"{version:04d}  {'applied' if done else 'pending':8} {description}")
+        return
+
+    applied = upgrade(target=args.target)
+    logger.info(f"Applied {len(applied)} migration(s)" if applied else "Schema is up to date")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,11 @@
+"""
+Versioned schema migrations, applied in order by `python -m backend.db.migrate`.
+
+Each module is named vNNNN_<summary>.py and defines DESCRIPTION and
+upgrade(connection). A migration runs in its own transaction and is recorded
+in the schema_version table. Databases created from the current models
+already have every change, so migrations check before they alter anything.
+Each migration spells out the tables and indexes it creates rather than
+taking them from models.py, so editing a model never changes what an old
+migration does.
+"""
@@ -0,0 +1,81 @@
+"""
+The tables as they stood before migrations, when the backend created them
+from the models at startup. They are spelled out here rather than taken from
+models.py, so later changes to the models are made by their own migrations:
+
+    allergen, location, meal_type, menu_item, menu_item_allergen,
+    always_available, menu_availability, cycle, day
+    data_generation  without day_ids (added by 0003)
+
+Existing tables are left untouched.
+"""
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Integer, MetaData, String, Table, func
+
+DESCRIPTION = "Create the menu tables"
+
+metadata = MetaData()
+
+Table(
+    "allergen", metadata,
+    Column("allergen_id", Integer, primary_key=True),
+    Column("allergen_code", String(5), nullable=False, unique=True),
+    Column("description", String(50), nullable=False),
+)
+Table(
+    "location", metadata,
+    Column("location_id", Integer, primary_key=True),
+    Column("location_name", String(50), nullable=False, unique=True),
+)
+Table(
+    "meal_type", metadata,
+    Column("meal_type_id", Integer, primary_key=True),
+    Column("meal_type_name", String(20), nullable=False, unique=True),
+)
+Table(
+    "menu_item", metadata,
+    Column("item_id", Integer, primary_key=True),
+    Column("item_name", String(100), nullable=False, unique=True),
+    Column("ai_description", String(255), nullable=True),
+)
+Table(
+    "menu_item_allergen", metadata,
+    Column("availability_id", Integer, ForeignKey("menu_availability.availability_id", ondelete="CASCADE"), primary_key=True),
+    Column("allergen_id", Integer, ForeignKey("allergen.allergen_id", ondelete="CASCADE"), primary_key=True),
+)
+Table(
+    "always_available", metadata,
+    Column("meal_type_id", Integer, ForeignKey("meal_type.meal_type_id"), primary_key=True),
+    Column("item_id", Integer, ForeignKey("menu_item.item_id"), primary_key=True),
+)
+Table(
+    "menu_availability", metadata,
+    Column("availability_id", Integer, primary_key=True),
+    Column("day_id", Integer, ForeignKey("day.day_id")),
+    Column("meal_type_id", Integer, ForeignKey("meal_type.meal_type_id")),
+    Column("location_id", Integer, ForeignKey("location.location_id")),
+    Column("item_id", Integer, ForeignKey("menu_item.item_id")),
+    Column("allergen_id", Integer, ForeignKey("allergen.allergen_id", ondelete="SET NULL")),
+)
+Table(
+    "cycle", metadata,
+    Column("cycle_id", Integer, primary_key=True),
+    Column("cycle_name", String, nullable=False),
+    Column("start_date", Date, nullable=False),
+    Column("cycle_identifier", String, nullable=False),
+)
+Table(
+    "day", metadata,
+    Column("day_id", Integer, primary_key=True),
+    Column("day_name", String(10), nullable=False),
+    Column("cycle_id", Integer, ForeignKey("cycle.cycle_id")),
+)
+Table(
+    "data_generation", metadata,
+    Column("generation_id", Integer, primary_key=True),
+    Column("source", String(50), nullable=False),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def upgrade(connection):
+    metadata.create_all(bind=connection)
@@ -0,0 +1,73 @@
+"""
+Unique keys behind parse_json.py's ON CONFLICT clauses and the indexes the
+menu queries filter and join on:
+
+    uq_menu_availability_slot          (day_id, meal_type_id, location_id, item_id),
+                                       covering availability_id on Postgres
+    uq_day_cycle_day_name              (cycle_id, day_name)
+    ix_menu_item_allergen_allergen_id  (allergen_id)
+
+A unique key that already exists under another name is kept as is. Creating a
+unique index fails, and the migration rolls back, if the table holds
+duplicate rows for it.
+"""
+import logging
+
+from sqlalchemy import Column, Index, Integer, MetaData, String, Table, inspect
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = "Add menu lookup indexes and ON CONFLICT unique keys"
+
+# The columns the indexes cover, as they stood in 0001
+metadata = MetaData()
+menu_availability = Table(
+    "menu_availability", metadata,
+    Column("availability_id", Integer, primary_key=True),
+    Column("day_id", Integer),
+    Column("meal_type_id", Integer),
+    Column("location_id", Integer),
+    Column("item_id", Integer),
+)
+day = Table(
+    "day", metadata,
+    Column("day_id", Integer, primary_key=True),
+    Column("day_name", String(10)),
+    Column("cycle_id", Integer),
+)
+menu_item_allergen = Table(
+    "menu_item_allergen", metadata,
+    Column("availability_id", Integer, primary_key=True),
+    Column("allergen_id", Integer, primary_key=True),
+)
+
+INDEXES = [
+    Index(
+        "uq_menu_availability_slot",
+        menu_availability.c.day_id, menu_availability.c.meal_type_id,
+        menu_availability.c.location_id, menu_availability.c.item_id,
+        unique=True,
+        postgresql_include=["availability_id"],
+    ),
+    Index("uq_day_cycle_day_name", day.c.cycle_id, day.c.day_name, unique=True),
+    Index("ix_menu_item_allergen_allergen_id", menu_item_allergen.c.allergen_id),
+]
+
+
+def _unique_column_sets(inspector, table_name):
+    column_sets = [set(c["column_names"]) for c in inspector.get_unique_constraints(table_name)]
+    column_sets += [set(i["column_names"]) for i in inspector.get_indexes(table_name) if i["unique"]]
+    return column_sets
+
+def upgrade(connection):
+    inspector = inspect(connection)
+    for index in INDEXES:
+        name = index.name
+        table_name = index.table.name
+        if any(existing["name"] == name for existing in inspector.get_indexes(table_name)):
+            continue
+        if index.unique and {column.name for column in index.columns} in _unique_column_sets(inspector, table_name):
+            logger.info(f"{table_name} already has a unique key equivalent to {name}, skipping")
+            continue
+        logger.info(f"Creating index {name} on {table_name}")
+        index.create(connection)
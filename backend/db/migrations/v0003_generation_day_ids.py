@@ -0,0 +1,24 @@
+"""
+Record which cycle-days each data generation changed, so the backend can tell
+clients what to refetch (see backend/events.py):
+
+    data_generation.day_ids  JSON list of day_ids, NULL when any day may have changed
+
+parse_json.py adds the column itself when it runs first, so an existing
+column is left alone.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = "Add data_generation.day_ids"
+
+
+def upgrade(connection):
+    columns = {column["name"] for column in inspect(connection).get_columns("data_generation")}
+    if "day_ids" in columns:
+        return
+    logger.info("Adding day_ids to data_generation")
+    connection.execute(text("ALTER TABLE data_generation ADD COLUMN day_ids TEXT"))
@@ -0,0 +1,42 @@
+"""
+Menu generations (see backend/db/generations.py):
+
+    menu_generation  one row per schema parse_json.py --new-generation loads
+                     into; the row with status 'live' is the one served
+
+parse_json.py created the table itself before the migrations owned the
+schema, so an existing table is left alone.
+"""
+import logging
+
+from sqlalchemy import Column, DateTime, Index, Integer, MetaData, String, Table, func, inspect, text
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = "Add menu_generation"
+
+menu_generation = Table(
+    "menu_generation", MetaData(),
+    Column("generation_id", Integer, primary_key=True),
+    Column("schema_name", String(63), nullable=False, unique=True),
+    # loading, live, retired, failed or dropped
+    Column("status", String(10), nullable=False),
+    Column("checksum", String(64)),
+    Column("created_at", DateTime, nullable=False, server_default=func.now()),
+    Column("activated_at", DateTime),
+    Column("retired_at", DateTime),
+    # At most one live generation
+    Index(
+        "uq_menu_generation_live", "status",
+        unique=True,
+        postgresql_where=text("status = 'live'"),
+        sqlite_where=text("status = 'live'"),
+    ),
+)
+
+
+def upgrade(connection):
+    if inspect(connection).has_table("menu_generation"):
+        return
+    logger.info("Creating menu_generation")
+    menu_generation.create(connection)
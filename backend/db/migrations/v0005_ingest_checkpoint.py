@@ -0,0 +1,30 @@
+"""
+Resumable ingestion (see dining-hall-scrapper/parse_json.py):
+
+    ingest_checkpoint  the cycles an interrupted run of a menu file committed
+
+parse_json.py created the table itself before the migrations owned the
+schema, so an existing table is left alone.
+"""
+import logging
+
+from sqlalchemy import Column, DateTime, MetaData, String, Table, Text, func, inspect
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTION = "Add ingest_checkpoint"
+
+ingest_checkpoint = Table(
+    "ingest_checkpoint", MetaData(),
+    Column("checksum", String(64), primary_key=True),
+    Column("completed_cycles", Text, nullable=False),
+    Column("day_ids", Text, nullable=False),
+    Column("updated_at", DateTime, nullable=False, server_default=func.now()),
+)
+
+
+def upgrade(connection):
+    if inspect(connection).has_table("ingest_checkpoint"):
+        return
+    logger.info("Creating ingest_checkpoint")
+    ingest_checkpoint.create(connection)
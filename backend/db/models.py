@@ -1,5 +1,5 @@
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy import Column, Integer, String, ForeignKey, Date
+from sqlalchemy import Column, Integer, String, Text, ForeignKey, Date, DateTime, Index, func, text
 from sqlalchemy.orm import relationship
 
 Base = declarative_base()
@@ -31,6 +31,10 @@ class MenuItem(Base):
     
 class MenuItemAllergen(Base):
     __tablename__ = "menu_item_allergen"
+    # The primary key serves lookups by availability_id; this one serves allergen deletes
+    __table_args__ = (
+        Index("ix_menu_item_allergen_allergen_id", "allergen_id"),
+    )
 
     availability_id = Column(Integer, ForeignKey("menu_availability.availability_id", ondelete="CASCADE"), primary_key=True)
     allergen_id = Column(Integer, ForeignKey("allergen.allergen_id", ondelete="CASCADE"), primary_key=True)
@@ -48,6 +52,16 @@ class AlwaysAvailable(Base):
 
 class MenuAvailability(Base):
     __tablename__ = "menu_availability"
+    # Menu lookups filter on day_id, then meal_type_id/location_id; parse_json.py's
+    # ON CONFLICT (day_id, meal_type_id, location_id, item_id) needs it to be unique
+    __table_args__ = (
+        Index(
+            "uq_menu_availability_slot",
+            "day_id", "meal_type_id", "location_id", "item_id",
+            unique=True,
+            postgresql_include=["availability_id"],
+        ),
+    )
 
     availability_id = Column(Integer, primary_key=True)
     day_id = Column(Integer, ForeignKey("day.day_id"))
@@ -73,6 +87,10 @@ class Cycle(Base):
     days = relationship("Day", back_populates="cycle")
 class Day(Base):
     __tablename__ = "day"
+    # Target of parse_json.py's ON CONFLICT (day_name, cycle_id)
+    __table_args__ = (
+        Index("uq_day_cycle_day_name", "cycle_id", "day_name", unique=True),
+    )
     day_id = Column(Integer, primary_key=True)
     day_name = Column(String(10), nullable=False)
     cycle_id = Column(Integer, ForeignKey("cycle.cycle_id"))
@@ -80,6 +98,53 @@ class Day(Base):
     cycle = relationship("Cycle", back_populates="days")
     menu_availabilities = relationship("MenuAvailability", back_populates="day")
 
-    
-
 
+class DataGeneration(Base):
+    """One row per ingestion run; the highest generation_id is the current data version."""
+    __tablename__ = "data_generation"
+    generation_id = Column(Integer, primary_key=True)
+    source = Column(String(50), nullable=False)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    # JSON list of the day_ids the run changed; NULL when it may have changed any day
+    day_ids = Column(Text)
+
+
+class MenuGeneration(Base):
+    """
+    One row per menu generation: a copy of the menu tables in schema_name,
+    loaded by parse_json.py --new-generation. The 'live' row is the schema
+    sessions read when MENU_GENERATIONS=1 (see db/generations.py).
+    """
+    __tablename__ = "menu_generation"
+    # At most one live generation
+    __table_args__ = (
+        Index(
+            "uq_menu_generation_live", "status",
+            unique=True,
+            postgresql_where=text("status = 'live'"),
+            sqlite_where=text("status = 'live'"),
+        ),
+    )
+    generation_id = Column(Integer, primary_key=True)
+    schema_name = Column(String(63), nullable=False, unique=True)
+    # loading, live, retired, failed or dropped
+    status = Column(String(10), nullable=False)
+    # sha256 of the menu file being loaded, to resume an interrupted load
+    checksum = Column(String(64))
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    activated_at = Column(DateTime)
+    retired_at = Column(DateTime)
+
+
+class IngestCheckpoint(Base):
+    """
+    Progress of an interrupted parse_json.py run, keyed by the menu file's
+    checksum; deleted when the run completes.
+    """
+    __tablename__ = "ingest_checkpoint"
+    # sha256 of the menu file's contents
+    checksum = Column(String(64), primary_key=True)
+    # JSON lists of the Daily Menus cycles committed so far and the day_ids they changed
+    completed_cycles = Column(Text, nullable=False)
+    day_ids = Column(Text, nullable=False)
+    updated_at = Column(DateTime, nullable=False, server_default=func.now())
@@ -1,3 +1,4 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
 from .models import (
     MenuItem,
@@ -9,156 +10,205 @@ from .models import (
     Day,
     Allergen,
     MenuItemAllergen,
+    DataGeneration,
 )
-import datetime
+import json
 import logging
 import time
 from typing import List, Optional
+from ..request_log import sampled
 
 # Configure logger for this module
 logger = logging.getLogger(__name__)
 
-def get_cycle_number(date_obj, reference_date, cycle_length_days=7):
-    logger.info(f"Calculating cycle number for date: {date_obj}, reference: {reference_date}")
-    delta_days = (date_obj - reference_date).days
-    cycle_number = ((delta_days // cycle_length_days) % 5) + 1# Cycles 1-5
-    logger.info(f"Calculated cycle number: {cycle_number} (delta_days: {delta_days})")
-    return cycle_number
 
-def get_menu_items(
+class FailedQuery(list):
+    """
+    The empty result a reference query returns after logging an error, so
+    callers can tell it from a table that really is empty and skip caching it.
+    """
+
+
+def _filter_availability(query, day_id, location_ids, meal_type_ids):
+    """
+    Apply the day and optional location/meal type filters to an availability query.
+    day_id may also be a list of day_ids.
+    """
+    if isinstance(day_id, (list, tuple)):
+        query = query.filter(MenuAvailability.day_id.in_(day_id))
+    else:
+        query = query.filter(MenuAvailability.day_id == day_id)
+
+    if location_ids:
+        logger.debug("Filtering by location_ids: %s", location_ids)
+        query = query.filter(MenuAvailability.location_id.in_(location_ids))
+
+    if meal_type_ids:
+        logger.debug("Filtering by meal_type_ids: %s", meal_type_ids)
+        query = query.filter(MenuAvailability.meal_type_id.in_(meal_type_ids))
+
+    return query
+
+def menu_items_query(
     db: Session,
-    date_str: str,
+    day_id: int,
     location_ids: Optional[List[int]],
     meal_type_ids: Optional[List[int]]
 ):
-    start_time = time.time()
-    logger.info(f"Starting get_menu_items query for date: {date_str}, locations: {location_ids}, meal_types: {meal_type_ids}")
-    
-    try:
-        # Convert date string to datetime object
-        date_obj = datetime.datetime.strptime(date_str, "%Y-%m-%d").date()
-        logger.info(f"Parsed date object: {date_obj}")
-    except ValueError as e:
-        logger.error(f"Invalid date format '{date_str}': {e}")
-        return []
-
-    # Reference start date for Cycle 1 EDIT THIS
-    reference_date = datetime.date(2026, 1, 20)
-    logger.info(f"Using reference date: {reference_date}")
-
-    # Calculate the cycle number
-    cycle_number = str(get_cycle_number(date_obj, reference_date))
-    logger.info(f"Determined cycle number: {cycle_number}")
-
-    # Get the cycle_id based on the cycle_number
-    logger.info(f"Querying for cycle with identifier: {cycle_number}")
-    cycle = db.query(Cycle).filter(Cycle.cycle_identifier == cycle_number).first()
-    if not cycle:
-        logger.warning(f"No cycle found for cycle_number: {cycle_number}")
-        return []
-    logger.info(f"Found cycle: {cycle.cycle_id}")
-
-    # Step 2: Get day name (e.g., 'Monday')
-    day_name = date_obj.strftime('%A')
-    logger.info(f"Day name for date {date_obj}: {day_name}")
-
-    # Step 3: Get the day_id corresponding to the day_name and cycle_id
-    logger.info(f"Querying for day: {day_name} in cycle: {cycle.cycle_id}")
-    day = db.query(Day).filter(
-        Day.day_name == day_name,
-        Day.cycle_id == cycle.cycle_id
-    ).first()
-
-    if not day:
-        logger.warning(f"No day found for day_name: {day_name} and cycle_id: {cycle.cycle_id}")
-        return []
-    logger.info(f"Found day: {day.day_id}")
-
-    # Step 4: Build the query
-    logger.info(f"Building query for day_id: {day.day_id}")
-    query = db.query(MenuAvailability).join(MenuItem).join(Location).join(MealType).filter(
-        MenuAvailability.day_id == day.day_id
+    """Availability rows for a cycle-day joined with item, location and meal type names."""
+    query = (
+        db.query(
+            MenuAvailability.availability_id,
+            MenuAvailability.day_id,
+            MenuItem.item_name,
+            MenuItem.ai_description,
+            Location.location_id,
+            Location.location_name,
+            MealType.meal_type_id,
+            MealType.meal_type_name,
+        )
+        .join(MenuItem, MenuItem.item_id == MenuAvailability.item_id)
+        .join(Location, Location.location_id == MenuAvailability.location_id)
+        .join(MealType, MealType.meal_type_id == MenuAvailability.meal_type_id)
     )
+    query = _filter_availability(query, day_id, location_ids, meal_type_ids)
+    return query.order_by(MenuAvailability.availability_id)
 
-    if location_ids:
-        logger.info(f"Filtering by location_ids: {location_ids}")
-        query = query.filter(MenuAvailability.location_id.in_(location_ids))
+def menu_allergens_query(
+    db: Session,
+    day_id: int,
+    location_ids: Optional[List[int]],
+    meal_type_ids: Optional[List[int]]
+):
+    """(availability_id, allergen_id, description) for every availability menu_items_query matches."""
+    query = (
+        db.query(
+            MenuItemAllergen.availability_id,
+            Allergen.allergen_id,
+            Allergen.description,
+        )
+        .join(Allergen, Allergen.allergen_id == MenuItemAllergen.allergen_id)
+        .join(MenuAvailability, MenuAvailability.availability_id == MenuItemAllergen.availability_id)
+    )
+    query = _filter_availability(query, day_id, location_ids, meal_type_ids)
+    return query.order_by(Allergen.allergen_id)
 
-    if meal_type_ids:
-        logger.info(f"Filtering by meal_type_ids: {meal_type_ids}")
-        query = query.filter(MenuAvailability.meal_type_id.in_(meal_type_ids))
+def _menu_item(ma, allergens_by_availability):
+    return {
+        "item_name": ma.item_name,
+        "location": ma.location_name,
+        "location_id": ma.location_id,
+        "meal_type": ma.meal_type_name,
+        "meal_type_id": ma.meal_type_id,
+        "allergens": allergens_by_availability.get(ma.availability_id, []),
+        "ai_description": ma.ai_description,
+    }
+
+def build_menu_items(
+    db: Session,
+    day_id: int,
+    location_ids: Optional[List[int]],
+    meal_type_ids: Optional[List[int]]
+):
+    """
+    Build the menu for a resolved cycle-day, optionally filtered by location and meal type.
+    """
+    # Step 4: Fetch the availability rows together with item, location and
+    # meal type names in a single joined query
+    logger.debug("Building query for day_id: %s", day_id)
+    logger.debug("Executing main menu availability query")
+    menu_availability_list = menu_items_query(db, day_id, location_ids, meal_type_ids).all()
+    logger.debug("Found %s menu availability records", len(menu_availability_list))
 
-    logger.info("Executing main menu availability query")
-    menu_availability_list = query.all()
-    logger.info(f"Found {len(menu_availability_list)} menu availability records")
+    # Step 5: Fetch the allergens for every matching availability at once
+    allergens_by_availability = {}
+    if menu_availability_list:
+        logger.debug("Fetching allergens for all menu availability records")
+        allergen_rows = menu_allergens_query(db, day_id, location_ids, meal_type_ids).all()
+        for availability_id, allergen_id, description in allergen_rows:
+            allergens_by_availability.setdefault(availability_id, []).append(
+                {"id": allergen_id, "name": description}
+            )
 
     # Process the results
-    result = []
-    logger.info("Processing menu availability records and fetching allergens")
-    
-    for i, ma in enumerate(menu_availability_list):
-        logger.info(f"Processing item {i+1}/{len(menu_availability_list)}: {ma.menu_item.item_name}")
-        
-        try:
-            # Fetch allergens for the menu item
-            allergens = (
-                db.query(Allergen.allergen_id, Allergen.description)
-                .join(MenuItemAllergen, Allergen.allergen_id == MenuItemAllergen.allergen_id)
-                .filter(MenuItemAllergen.availability_id == ma.availability_id)
-                .all()
-            )
-            allergens_list = [{"id": a[0], "name": a[1]} for a in allergens]
-            logger.info(f"Found {len(allergens_list)} allergens for item: {ma.menu_item.item_name}")
-
-            item = {
-                "item_name": ma.menu_item.item_name,
-                "location": ma.location.location_name,
-                "location_id": ma.location.location_id,
-                "meal_type": ma.meal_type.meal_type_name,
-                "meal_type_id": ma.meal_type.meal_type_id, 
-                "allergens": allergens_list,
-                "ai_description": ma.menu_item.ai_description,
-            }
-            result.append(item)
-        except Exception as e:
-            logger.error(f"Error processing menu item {ma.menu_item.item_name}: {e}")
-            continue
-    
-    elapsed_time = time.time() - start_time
-    logger.info(f"get_menu_items completed in {elapsed_time:.3f}s, returning {len(result)} items")
+    result = [_menu_item(ma, allergens_by_availability) for ma in menu_availability_list]
+
+    # Per-item detail is sampled so debug logging stays cheap on big menus
+    if logger.isEnabledFor(logging.DEBUG):
+        for item in result:
+            if sampled():
+                logger.debug("Menu item %s at %s/%s with %d allergens", item["item_name"], item["location"], item["meal_type"], len(item["allergens"]))
     return result
 
+def build_week_menu_items(
+    db: Session,
+    day_ids: List[int],
+    location_ids: Optional[List[int]],
+    meal_type_ids: Optional[List[int]]
+):
+    """
+    Build the menus of several cycle-days with the same two queries
+    build_menu_items uses for one. Returns {day_id: items}, with an empty list
+    for days that have no menu.
+    """
+    day_ids = sorted(set(day_ids))
+    menus = {day_id: [] for day_id in day_ids}
+    if not day_ids:
+        return menus
+
+    menu_availability_list = menu_items_query(db, day_ids, location_ids, meal_type_ids).all()
+    logger.debug("Found %s menu availability records for %s days", len(menu_availability_list), len(day_ids))
+
+    allergens_by_availability = {}
+    if menu_availability_list:
+        allergen_rows = menu_allergens_query(db, day_ids, location_ids, meal_type_ids).all()
+        for availability_id, allergen_id, description in allergen_rows:
+            allergens_by_availability.setdefault(availability_id, []).append(
+                {"id": allergen_id, "name": description}
+            )
+
+    for ma in menu_availability_list:
+        menus[ma.day_id].append(_menu_item(ma, allergens_by_availability))
+    return menus
 
 def get_always_available_items(db: Session):
-    logger.info("Fetching always available items")
+    logger.debug("Fetching always available items")
     start_time = time.time()
     
     try:
-        items = db.query(AlwaysAvailable).all()
-        logger.info(f"Found {len(items)} always available items in database")
+        # Join the names in rather than lazy-loading both relationships per row
+        items = (
+            db.query(MenuItem.item_name, MealType.meal_type_name)
+            .select_from(AlwaysAvailable)
+            .join(MenuItem, AlwaysAvailable.item_id == MenuItem.item_id)
+            .join(MealType, AlwaysAvailable.meal_type_id == MealType.meal_type_id)
+            .order_by(AlwaysAvailable.meal_type_id, AlwaysAvailable.item_id)
+            .all()
+        )
+        logger.debug("Found %s always available items in database", len(items))
         
         result = [
             {
-                "item_name": item.menu_item.item_name,
-                "meal_type": item.meal_type.meal_type_name,
+                "item_name": item_name,
+                "meal_type": meal_type_name,
             }
-            for item in items
+            for item_name, meal_type_name in items
         ]
         
         elapsed_time = time.time() - start_time
-        logger.info(f"get_always_available_items completed in {elapsed_time:.3f}s, returning {len(result)} items")
+        logger.debug("get_always_available_items completed in %.3fs, returning %s items", elapsed_time, len(result))
         return result
     except Exception as e:
         logger.error(f"Error fetching always available items: {e}")
-        return []
+        return FailedQuery()
 
 def get_locations(db: Session):
-    logger.info("Fetching all locations")
+    logger.debug("Fetching all locations")
     start_time = time.time()
     
     try:
         locations = db.query(Location).all()
-        logger.info(f"Found {len(locations)} locations in database")
+        logger.debug("Found %s locations in database", len(locations))
         
         result = [
             {
@@ -169,19 +219,19 @@ def get_locations(db: Session):
         ]
         
         elapsed_time = time.time() - start_time
-        logger.info(f"get_locations completed in {elapsed_time:.3f}s, returning {len(result)} locations")
+        logger.debug("get_locations completed in %.3fs, returning %s locations", elapsed_time, len(result))
         return result
     except Exception as e:
         logger.error(f"Error fetching locations: {e}")
-        return []
+        return FailedQuery()
 
 def get_meal_types(db: Session):
-    logger.info("Fetching all meal types")
+    logger.debug("Fetching all meal types")
     start_time = time.time()
     
     try:
         meal_types = db.query(MealType).all()
-        logger.info(f"Found {len(meal_types)} meal types in database")
+        logger.debug("Found %s meal types in database", len(meal_types))
         
         result = [
             {
@@ -192,19 +242,19 @@ def get_meal_types(db: Session):
         ]
         
         elapsed_time = time.time() - start_time
-        logger.info(f"get_meal_types completed in {elapsed_time:.3f}s, returning {len(result)} meal types")
+        logger.debug("get_meal_types completed in %.3fs, returning %s meal types", elapsed_time, len(result))
         return result
     except Exception as e:
         logger.error(f"Error fetching meal types: {e}")
-        return []
+        return FailedQuery()
 
 def get_days(db: Session):
-    logger.info("Fetching all days")
+    logger.debug("Fetching all days")
     start_time = time.time()
     
     try:
         days = db.query(Day).all()
-        logger.info(f"Found {len(days)} days in database")
+        logger.debug("Found %s days in database", len(days))
         
         result = [
             {
@@ -215,19 +265,19 @@ def get_days(db: Session):
         ]
         
         elapsed_time = time.time() - start_time
-        logger.info(f"get_days completed in {elapsed_time:.3f}s, returning {len(result)} days")
+        logger.debug("get_days completed in %.3fs, returning %s days", elapsed_time, len(result))
         return result
     except Exception as e:
         logger.error(f"Error fetching days: {e}")
-        return []
+        return FailedQuery()
 
 def get_allergens(db: Session):
-    logger.info("Fetching all allergens")
+    logger.debug("Fetching all allergens")
     start_time = time.time()
     
     try:
         allergens = db.query(Allergen).all()
-        logger.info(f"Found {len(allergens)} allergens in database")
+        logger.debug("Found %s allergens in database", len(allergens))
         
         result = [
             {
@@ -238,8 +288,85 @@ def get_allergens(db: Session):
         ]
         
         elapsed_time = time.time() - start_time
-        logger.info(f"get_allergens completed in {elapsed_time:.3f}s, returning {len(result)} allergens")
+        logger.debug("get_allergens completed in %.3fs, returning %s allergens", elapsed_time, len(result))
         return result
     except Exception as e:
         logger.error(f"Error fetching allergens: {e}")
-        return []
+        return FailedQuery()
+
+def get_data_generation(db: Session):
+    """
+    Return the current data generation number, bumped by every ingestion run.
+    """
+    generation = db.query(func.max(DataGeneration.generation_id)).scalar()
+    return generation or 0
+
+def get_generations_since(db: Session, generation):
+    """
+    Return (generation_id, source, day_ids) for every generation after the
+    given one, oldest first. day_ids is a list, or None when any day may have changed.
+    """
+    rows = (
+        db.query(DataGeneration.generation_id, DataGeneration.source, DataGeneration.day_ids)
+        .filter(DataGeneration.generation_id > generation)
+        .order_by(DataGeneration.generation_id)
+        .all()
+    )
+    return [
+        (generation_id, source, json.loads(day_ids) if day_ids else None)
+        for generation_id, source, day_ids in rows
+    ]
+
+def get_menu_days(db: Session):
+    """
+    Return (cycle_id, day_id) for every cycle-day that has at least one menu item.
+    """
+    rows = (
+        db.query(Day.cycle_id, Day.day_id)
+        .join(MenuAvailability, MenuAvailability.day_id == Day.day_id)
+        .distinct()
+        .all()
+    )
+    return [(cycle_id, day_id) for cycle_id, day_id in rows]
+
+def get_cycles(db: Session):
+    """
+    Return (cycle_id, cycle_identifier, start_date) for every scraped cycle week.
+    """
+    rows = db.query(Cycle.cycle_id, Cycle.cycle_identifier, Cycle.start_date).all()
+    return [tuple(row) for row in rows]
+
+def get_cycle_days(db: Session):
+    """
+    Return (cycle_id, day_id, day_name) for every day of every cycle.
+    """
+    rows = db.query(Day.cycle_id, Day.day_id, Day.day_name).all()
+    return [tuple(row) for row in rows]
+
+def get_menu_item_names(db: Session):
+    """
+    Return (item_id, item_name) for every menu item.
+    """
+    rows = db.query(MenuItem.item_id, MenuItem.item_name).order_by(MenuItem.item_id).all()
+    return [tuple(row) for row in rows]
+
+def get_item_occurrences(db: Session):
+    """
+    Return (item_id, day_id, location_id, location_name, meal_type_id, meal_type_name)
+    for every menu availability row.
+    """
+    rows = (
+        db.query(
+            MenuAvailability.item_id,
+            MenuAvailability.day_id,
+            Location.location_id,
+            Location.location_name,
+            MealType.meal_type_id,
+            MealType.meal_type_name,
+        )
+        .join(Location, Location.location_id == MenuAvailability.location_id)
+        .join(MealType, MealType.meal_type_id == MenuAvailability.meal_type_id)
+        .order_by(MenuAvailability.day_id, MealType.meal_type_id, Location.location_id)
+        .all()
+    )
+    return [tuple(row) for row in rows]
@@ -1,5 +1,8 @@
 import os
+import json
 import logging
+import subprocess
+import sys
 from openai import OpenAI
 from dotenv import load_dotenv
 import psycopg2
@@ -50,6 +53,23 @@ def get_db_connection():
         logger.error(f"Database connection failed: {e}")
         raise
 
+# Where `python -m backend.snapshot` runs from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def write_snapshot(path, menu_generations=False):
+    """
+    Rewrite the menu snapshot workers serve from (backend/snapshot.py), same as parse_json.py.
+    With menu_generations it's read from the live generation, where the descriptions went.
+    """
+    logger.info(f"Rewriting menu snapshot {path}...")
+    env = dict(os.environ)
+    if menu_generations:
+        env["MENU_GENERATIONS"] = "1"
+    subprocess.run(
+        [sys.executable, "-m", "backend.snapshot", "--output", os.path.abspath(path)],
+        cwd=REPO_ROOT, env=env, check=True
+    )
+
 def generate_ai_description(item_name, allergens):
     """
     Generate an AI-powered description for a menu item.
@@ -77,6 +97,23 @@ def update_menu_descriptions():
     cur = conn.cursor()
     
     try:
+        # With menu generations, describe the items of the live one
+        # (backend/db/generations.py). This holds off a generation swap until
+        # the run commits; parse_json.py can simply be rerun.
+        cur.execute("SELECT to_regclass('menu_generation') IS NOT NULL")
+        menu_generations = cur.fetchone()[0]
+        if menu_generations:
+            cur.execute(
+                """
+                SELECT set_config(
+                    'search_path',
+                    COALESCE((SELECT quote_ident(schema_name) FROM menu_generation WHERE status = 'live'), 'public')
+                        || ', ' || current_setting('search_path'),
+                    true
+                )
+                """
+            )
+
         # Fetch menu items without descriptions
         logger.info("Fetching menu items without descriptions...")
         cur.execute("""
@@ -102,6 +139,7 @@ def update_menu_descriptions():
             return
 
         processed_count = 0
+        updated_item_ids = []
         for item in items:
             item_id, item_name, allergens = item
             processed_count += 1
@@ -118,6 +156,7 @@ def update_menu_descriptions():
                     "UPDATE menu_item SET ai_description = %s WHERE item_id = %s",
                     (description, item_id)
                 )
+                updated_item_ids.append(item_id)
                 
                 if processed_count % 10 == 0:
                     logger.info(f"Progress: {processed_count}/{total_items} items processed")
@@ -126,11 +165,32 @@ def update_menu_descriptions():
                 logger.error(f"Error processing item {item_name}: {e}")
                 continue
 
+        if not updated_item_ids:
+            # Nothing changed: a new generation would only make every backend drop its caches
+            logger.warning("No descriptions were generated, leaving the data generation as it is")
+            return
+
+        # Bump the data generation so running backends drop their cached menus,
+        # recording the days that serve the updated items
+        cur.execute(
+            "SELECT DISTINCT day_id FROM menu_availability WHERE item_id = ANY(%s) ORDER BY day_id",
+            (updated_item_ids,)
+        )
+        day_ids = [row[0] for row in cur.fetchall()]
+        cur.execute(
+            "INSERT INTO data_generation (source, day_ids) VALUES (%s, %s)",
+            ("generate_description", json.dumps(day_ids))
+        )
+
         # Commit all changes
         logger.info("Committing changes to database...")
         conn.commit()
         logger.info(f"Successfully updated {processed_count} menu item descriptions!")
 
+        # Workers serving from the snapshot only see the descriptions once it's rewritten
+        if os.getenv("SNAPSHOT_FILE"):
+            write_snapshot(os.getenv("SNAPSHOT_FILE"), menu_generations)
+
     except Exception as e:
         logger.error(f"Error during description update process: {e}")
         conn.rollback()
@@ -0,0 +1,117 @@
+from collections import namedtuple
+import bisect
+import datetime
+import json
+import logging
+import os
+from zoneinfo import ZoneInfo
+
+from .cycle_calendar import DAY_NAMES
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+DINING_HOURS_FILE = os.getenv(
+    "DINING_HOURS_FILE", os.path.join(os.path.dirname(__file__), "data", "dining_hours.json")
+)
+
+MINUTES_PER_DAY = 24 * 60
+
+# A meal served at a location on a given date
+MealWindow = namedtuple("MealWindow", ["meal_type", "date", "start", "end"])
+# What a location is serving at some moment; either side may be None
+LocationStatus = namedtuple("LocationStatus", ["location", "current", "next"])
+
+
+def parse_days(spec):
+    """Weekday numbers (Monday = 0) for "Saturday" or an inclusive range like "Monday-Friday"."""
+    first, _, last = spec.partition("-")
+    start = DAY_NAMES.index(first.strip())
+    end = DAY_NAMES.index((last or first).strip())
+    return [(start + offset) % 7 for offset in range((end - start) % 7 + 1)]
+
+def parse_minutes(value):
+    hours, minutes = value.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+class DiningSchedule:
+    """
+    Weekly dining hours compiled into one sorted list of meal intervals per
+    location, in minutes from Monday 00:00, so the current and next meal are
+    found with a binary search. Intervals end exclusively: a meal ending at
+    10:00 is over at 10:00.
+    """
+
+    def __init__(self, hours):
+        self.timezone = ZoneInfo(hours.get("timezone", "UTC"))
+        self._locations = {}
+        for location, by_days in hours["locations"].items():
+            intervals = []
+            for day_spec, meals in by_days.items():
+                for weekday in parse_days(day_spec):
+                    for meal_type, (start, end) in meals.items():
+                        start_minute = weekday * MINUTES_PER_DAY + parse_minutes(start)
+                        end_minute = weekday * MINUTES_PER_DAY + parse_minutes(end)
+                        if end_minute <= start_minute:
+                            raise ValueError(f"{location} {meal_type} on {day_spec} ends before it starts")
+                        intervals.append((start_minute, end_minute, meal_type))
+            intervals.sort()
+            for earlier, later in zip(intervals, intervals[1:]):
+                if later[0] < earlier[1]:
+                    raise ValueError(f"{location} has overlapping meals: {earlier[2]} and {later[2]}")
+            self._locations[location] = ([interval[0] for interval in intervals], intervals)
+
+    @classmethod
+    def from_file(cls, path=DINING_HOURS_FILE):
+        with open(path) as f:
+            return cls(json.load(f))
+
+    @property
+    def locations(self):
+        return list(self._locations)
+
+    def now(self):
+        return datetime.datetime.now(self.timezone)
+
+    def status(self, moment):
+        """
+        LocationStatus for every location at moment, in schedule order. Naive
+        datetimes are taken to be in the schedule's timezone.
+        """
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=self.timezone)
+        else:
+            moment = moment.astimezone(self.timezone)
+        week_start = moment.date() - datetime.timedelta(days=moment.weekday())
+        minute = moment.weekday() * MINUTES_PER_DAY + moment.hour * 60 + moment.minute
+
+        statuses = []
+        for location, (starts, intervals) in self._locations.items():
+            current = upcoming = None
+            if intervals:
+                position = bisect.bisect_right(starts, minute)
+                if position and intervals[position - 1][1] > minute:
+                    current = self._window(intervals[position - 1], week_start)
+                if position < len(intervals):
+                    upcoming = self._window(intervals[position], week_start)
+                else:
+                    # Past the last meal of the week; wrap to next week's first
+                    upcoming = self._window(intervals[0], week_start + datetime.timedelta(days=7))
+            statuses.append(LocationStatus(location, current, upcoming))
+        return statuses
+
+    @staticmethod
+    def _window(interval, week_start):
+        start_minute, end_minute, meal_type = interval
+        day, start = divmod(start_minute, MINUTES_PER_DAY)
+        end = end_minute - day * MINUTES_PER_DAY
+        return MealWindow(
+            meal_type,
+            week_start + datetime.timedelta(days=day),
+            datetime.time(start // 60, start % 60),
+            datetime.time(end // 60, end % 60),
+        )
+
+
+dining_schedule = DiningSchedule.from_file()
@@ -0,0 +1,127 @@
+from collections import deque
+import asyncio
+import json
+import logging
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+HEARTBEAT = b": keepalive\n\n"
+
+
+def format_event(event, data, event_id=None):
+    """Encode one Server-Sent Event with a JSON payload."""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append("data: " + json.dumps(data, separators=(",", ":")))
+    return ("\n".join(lines) + "\n\n").encode("utf-8")
+
+
+class Subscriber:
+    """
+    One connected client: a bounded buffer of encoded events and a flag its
+    stream waits on. A client that falls max_buffer events behind has its
+    backlog replaced by a single resync event telling it to refetch everything.
+    """
+
+    __slots__ = ("buffer", "max_buffer", "ready")
+
+    def __init__(self, max_buffer):
+        self.buffer = deque()
+        self.max_buffer = max_buffer
+        self.ready = asyncio.Event()
+
+    def push(self, chunk, resync):
+        """Buffer chunk; returns True when the backlog overflowed and was replaced by resync."""
+        overflowed = len(self.buffer) >= self.max_buffer
+        if overflowed:
+            self.buffer.clear()
+            chunk = resync
+        self.buffer.append(chunk)
+        self.ready.set()
+        return overflowed
+
+    async def next_chunk(self):
+        """Wait for events and return everything buffered as one write."""
+        await self.ready.wait()
+        self.ready.clear()
+        chunk = b"".join(self.buffer)
+        self.buffer.clear()
+        return chunk
+
+
+class EventBroadcaster:
+    """
+    Fans data generation changes out to every connected /events client.
+
+    Each event is encoded once and the same bytes are appended to every
+    client's buffer, so an idle connection costs a deque, an asyncio.Event and
+    a parked coroutine. A single heartbeat loop writes keepalives to clients
+    with nothing pending, which also surfaces dropped connections. The most
+    recent events are kept so reconnecting clients can catch up from their
+    Last-Event-ID.
+    """
+
+    def __init__(self, max_buffer=16, history_size=64, heartbeat_interval=15.0):
+        self.max_buffer = max_buffer
+        self.heartbeat_interval = heartbeat_interval
+        self.generation = None
+        self.published = 0
+        self.resyncs = 0
+        self._subscribers = set()
+        # (previous generation, generation, encoded event), oldest first
+        self._history = deque(maxlen=history_size)
+
+    def __len__(self):
+        return len(self._subscribers)
+
+    def _resync(self):
+        return format_event("resync", {"generation": self.generation}, self.generation)
+
+    def subscribe(self, last_event_id=None):
+        """
+        Register a client. With the last generation it saw, it is sent the
+        events it missed, or a resync when they are no longer in the history.
+        """
+        subscriber = Subscriber(self.max_buffer)
+        self._subscribers.add(subscriber)
+        if last_event_id is not None and self.generation is not None and last_event_id < self.generation:
+            missed = [chunk for previous, generation, chunk in self._history if generation > last_event_id]
+            oldest_previous = self._history[0][0] if self._history else None
+            if oldest_previous is not None and oldest_previous <= last_event_id:
+                for chunk in missed:
+                    subscriber.push(chunk, self._resync())
+            else:
+                subscriber.push(self._resync(), None)
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        self._subscribers.discard(subscriber)
+
+    def publish(self, generation, data):
+        """Send a generation event to every client."""
+        chunk = format_event("generation", data, generation)
+        self._history.append((self.generation, generation, chunk))
+        self.generation = generation
+        self.published += 1
+        resync = self._resync()
+        for subscriber in self._subscribers:
+            self.resyncs += subscriber.push(chunk, resync)
+        logger.info(f"Published data generation {generation} to {len(self._subscribers)} event clients")
+
+    async def heartbeat(self):
+        while True:
+            await asyncio.sleep(self.heartbeat_interval)
+            for subscriber in self._subscribers:
+                if not subscriber.buffer:
+                    subscriber.push(HEARTBEAT, None)
+
+    def stats(self):
+        return {
+            "clients": len(self._subscribers),
+            "generation": self.generation,
+            "published": self.published,
+            "resyncs": self.resyncs,
+        }
@@ -0,0 +1,99 @@
+from collections import namedtuple
+import datetime
+import logging
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+# Where an item is served on a cycle-day
+Occurrence = namedtuple("Occurrence", ["location_id", "location_name", "meal_type_id", "meal_type_name"])
+# The next date an item is served, with every meal and location serving it that day
+NextServing = namedtuple("NextServing", ["date", "day_id", "occurrences"])
+# One built schedule; replaced whole, never modified
+ScheduleTables = namedtuple("ScheduleTables", ["names", "by_item", "generation"])
+
+
+class ItemSchedule:
+    """
+    Inverted index from item_id to the cycle-days, meals and locations it is
+    served at, built once per data generation from menu_availability.
+
+    Combined with the cycle calendar, which keeps each cycle-day's dates in
+    sorted order, "when is this item on next" is a handful of binary searches
+    (one per cycle-day the item appears on) instead of a table scan.
+    """
+
+    def __init__(self, items=(), occurrences=(), generation=None):
+        self.load(items, occurrences, generation)
+
+    def load(self, items, occurrences, generation):
+        """
+        Rebuild the index from fresh rows.
+        items: (item_id, item_name) rows
+        occurrences: (item_id, day_id, location_id, location_name, meal_type_id, meal_type_name) rows
+        """
+        names = dict(items)
+        by_item = {}
+        for item_id, day_id, *occurrence in occurrences:
+            by_item.setdefault(item_id, {}).setdefault(day_id, []).append(Occurrence(*occurrence))
+        for by_day in by_item.values():
+            for served in by_day.values():
+                served.sort(key=lambda occurrence: (occurrence.meal_type_id, occurrence.location_id))
+
+        # load runs in a worker thread while readers run on the event loop:
+        # publish with one assignment, and each reader takes it once
+        self._tables = ScheduleTables(names, by_item, generation)
+        if names:
+            logger.info(f"Item schedule loaded: {len(by_item)} of {len(names)} items on the menu")
+
+    @property
+    def generation(self):
+        return self._tables.generation
+
+    def __contains__(self, item_id):
+        return item_id in self._tables.names
+
+    def name(self, item_id):
+        return self._tables.names.get(item_id)
+
+    def occurrences(self, item_id, dates_by_day):
+        """
+        Every (date, location_id, location_name, meal_type_id, meal_type_name)
+        the item is served at, for the dates in dates_by_day (day_id -> dates), in date order.
+        """
+        found = [
+            (date_obj, *occurrence)
+            for day_id, served in self._tables.by_item.get(item_id, {}).items()
+            for date_obj in dates_by_day.get(day_id, ())
+            for occurrence in served
+        ]
+        found.sort(key=lambda occurrence: (occurrence[0], occurrence[3], occurrence[1]))
+        return found
+
+    def next_serving(self, item_id, after, calendar):
+        """The NextServing of item_id on or after the date `after`, or None if it isn't coming back."""
+        by_day = self._tables.by_item.get(item_id, {})
+        best = None
+        for day_id in by_day:
+            date_obj = calendar.next_date(day_id, after)
+            if date_obj is not None and (best is None or date_obj < best[0]):
+                best = (date_obj, day_id)
+        if best is None:
+            return None
+        date_obj, day_id = best
+        return NextServing(date_obj, day_id, by_day[day_id])
+
+
+def dates_by_day(calendar, start_date, days):
+    """Map day_id to the dates it is served on, for days dates from start_date."""
+    by_day = {}
+    for offset in range(days):
+        date_obj = start_date + datetime.timedelta(days=offset)
+        cycle_day = calendar.lookup(date_obj)
+        if cycle_day:
+            by_day.setdefault(cycle_day.day_id, []).append(date_obj)
+    return by_day
+
+
+# Rebuilt alongside the search index whenever the data generation changes
+item_schedule = ItemSchedule()
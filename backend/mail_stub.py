@@ -0,0 +1,112 @@
+"""
+Local stand-in for the Mailgun messages API.
+
+Lets the issue-report queue be exercised without network access or a Mailgun
+account. Point the backend at it with MAILGUN_API_URL:
+
+    python -m backend.mail_stub --port 8025 --fail-first 2 --delay 0.5
+    MAILGUN_API_URL=http://127.0.0.1:8025/messages MAILGUN_API_KEY=test \
+        MAILGUN_DOMAIN=example.com RECIPIENT_EMAIL=dev@example.com \
+        uvicorn backend.main:app
+
+--fail-first makes the first N requests return --fail-status, for checking
+retries. A long --delay fills the queue, for checking backpressure. The stand-in
+can also be used in-process through MailgunStandIn, which records every message
+it receives.
+"""
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import logging
+import threading
+import time
+from urllib.parse import parse_qs
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+
+class MailgunStandIn:
+    def __init__(self, host="127.0.0.1", port=0, delay=0.0, fail_first=0, fail_status=503):
+        self.delay = delay
+        self.fail_first = fail_first
+        self.fail_status = fail_status
+        self.requests = 0
+        self.received = []
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._make_handler())
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/messages"
+
+    def _make_handler(self):
+        stand_in = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                fields = {key: values[0] for key, values in parse_qs(self.rfile.read(length).decode()).items()}
+                if stand_in.delay:
+                    time.sleep(stand_in.delay)
+
+                with stand_in._lock:
+                    stand_in.requests += 1
+                    failing = stand_in.requests <= stand_in.fail_first
+                    if not failing:
+                        stand_in.received.append(fields)
+
+                status = stand_in.fail_status if failing else 200
+                body = {"message": "Simulated failure"} if failing else {"id": f"<stub-{stand_in.requests}>", "message": "Queued. Thank you."}
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+                logger.info(f"{status} {fields.get('subject', '')}")
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the Mailgun messages API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8025)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before answering each request")
+    parser.add_argument("--fail-first", type=int, default=0, help="Number of initial requests to fail")
+    parser.add_argument("--fail-status", type=int, default=503, help="Status code returned for failed requests")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    stand_in = MailgunStandIn(args.host, args.port, args.delay, args.fail_first, args.fail_status)
+    print(f"Mailgun stand-in listening on {stand_in.url}", flush=True)
+    try:
+        stand_in._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stand_in._server.server_close()
+
+if __name__ == "__main__":
+    main()
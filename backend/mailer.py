@@ -0,0 +1,216 @@
+import asyncio
+from dataclasses import dataclass
+import html
+import logging
+import random
+from typing import Optional
+
+import httpx
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+SENDER = "Better Dining Hall Menu <noreply@longbeachmenu.com>"
+
+
+@dataclass
+class IssueReport:
+    error_type: str
+    message: str
+    email: Optional[str] = None
+
+
+def render_report(report: IssueReport):
+    """Render one report as the HTML block used in issue emails."""
+    return f"""
+                    <div style="font-family: Arial, sans-serif; line-height: 1.6;">
+                        <h2 style="color: #4CAF50;">New Issue Reported</h2>
+                        <p><strong>Problem:</strong> {html.escape(report.error_type)}</p>
+                        <p><strong>Message:</strong> {html.escape(report.message)}</p>
+                        <p><strong>Reported by:</strong> {html.escape(report.email or 'Anonymous')}</p>
+                        <hr>
+                    </div>"""
+
+def build_email(reports, recipient):
+    """Build the Mailgun form fields for one report, or a digest of several."""
+    if len(reports) == 1:
+        subject = f"Issue Reported: {reports[0].error_type}"
+    else:
+        subject = f"{len(reports)} Issues Reported"
+
+    body = "".join(render_report(report) for report in reports)
+    return {
+        "from": SENDER,
+        "to": recipient,
+        "subject": subject,
+        "html": f"""
+            <html>
+                <body>{body}
+                    <p style="font-size: 0.9em; color: #555;">This email was sent from the Better Dining Hall Menu system.</p>
+                </body>
+            </html>
+            """,
+    }
+
+
+class DeliveryError(Exception):
+    def __init__(self, message, retryable):
+        super().__init__(message)
+        self.retryable = retryable
+
+
+class MailQueue:
+    """
+    Bounded in-process queue of issue reports delivered to Mailgun by background workers.
+
+    submit() never blocks: it returns False when the queue is full so the caller
+    can push back on the client. Workers share one pooled httpx.AsyncClient,
+    retry network errors, 429 and 5xx responses with exponential backoff, and
+    with batch_size > 1 fold reports that arrive within batch_window seconds
+    into a single digest email.
+    """
+
+    def __init__(
+        self,
+        api_url,
+        api_key,
+        recipient,
+        max_size=100,
+        workers=1,
+        max_attempts=5,
+        backoff_base=1.0,
+        backoff_max=60.0,
+        batch_size=1,
+        batch_window=0.0,
+        timeout=10.0,
+    ):
+        self.api_url = api_url
+        self.api_key = api_key
+        self.recipient = recipient
+        self.max_size = max_size
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.timeout = timeout
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.rejected = 0
+        self._queue = None
+        self._client = None
+        self._tasks = []
+
+    @property
+    def running(self):
+        return bool(self._tasks)
+
+    def pending(self):
+        return self._queue.qsize() if self._queue else 0
+
+    def stats(self):
+        return {
+            "running": self.running,
+            "pending": self.pending(),
+            "sent": self.sent,
+            "failed": self.failed,
+            "retries": self.retries,
+            "rejected": self.rejected,
+        }
+
+    async def start(self):
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            limits=httpx.Limits(max_connections=self.workers, max_keepalive_connections=self.workers),
+        )
+        self._tasks = [asyncio.create_task(self._worker(n)) for n in range(self.workers)]
+        logger.info(f"Mail queue started with {self.workers} worker(s)")
+
+    async def stop(self, drain_timeout=10.0):
+        """Give queued reports up to drain_timeout seconds to go out, then shut down."""
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Mail queue stopped with {self.pending()} undelivered report(s)")
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self._client.aclose()
+        self._client = None
+
+    def submit(self, report: IssueReport):
+        """Queue a report for delivery. Returns False if the queue is full or stopped."""
+        if not self.running:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait(report)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            logger.warning(f"Mail queue full ({self.max_size}), rejecting report")
+            return False
+        return True
+
+    async def _next_batch(self):
+        reports = [await self._queue.get()]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.batch_window
+        while len(reports) < self.batch_size:
+            remaining = deadline - loop.time()
+            try:
+                if remaining > 0:
+                    reports.append(await asyncio.wait_for(self._queue.get(), remaining))
+                else:
+                    reports.append(self._queue.get_nowait())
+            except (asyncio.TimeoutError, asyncio.QueueEmpty):
+                break
+        return reports
+
+    async def _worker(self, number):
+        while True:
+            reports = await self._next_batch()
+            try:
+                await self._deliver(reports)
+                self.sent += len(reports)
+            except Exception as e:
+                self.failed += len(reports)
+                logger.error(f"Mail worker {number} gave up on {len(reports)} report(s): {str(e)}")
+            finally:
+                for _ in reports:
+                    self._queue.task_done()
+
+    async def _deliver(self, reports):
+        fields = build_email(reports, self.recipient)
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await self._post(fields)
+                logger.info(f"Delivered {len(reports)} issue report(s) on attempt {attempt}")
+                return
+            except DeliveryError as e:
+                if not e.retryable or attempt == self.max_attempts:
+                    raise
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1))
+                # Jitter so several workers don't retry in lockstep
+                delay *= random.uniform(0.5, 1.0)
+                self.retries += 1
+                logger.warning(f"Mail delivery attempt {attempt} failed ({str(e)}), retrying in {delay:.1f}s")
+                await asyncio.sleep(delay)
+
+    async def _post(self, fields):
+        try:
+            response = await self._client.post(self.api_url, auth=("api", self.api_key), data=fields)
+        except httpx.HTTPError as e:
+            raise DeliveryError(f"Network error: {str(e)}", retryable=True)
+
+        if response.status_code == 200:
+            return
+        retryable = response.status_code == 429 or response.status_code >= 500
+        raise DeliveryError(f"Status code: {response.status_code}, Response: {response.text}", retryable)
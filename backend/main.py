@@ -1,33 +1,87 @@
-from fastapi import FastAPI, Query, Depends, HTTPException
+from fastapi import FastAPI, Query, Depends, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from typing import List, Optional
-from sqlalchemy.orm import Session
-from .db.database import SessionLocal
-from .db import queries
+from contextlib import asynccontextmanager
+from starlette.concurrency import run_in_threadpool
+from .db import database
+from .db import async_queries
+from .db import migrate
+from .db.queries import FailedQuery
+from .cache import CachedResponse, encode_json, menu_cache, reference_cache
+from .cycle_calendar import cycle_calendar
+from .search import item_search
+from .item_schedule import dates_by_day, item_schedule
+from .dining_hours import dining_schedule
+from .events import EventBroadcaster, format_event
+from .snapshot import MenuSnapshot, snapshot_store
+from .mailer import IssueReport, MailQueue
+from .request_log import JsonFormatter, RequestSummaryMiddleware, annotate
+from .metrics import MetricsMiddleware, registry
+from .query_profile import PROFILE_ENABLED, Budget, QueryProfileMiddleware
 from fastapi.middleware.cors import CORSMiddleware
+import asyncio
+import datetime
 import os
 import logging
+import time
 from pydantic import BaseModel
-from dotenv import load_dotenv
 
-import requests
 
-
-# Load environment variables
-load_dotenv()
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
+def configure_logging():
+    """
+    Configure logging. Each request logs one summary record (see request_log.py);
+    LOG_MODE=verbose adds the step-by-step debug detail, LOG_FORMAT=json emits JSON lines.
+    Called from the lifespan hook so importing the app leaves logging alone.
+    """
+    log_handlers = [
         logging.StreamHandler(),
         logging.FileHandler('app.log') if os.environ.get('LOG_TO_FILE') else logging.NullHandler()
     ]
-)
+    log_formatter = (
+        JsonFormatter() if os.environ.get('LOG_FORMAT') == 'json'
+        else logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    )
+    for handler in log_handlers:
+        handler.setFormatter(log_formatter)
+    logging.basicConfig(level=logging.INFO, handlers=log_handlers)
+    if os.environ.get('LOG_MODE') == 'verbose':
+        logging.getLogger('backend').setLevel(logging.DEBUG)
+
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Start the mail queue, warm the pool and caches in the background and start
+    watching for data generations to push to /events clients.
+    Requests are served straight away; /ready reports 503 until warmup is done.
+    """
+    configure_logging()
+    await mail_queue.start()
+    app.state.ready_event = asyncio.Event()
+    app.state.search_lock = asyncio.Lock()
+    tasks = [
+        asyncio.create_task(warm_up_until_ready(app.state.ready_event)),
+        asyncio.create_task(watch_generations(app.state.ready_event)),
+        asyncio.create_task(event_broadcaster.heartbeat()),
+    ]
+    try:
+        yield
+    finally:
+        for task in tasks:
+            task.cancel()
+        for task in tasks:
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+        await mail_queue.stop()
+        # Close pooled async connections; aiosqlite's worker threads otherwise keep the process alive
+        if database.async_engine is not None:
+            await database.async_engine.dispose()
+
 # Initialize FastAPI application
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 logger.info("FastAPI application initialized")
 
 # Configure CORS
@@ -45,13 +99,60 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Query-Profile"],
 )
 logger.info("CORS middleware configured")
 
-# Dependency to get DB session
-def get_db():
+# Statement and time budgets per route, with both caches cold. Checked by
+# backend/benchmarks/query_budgets.py and, with QUERY_PROFILE=1, on every request.
+ROUTE_QUERY_BUDGETS = {
+    "/menu_items": Budget(max_queries=3, max_ms=250),
+    "/menu_items/range": Budget(max_queries=3, max_ms=500),
+    "/menu_items/week": Budget(max_queries=3, max_ms=500),
+    "/bootstrap": Budget(max_queries=5, max_ms=250),
+    "/search": Budget(max_queries=3, max_ms=250),
+    "/now": Budget(max_queries=8, max_ms=500),
+    "/items/next": Budget(max_queries=3, max_ms=250),
+    "/items/{item_id}/next": Budget(max_queries=3, max_ms=250),
+    "/always_available_items": Budget(max_queries=2, max_ms=100),
+    "/locations": Budget(max_queries=2, max_ms=100),
+    "/meal_types": Budget(max_queries=2, max_ms=100),
+    "/days": Budget(max_queries=2, max_ms=100),
+    "/allergens": Budget(max_queries=2, max_ms=100),
+}
+
+if PROFILE_ENABLED:
+    app.add_middleware(QueryProfileMiddleware, budgets=ROUTE_QUERY_BUDGETS)
+
+# Metrics runs inside the summary middleware so its query count lands in the summary record
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestSummaryMiddleware)
+
+# Dependency to get DB session, async when DB_ASYNC=1 and sync otherwise, or
+# the memory-mapped snapshot when SNAPSHOT_FILE is set and readable.
+# Routes go through async_queries, which accepts any of them.
+async def get_db():
+    snapshot = snapshot_store.current() if snapshot_store else None
+    if snapshot is not None:
+        yield snapshot
+        return
+
+    # Every route reads data_generation, which an unmigrated schema lacks
+    if startup_state["migration_required"]:
+        raise HTTPException(status_code=503, detail=startup_state["migration_required"])
+
     logger.debug("Creating database session")
-    db = SessionLocal()
+    database.init_engines()
+    if database.AsyncSessionLocal is not None:
+        async with database.AsyncSessionLocal() as db:
+            try:
+                yield db
+            except Exception as e:
+                logger.error(f"Database session error: {str(e)}")
+                raise
+        return
+
+    db = database.SessionLocal()
     try:
         yield db
     except Exception as e:
@@ -59,7 +160,7 @@ def get_db():
         raise
     finally:
         logger.debug("Closing database session")
-        db.close()
+        await run_in_threadpool(db.close)
 
 # Mailgun API configuration from environment
 MAILGUN_API_KEY = os.getenv("MAILGUN_API_KEY")
@@ -75,113 +176,816 @@ if not RECIPIENT_EMAIL:
 else:
     logger.info(f"Email notifications will be sent to: {RECIPIENT_EMAIL}") 
 
+# Issue reports are delivered by a background worker; MAILGUN_API_URL can
+# point at a local stand-in (see backend/mail_stub.py)
+mail_queue = MailQueue(
+    api_url=os.getenv("MAILGUN_API_URL") or f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages",
+    api_key=MAILGUN_API_KEY,
+    recipient=RECIPIENT_EMAIL,
+    max_size=int(os.getenv("MAIL_QUEUE_SIZE", 100)),
+    max_attempts=int(os.getenv("MAIL_MAX_ATTEMPTS", 5)),
+    batch_size=int(os.getenv("MAIL_BATCH_SIZE", 1)),
+    batch_window=float(os.getenv("MAIL_BATCH_WINDOW_SECONDS", 0)),
+)
+
+# Startup warmup progress, reported by /ready
+startup_state = {"ready": False, "attempts": 0, "warmup_seconds": None, "last_error": None, "migration_required": None}
+WARMUP_RETRY_MAX_SECONDS = float(os.getenv("WARMUP_RETRY_MAX_SECONDS", 30))
+
+# Create the engines and open the pool, load the cycle calendar and fill the
+# menu cache with every unfiltered cycle-day so first visitors hit warm entries
+async def warm_up():
+    if snapshot_store and snapshot_store.current() is not None:
+        logger.info("Serving reads from the menu snapshot, skipping pool warmup")
+    else:
+        database.init_engines()
+        if database.async_engine is not None:
+            await database.warm_async_pool()
+        else:
+            await run_in_threadpool(database.warm_pool)
+        await check_schema()
+
+    db_session = get_db()
+    try:
+        db = await db_session.__anext__()
+        await sync_generation(db, force=True)
+        await sync_search_index(db)
+
+        if os.getenv("MENU_CACHE_WARM_ON_STARTUP", "1") != "1":
+            logger.info("Menu cache warmup disabled")
+            return
+
+        if isinstance(db, MenuSnapshot):
+            # Unfiltered menus are served from the snapshot's bytes (see get_menu)
+            await get_bootstrap(db)
+            logger.info("Reference data loaded")
+            return
+
+        menu_days = await async_queries.get_menu_days(db)
+        for cycle_id, day_id in menu_days:
+            key = menu_cache.make_key(cycle_id, day_id, None, None)
+            await menu_cache.get_or_build(key, lambda: build_cached_menu(db, day_id, None, None))
+        logger.info(f"Menu cache warmed with {len(menu_days)} cycle-days")
+
+        await get_bootstrap(db)
+        logger.info("Reference data loaded")
+    finally:
+        await db_session.aclose()
+
+async def check_schema():
+    """
+    Refuse to warm up against a schema missing migrations. Until they're
+    applied, /ready and every database-backed request report it (see get_db).
+    """
+    pending = await run_in_threadpool(migrate.pending_versions, database.engine)
+    if pending:
+        versions = ", ".join(f"{version:04d}" for version in pending)
+        startup_state["migration_required"] = (
+            f"Database migration required (pending: {versions}); run python -m backend.db.migrate"
+        )
+        raise RuntimeError(startup_state["migration_required"])
+    startup_state["migration_required"] = None
+
+async def warm_up_until_ready(ready_event):
+    """
+    Retry warmup with backoff until it succeeds, so a database outage at boot
+    leaves the process running and unready instead of crash-looping.
+    """
+    started = time.perf_counter()
+    delay = 0.5
+    while True:
+        startup_state["attempts"] += 1
+        try:
+            await warm_up()
+            break
+        except Exception as e:
+            startup_state["last_error"] = str(e).splitlines()[0]
+            logger.warning(f"Startup warmup failed (attempt {startup_state['attempts']}), retrying in {delay:.1f}s: {str(e)}")
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, WARMUP_RETRY_MAX_SECONDS)
+
+    startup_state["ready"] = True
+    startup_state["warmup_seconds"] = round(time.perf_counter() - started, 3)
+    logger.info(f"Backend ready after {startup_state['warmup_seconds']}s")
+    ready_event.set()
+
+
+# Data generation changes pushed to /events clients
+event_broadcaster = EventBroadcaster(
+    max_buffer=int(os.getenv("EVENTS_CLIENT_BUFFER", 16)),
+    heartbeat_interval=float(os.getenv("EVENTS_HEARTBEAT_SECONDS", 15)),
+)
+EVENTS_POLL_SECONDS = float(os.getenv("EVENTS_POLL_SECONDS", 5))
+EVENTS_MAX_CLIENTS = int(os.getenv("EVENTS_MAX_CLIENTS", 5000))
+# Days ahead whose dates are listed in generation events
+EVENTS_DATE_HORIZON_DAYS = int(os.getenv("EVENTS_DATE_HORIZON_DAYS", 14))
+
+async def publish_generation_changes():
+    """
+    Check for a new data generation and, when there is one, send /events
+    clients the cycle-days it changed and the upcoming dates serving them.
+    """
+    db_session = get_db()
+    try:
+        db = await db_session.__anext__()
+        generation = await sync_generation(db, force=True)
+        previous = event_broadcaster.generation
+        if generation == previous:
+            return
+        changes = await async_queries.get_generations_since(db, previous or 0)
+    finally:
+        await db_session.aclose()
+
+    # No rows means the generations went backwards (a reseed); treat it as a full change
+    if changes and all(day_ids is not None for _, _, day_ids in changes):
+        day_ids = sorted({day_id for _, _, changed in changes for day_id in changed})
+        served = dates_by_day(cycle_calendar, datetime.date.today(), EVENTS_DATE_HORIZON_DAYS)
+        dates = sorted(date_obj.isoformat() for day_id in day_ids for date_obj in served.get(day_id, ()))
+    else:
+        day_ids = dates = None
+    event_broadcaster.publish(generation, {
+        "generation": generation,
+        "previous": previous,
+        "sources": [source for _, source, _ in changes],
+        "day_ids": day_ids,
+        "dates": dates,
+    })
+
+async def watch_generations(ready_event):
+    """Poll for new data generations once warmup has recorded the starting one."""
+    await ready_event.wait()
+    event_broadcaster.generation = menu_cache.generation
+    while True:
+        await asyncio.sleep(EVENTS_POLL_SECONDS)
+        try:
+            await publish_generation_changes()
+        except Exception as e:
+            logger.warning(f"Checking for data generation changes failed: {str(e)}")
+
+
+# Served for dates that don't resolve to a cycle-day
+EMPTY_MENU = CachedResponse([])
+
+def json_response(request: Request, cached: CachedResponse):
+    """
+    Serve pre-encoded JSON, or 304 Not Modified when the client's ETag is current.
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": "no-cache"}
+    if cached.matches(request.headers.get("if-none-match")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+async def sync_generation(db, force=False):
+    """
+    Drop cached menus and reload the cycle calendar once ingestion has produced
+    a new data generation. The generation itself is only re-read from the
+    database once per check interval.
+    """
+    generation = await menu_cache.sync_generation(lambda: async_queries.get_data_generation(db), force)
+    if cycle_calendar.generation != generation:
+        cycles = await async_queries.get_cycles(db)
+        days = await async_queries.get_cycle_days(db)
+        cycle_calendar.load(cycles, days, generation)
+    return generation
+
+def load_item_indexes(items, occurrences, generation):
+    item_schedule.load(items, occurrences, generation)
+    item_search.load(items, generation)
+
+async def sync_search_index(db):
+    """
+    Rebuild the item search index and item schedule when the data generation
+    has moved on. The search index is loaded last, so its generation marks both as current.
+    """
+    generation = await sync_generation(db)
+    if item_search.generation == generation:
+        return
+    async with app.state.search_lock:
+        if item_search.generation == generation:
+            return
+        items = await async_queries.get_menu_item_names(db)
+        occurrences = await async_queries.get_item_occurrences(db)
+        await run_in_threadpool(load_item_indexes, items, occurrences, generation)
+
+async def build_cached_menu(db, day_id, location_ids, meal_type_ids):
+    return CachedResponse(await async_queries.build_menu_items(db, day_id, location_ids, meal_type_ids))
+
+async def get_menu(db, day, location_ids, meal_type_ids):
+    """
+    A cycle-day's menu from the menu cache. Unfiltered menus are served
+    straight from the snapshot's mapped bytes instead, which every worker shares.
+    """
+    if isinstance(db, MenuSnapshot) and not location_ids and not meal_type_ids:
+        return db.response(f"menu/{day.day_id}")
+    key = menu_cache.make_key(day.cycle_id, day.day_id, location_ids, meal_type_ids)
+    return await menu_cache.get_or_build(key, lambda: build_cached_menu(db, day.day_id, location_ids, meal_type_ids))
+
+async def get_menus(db, days, location_ids, meal_type_ids):
+    """
+    {day_id: menu} for several cycle-days, as get_menu returns them. The days
+    missing from the menu cache are loaded together in one query, and stored
+    so /menu_items hits them too.
+    """
+    unique_days = list({day.day_id: day for day in days if day}.values())
+    if isinstance(db, MenuSnapshot) and not location_ids and not meal_type_ids:
+        return {day.day_id: db.response(f"menu/{day.day_id}") for day in unique_days}
+
+    day_key = lambda day: menu_cache.make_key(day.cycle_id, day.day_id, location_ids, meal_type_ids)
+    missing = [day.day_id for day in unique_days if menu_cache.peek(day_key(day)) is None]
+    built = await async_queries.build_week_menu_items(db, missing, location_ids, meal_type_ids) if missing else {}
+
+    menus = {}
+    for day in unique_days:
+        async def build_day(day=day):
+            if day.day_id in built:
+                return CachedResponse(built[day.day_id])
+            return await build_cached_menu(db, day.day_id, location_ids, meal_type_ids)
+        menus[day.day_id] = await menu_cache.get_or_build(day_key(day), build_day)
+    annotate(days_loaded=len(missing))
+    return menus
+
+async def get_reference(db, name: str, load):
+    """
+    Return a reference table from the generation cache, loading it on a miss.
+    A FailedQuery (the helpers' empty result after an error) isn't cached; an
+    empty table is.
+    """
+    async def build():
+        return CachedResponse(await load(db))
+
+    await reference_cache.sync_generation(lambda: async_queries.get_data_generation(db))
+    return await reference_cache.get_or_build(
+        name,
+        build,
+        should_store=lambda value: not isinstance(value.data, FailedQuery)
+    )
+
+async def reference_response(request: Request, db, name: str, load):
+    # The snapshot holds each table encoded as the endpoint sends it
+    cached = db.response(name) if isinstance(db, MenuSnapshot) else await get_reference(db, name, load)
+    annotate(rows=len(cached))
+    return json_response(request, cached)
+
+# Reference tables bundled into /bootstrap, in response order
+BOOTSTRAP_TABLES = [
+    ("locations", async_queries.get_locations),
+    ("meal_types", async_queries.get_meal_types),
+    ("allergens", async_queries.get_allergens),
+    ("always_available_items", async_queries.get_always_available_items),
+]
+
+async def get_bootstrap(db):
+    """
+    Bundle every reference table and the data generation into one payload,
+    splicing in the tables' cached bytes rather than re-encoding them.
+    """
+    await reference_cache.sync_generation(lambda: async_queries.get_data_generation(db))
+    tables = [(name, await get_reference(db, name, load)) for name, load in BOOTSTRAP_TABLES]
+    complete = not any(isinstance(cached.data, FailedQuery) for _, cached in tables)
+
+    async def build():
+        version = reference_cache.generation or 0
+        body = b"".join([
+            b'{"version":%d' % version,
+            *(b',"%s":%s' % (name.encode(), cached.body) for name, cached in tables),
+            b"}",
+        ])
+        return CachedResponse({"version": version}, body=body)
+
+    return await reference_cache.get_or_build("bootstrap", build, should_store=lambda value: complete)
+
+
+def collect_runtime_metrics():
+    """Cache, pool and mail queue state, read at scrape time."""
+    samples = []
+    for cache in (menu_cache, reference_cache):
+        stats = cache.stats()
+        samples += [
+            (f"{cache.name}_cache_hits_total", "counter", f"{cache.name} cache hits.", stats["hits"]),
+            (f"{cache.name}_cache_misses_total", "counter", f"{cache.name} cache misses.", stats["misses"]),
+            (f"{cache.name}_cache_entries", "gauge", f"Entries held in the {cache.name} cache.", stats["entries"]),
+        ]
+    pool_engine = database.async_engine.sync_engine if database.async_engine is not None else database.engine
+    samples += [
+        ("db_pool_checked_out", "gauge", "Connections currently checked out of the pool.", pool_engine.pool.checkedout() if pool_engine else 0),
+        ("data_generation", "gauge", "Data generation the caches were built from.", menu_cache.generation or 0),
+        ("mail_queue_pending", "gauge", "Issue reports waiting for delivery.", mail_queue.pending()),
+        ("events_clients", "gauge", "Connected /events clients.", len(event_broadcaster)),
+        ("events_published_total", "counter", "Data generation events sent to /events clients.", event_broadcaster.published),
+        ("events_resyncs_total", "counter", "Times a slow /events client's backlog was replaced by a resync.", event_broadcaster.resyncs),
+    ]
+    return samples
+
+registry.add_collector(collect_runtime_metrics)
+
 
 # Root endpoint
 @app.get("/")
 def root():
-    logger.info("Root endpoint accessed")
+    logger.debug("Root endpoint accessed")
     return {"message": "Welcome to the backend!"}
 
 # Health check endpoint with environment info
 @app.get("/health")
 def health_check():
-    logger.info("Health check endpoint accessed")
+    logger.debug("Health check endpoint accessed")
     return {
         "status": "healthy",
+        "ready": startup_state["ready"],
         "environment": {
             "mailgun_api_key_set": bool(MAILGUN_API_KEY),
             "mailgun_domain_set": bool(MAILGUN_DOMAIN),
             "recipient_email_set": bool(RECIPIENT_EMAIL),
             "log_level": logging.getLogger().level
-        }
+        },
+        "menu_cache": menu_cache.stats(),
+        "reference_cache": reference_cache.stats(),
+        "mail_queue": mail_queue.stats(),
+        "events": event_broadcaster.stats(),
+        "snapshot": snapshot_store.stats() if snapshot_store else None
     }
 
+# Readiness probe; 503 until startup warmup has finished
+@app.get("/ready")
+def ready():
+    if not startup_state["ready"]:
+        status = "migration_required" if startup_state["migration_required"] else "warming_up"
+        return JSONResponse(status_code=503, content={"status": status, **startup_state})
+    return {"status": "ready", **startup_state}
+
+# Prometheus metrics endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 # Menu endpoints
 @app.get("/menu_items")
-def get_menu_items_api(
+async def get_menu_items_api(
+    request: Request,
     date: str,
     location_id: Optional[List[int]] = Query(None),
     meal_type_id: Optional[List[int]] = Query(None),
-    db: Session = Depends(get_db)
+    db=Depends(get_db)
 ):
     """
     Fetch menu items based on date, and optional multiple location_ids and meal_type_ids.
     """
-    logger.info(f"Fetching menu items for date: {date}, location_id: {location_id}, meal_type_id: {meal_type_id}")
+    annotate(date=date, location_id=location_id or "", meal_type_id=meal_type_id or "")
     try:
-        result = queries.get_menu_items(db, date, location_id, meal_type_id)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} menu items")
-        return result
+        await sync_generation(db)
+        day = cycle_calendar.lookup_str(date)
+        if not day:
+            return json_response(request, EMPTY_MENU)
+
+        result = await get_menu(db, day, location_id, meal_type_id)
+        annotate(rows=len(result))
+        return json_response(request, result)
     except Exception as e:
         logger.error(f"Error fetching menu items: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch menu items")
 
+# Longest span /menu_items/range will resolve in one request
+MAX_MENU_RANGE_DAYS = int(os.getenv("MAX_MENU_RANGE_DAYS", 62))
+
+@app.get("/menu_items/range")
+async def get_menu_items_range_api(
+    request: Request,
+    start: str,
+    end: str,
+    location_id: Optional[List[int]] = Query(None),
+    meal_type_id: Optional[List[int]] = Query(None),
+    db=Depends(get_db)
+):
+    """
+    Fetch menus for every date from start to end (inclusive).
+    Each distinct cycle-day menu is sent once under "menus", keyed by day_id,
+    and "dates" maps every date to its day_id (or null when there is no menu).
+    Cycle-days missing from the menu cache are loaded together in one query.
+    """
+    annotate(start=start, end=end, location_id=location_id or "", meal_type_id=meal_type_id or "")
+    try:
+        start_date = datetime.datetime.strptime(start, "%Y-%m-%d").date()
+        end_date = datetime.datetime.strptime(end, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be dates in YYYY-MM-DD format")
+
+    span = (end_date - start_date).days + 1
+    if span < 1:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    if span > MAX_MENU_RANGE_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range may cover at most {MAX_MENU_RANGE_DAYS} days")
+
+    try:
+        await sync_generation(db)
+        dates = [start_date + datetime.timedelta(days=offset) for offset in range(span)]
+        days = {date_obj: cycle_calendar.lookup(date_obj) for date_obj in dates}
+
+        date_map = {date_obj.isoformat(): day.day_id if day else None for date_obj, day in days.items()}
+        menus = await get_menus(db, days.values(), location_id, meal_type_id)
+
+        # Splice the cached menu bytes in rather than re-encoding them
+        body = b"".join([
+            b'{"dates":',
+            encode_json(date_map),
+            b',"menus":{',
+            b",".join(b'"%d":%s' % (day_id, cached.body) for day_id, cached in menus.items()),
+            b"}}",
+        ])
+        annotate(dates=span, menus=len(menus))
+        return json_response(request, CachedResponse(date_map, body=body))
+    except Exception as e:
+        logger.error(f"Error fetching menu range: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch menu range")
+
+def group_week(days):
+    """
+    Nest each day's menu items under their location, then meal, both in id
+    order. days: (date, CycleDay or None, items) for each date of the week.
+    """
+    grouped = []
+    for date_obj, day, items in days:
+        locations = {}
+        for item in items:
+            location = locations.setdefault(item["location_id"], {
+                "location": item["location"],
+                "location_id": item["location_id"],
+                "meals": {},
+            })
+            meal = location["meals"].setdefault(item["meal_type_id"], {
+                "meal_type": item["meal_type"],
+                "meal_type_id": item["meal_type_id"],
+                "items": [],
+            })
+            meal["items"].append({
+                "item_name": item["item_name"],
+                "allergens": item["allergens"],
+                "ai_description": item["ai_description"],
+            })
+        grouped.append({
+            "date": date_obj.isoformat(),
+            "day_name": date_obj.strftime("%A"),
+            "day_id": day.day_id if day else None,
+            "locations": [
+                {**location, "meals": [location["meals"][meal_type_id] for meal_type_id in sorted(location["meals"])]}
+                for _, location in sorted(locations.items())
+            ],
+        })
+    return grouped
+
+@app.get("/menu_items/week")
+async def get_menu_items_week_api(
+    request: Request,
+    date: str,
+    location_id: Optional[List[int]] = Query(None),
+    meal_type_id: Optional[List[int]] = Query(None),
+    db=Depends(get_db)
+):
+    """
+    Fetch the menus for the Monday-to-Sunday week containing date, grouped by
+    day, then location, then meal. Each date resolves to its own cycle, and
+    cycle-days missing from the menu cache are loaded together in one query.
+    """
+    annotate(date=date, location_id=location_id or "", meal_type_id=meal_type_id or "")
+    try:
+        date_obj = datetime.datetime.strptime(date, "%Y-%m-%d").date()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="date must be in YYYY-MM-DD format")
+
+    try:
+        await sync_generation(db)
+        monday = date_obj - datetime.timedelta(days=date_obj.weekday())
+        dates = [monday + datetime.timedelta(days=offset) for offset in range(7)]
+        days = [cycle_calendar.lookup(week_date) for week_date in dates]
+        filters = menu_cache.make_key(None, None, location_id, meal_type_id)[2:]
+
+        async def build():
+            menus = await get_menus(db, days, location_id, meal_type_id)
+            return CachedResponse({
+                "week_start": monday.isoformat(),
+                "days": group_week([
+                    (week_date, day, menus[day.day_id].data if day else [])
+                    for week_date, day in zip(dates, days)
+                ]),
+            })
+
+        result = await menu_cache.get_or_build(("week", monday) + filters, build)
+        return json_response(request, result)
+    except Exception as e:
+        logger.error(f"Error fetching week menu: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch week menu")
+
+# Dining days /search lists occurrences for unless the client asks for fewer
+SEARCH_DEFAULT_DAYS = 14
+
+@app.get("/search")
+async def search_items_api(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    start: Optional[str] = None,
+    days: int = Query(SEARCH_DEFAULT_DAYS, ge=1, le=MAX_MENU_RANGE_DAYS),
+    db=Depends(get_db)
+):
+    """
+    Find menu items whose names resemble q, best match first, with every date,
+    location and meal each is served at in the days from start (default today).
+    """
+    annotate(q=q, limit=limit, days=days)
+    try:
+        start_date = datetime.datetime.strptime(start, "%Y-%m-%d").date() if start else datetime.date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start must be a date in YYYY-MM-DD format")
+
+    try:
+        await sync_search_index(db)
+        hits = item_search.search(q, limit=limit)
+        served = dates_by_day(cycle_calendar, start_date, days)
+        results = [
+            {
+                "item_id": hit.item_id,
+                "item_name": hit.item_name,
+                "score": hit.score,
+                "occurrences": [
+                    {
+                        "date": date_obj.isoformat(),
+                        "location": location_name,
+                        "location_id": location_id,
+                        "meal_type": meal_type_name,
+                        "meal_type_id": meal_type_id,
+                    }
+                    for date_obj, location_id, location_name, meal_type_id, meal_type_name
+                    in item_schedule.occurrences(hit.item_id, served)
+                ],
+            }
+            for hit in hits
+        ]
+        annotate(rows=len(results))
+        return Response(content=encode_json({"query": q, "results": results}), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error searching items: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to search items")
+
+@app.get("/events")
+async def events_api(request: Request):
+    """
+    Server-Sent Events stream. Each "generation" event carries the new data
+    generation, the day_ids it changed and the upcoming dates serving them (both
+    null when anything may have changed), so clients refetch only those menus.
+    A "resync" event means the client missed events and should refetch everything.
+    Event ids are generations, so reconnecting clients resume via Last-Event-ID.
+    """
+    if len(event_broadcaster) >= EVENTS_MAX_CLIENTS:
+        raise HTTPException(status_code=503, detail="Too many event clients")
+    try:
+        last_event_id = int(request.headers.get("last-event-id", ""))
+    except ValueError:
+        last_event_id = None
+    annotate(last_event_id=last_event_id if last_event_id is not None else "")
+
+    async def stream():
+        subscriber = event_broadcaster.subscribe(last_event_id)
+        try:
+            yield b"retry: 5000\n\n" + format_event("hello", {"generation": event_broadcaster.generation}, event_broadcaster.generation)
+            while True:
+                yield await subscriber.next_chunk()
+        finally:
+            event_broadcaster.unsubscribe(subscriber)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+# Most items /items/next answers in one request
+MAX_BULK_ITEMS = int(os.getenv("MAX_BULK_ITEMS", 100))
+
+def parse_after(after: Optional[str]):
+    try:
+        return datetime.datetime.strptime(after, "%Y-%m-%d").date() if after else datetime.date.today()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="after must be a date in YYYY-MM-DD format")
+
+def next_serving_json(item_id, after_date):
+    serving = item_schedule.next_serving(item_id, after_date, cycle_calendar)
+    return {
+        "item_id": item_id,
+        "item_name": item_schedule.name(item_id),
+        "next": serving and {
+            "date": serving.date.isoformat(),
+            "occurrences": [
+                {
+                    "location": occurrence.location_name,
+                    "location_id": occurrence.location_id,
+                    "meal_type": occurrence.meal_type_name,
+                    "meal_type_id": occurrence.meal_type_id,
+                }
+                for occurrence in serving.occurrences
+            ],
+        },
+    }
+
+@app.get("/items/next")
+async def get_items_next_api(
+    item_id: List[int] = Query(...),
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    Fetch the next date on or after `after` (default today) that each item is
+    served, with the meals and locations serving it. Unknown items come back
+    with a null item_name and next.
+    """
+    annotate(items=len(item_id), after=after or "")
+    after_date = parse_after(after)
+    if len(item_id) > MAX_BULK_ITEMS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_ITEMS} items per request")
+
+    try:
+        await sync_search_index(db)
+        items = [next_serving_json(one_id, after_date) for one_id in dict.fromkeys(item_id)]
+        annotate(found=sum(item["next"] is not None for item in items))
+        return Response(content=encode_json({"after": after_date.isoformat(), "items": items}), media_type="application/json")
+    except Exception as e:
+        logger.error(f"Error fetching next servings: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch next servings")
+
+@app.get("/items/{item_id}/next")
+async def get_item_next_api(
+    item_id: int,
+    after: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    Fetch the next date on or after `after` (default today) that the item is
+    served, with the meals and locations serving it; next is null when it
+    isn't on any upcoming menu.
+    """
+    annotate(item_id=item_id, after=after or "")
+    after_date = parse_after(after)
+
+    try:
+        await sync_search_index(db)
+        known = item_id in item_schedule
+        result = next_serving_json(item_id, after_date) if known else None
+    except Exception as e:
+        logger.error(f"Error fetching next serving: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch next serving")
+    if not known:
+        raise HTTPException(status_code=404, detail="Item not found")
+    return Response(content=encode_json({"after": after_date.isoformat(), **result}), media_type="application/json")
+
+async def build_now(db, statuses):
+    """
+    Current and next meal for every hall, each with its menu cut from the
+    cached unfiltered menu of that meal's cycle-day.
+    """
+    location_ids = {row["location_name"]: row["location_id"] for row in (await get_reference(db, "locations", async_queries.get_locations)).data}
+    meal_type_ids = {row["meal_type_name"]: row["meal_type_id"] for row in (await get_reference(db, "meal_types", async_queries.get_meal_types)).data}
+
+    async def meal(window, location_id):
+        if window is None:
+            return None
+        meal_type_id = meal_type_ids.get(window.meal_type)
+        items = []
+        day = cycle_calendar.lookup(window.date)
+        if day and location_id is not None and meal_type_id is not None:
+            key = menu_cache.make_key(day.cycle_id, day.day_id, None, None)
+            menu = await menu_cache.get_or_build(key, lambda: build_cached_menu(db, day.day_id, None, None))
+            items = [item for item in menu.data if item["location_id"] == location_id and item["meal_type_id"] == meal_type_id]
+        return {
+            "meal_type": window.meal_type,
+            "meal_type_id": meal_type_id,
+            "date": window.date.isoformat(),
+            "start": window.start.strftime("%H:%M"),
+            "end": window.end.strftime("%H:%M"),
+            "menu": items,
+        }
+
+    locations = []
+    for status in statuses:
+        location_id = location_ids.get(status.location)
+        locations.append({
+            "location": status.location,
+            "location_id": location_id,
+            "open": status.current is not None,
+            "current": await meal(status.current, location_id),
+            "next": await meal(status.next, location_id),
+        })
+    return CachedResponse({"locations": locations}), bool(location_ids and meal_type_ids)
+
+@app.get("/now")
+async def get_now_api(
+    request: Request,
+    at: Optional[str] = None,
+    db=Depends(get_db)
+):
+    """
+    Fetch the meal each dining hall is serving now (or at the given ISO
+    datetime, local to the halls when no offset is given) and the one after it,
+    with their menus. Responses are cached for as long as those meals stay the
+    same, so a warm server answers without touching the database.
+    """
+    annotate(at=at or "")
+    try:
+        moment = datetime.datetime.fromisoformat(at) if at else dining_schedule.now()
+    except ValueError:
+        raise HTTPException(status_code=400, detail="at must be an ISO 8601 datetime")
+
+    try:
+        await sync_generation(db)
+        statuses = dining_schedule.status(moment)
+        built = {}
+
+        async def build():
+            built["value"], built["complete"] = await build_now(db, statuses)
+            return built["value"]
+
+        cached = await menu_cache.get_or_build(("now", tuple(statuses)), build, should_store=lambda value: built["complete"])
+        annotate(open=sum(status.current is not None for status in statuses))
+        return json_response(request, cached)
+    except Exception as e:
+        logger.error(f"Error fetching current meals: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch current meals")
+
+@app.get("/bootstrap")
+async def get_bootstrap_api(
+    request: Request,
+    version: Optional[int] = None,
+    db=Depends(get_db)
+):
+    """
+    Fetch locations, meal types, allergens and always available items in one payload,
+    along with the data version they belong to. Clients that pass the version
+    they already hold (or its ETag) get 304 Not Modified while it is current.
+    """
+    annotate(client_version=version if version is not None else "")
+    try:
+        cached = await get_bootstrap(db)
+        if version is not None and version == cached.data["version"]:
+            return Response(status_code=304, headers={"ETag": cached.etag, "Cache-Control": "no-cache"})
+        response = json_response(request, cached)
+        annotate(version=cached.data["version"])
+        return response
+    except Exception as e:
+        logger.error(f"Error fetching bootstrap data: {str(e)}")
+        raise HTTPException(status_code=500, detail="Failed to fetch bootstrap data")
+
 @app.get("/always_available_items")
-def get_always_available_items_api(db: Session = Depends(get_db)):
+async def get_always_available_items_api(request: Request, db=Depends(get_db)):
     """
     Fetch items that are always available.
     """
-    logger.info("Fetching always available items")
     try:
-        result = queries.get_always_available_items(db)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} always available items")
-        return result
+        response = await reference_response(request, db, "always_available_items", async_queries.get_always_available_items)
+        return response
     except Exception as e:
         logger.error(f"Error fetching always available items: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch always available items")
 
 @app.get("/locations")
-def get_locations_api(db: Session = Depends(get_db)):
+async def get_locations_api(request: Request, db=Depends(get_db)):
     """
     Fetch all available locations.
     """
-    logger.info("Fetching all locations")
     try:
-        result = queries.get_locations(db)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} locations")
-        return result
+        response = await reference_response(request, db, "locations", async_queries.get_locations)
+        return response
     except Exception as e:
         logger.error(f"Error fetching locations: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch locations")
 
 @app.get("/meal_types")
-def get_meal_types_api(db: Session = Depends(get_db)):
+async def get_meal_types_api(request: Request, db=Depends(get_db)):
     """
     Fetch all available meal types.
     """
-    logger.info("Fetching all meal types")
     try:
-        result = queries.get_meal_types(db)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} meal types")
-        return result
+        response = await reference_response(request, db, "meal_types", async_queries.get_meal_types)
+        return response
     except Exception as e:
         logger.error(f"Error fetching meal types: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch meal types")
 
 @app.get("/days")
-def get_days_api(db: Session = Depends(get_db)):
+async def get_days_api(request: Request, db=Depends(get_db)):
     """
     Fetch all available days.
     """
-    logger.info("Fetching all days")
     try:
-        result = queries.get_days(db)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} days")
-        return result
+        response = await reference_response(request, db, "days", async_queries.get_days)
+        return response
     except Exception as e:
         logger.error(f"Error fetching days: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch days")
 
 @app.get("/allergens")
-def get_allergens_api(db: Session = Depends(get_db)):
+async def get_allergens_api(request: Request, db=Depends(get_db)):
     """
     Fetch all available allergens.
     """
-    logger.info("Fetching all allergens")
     try:
-        result = queries.get_allergens(db)
-        logger.info(f"Successfully retrieved {len(result) if result else 0} allergens")
-        return result
+        response = await reference_response(request, db, "allergens", async_queries.get_allergens)
+        return response
     except Exception as e:
         logger.error(f"Error fetching allergens: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to fetch allergens")
@@ -205,19 +1009,14 @@ def test_email_config():
         "all_configured": bool(MAILGUN_API_KEY and MAILGUN_DOMAIN and RECIPIENT_EMAIL)
     }
 
-@app.post("/report-issue")
+@app.post("/report-issue", status_code=202)
 async def report_issue(data: EmailRequest):
     """
-    Sends an email containing the issue reported by the user.
+    Queues an email containing the issue reported by the user.
+    Delivery happens in the background so a slow Mailgun never holds up the request.
     """
     logger.info(f"Received issue report: {data.errorType} from {data.email or 'Anonymous'}")
-    
-    # Debug: Check environment variables
-    logger.info(f"Environment check:")
-    logger.info(f"  MAILGUN_API_KEY: {'SET' if MAILGUN_API_KEY else 'NOT SET'} (length: {len(MAILGUN_API_KEY) if MAILGUN_API_KEY else 0})")
-    logger.info(f"  MAILGUN_DOMAIN: {MAILGUN_DOMAIN if MAILGUN_DOMAIN else 'NOT SET'}")
-    logger.info(f"  RECIPIENT_EMAIL: {RECIPIENT_EMAIL if RECIPIENT_EMAIL else 'NOT SET'}")
-    
+
     # Check for missing required variables
     if not MAILGUN_API_KEY:
         logger.error("MAILGUN_API_KEY is not set")
@@ -230,64 +1029,13 @@ async def report_issue(data: EmailRequest):
     if not RECIPIENT_EMAIL:
         logger.error("RECIPIENT_EMAIL is not set")
         raise HTTPException(status_code=500, detail="Email service not configured: Missing recipient email")
-    
-    try:
-        # Prepare API URL
-        api_url = f"https://api.mailgun.net/v3/{MAILGUN_DOMAIN}/messages"
-        logger.info(f"Mailgun API URL: {api_url}")
-        
-        # Prepare email data
-        email_files = {
-            "from": (None, "Better Dining Hall Menu <noreply@longbeachmenu.com>"),
-            "to": (None, RECIPIENT_EMAIL),
-            "subject": (None, f"Issue Reported: {data.errorType}"),
-            "html": (None, f"""
-            <html>
-                <body>
-                    <div style="font-family: Arial, sans-serif; line-height: 1.6;">
-                        <h2 style="color: #4CAF50;">New Issue Reported</h2>
-                        <p><strong>Problem:</strong> {data.errorType}</p>
-                        <p><strong>Message:</strong> {data.message}</p>
-                        <p><strong>Reported by:</strong> {data.email or 'Anonymous'}</p>
-                        <hr>
-                        <p style="font-size: 0.9em; color: #555;">This email was sent from the Better Dining Hall Menu system.</p>
-                    </div>
-                </body>
-            </html>
-            """)
-        }
-        
-        logger.info(f"Email data prepared - From: {email_files['from'][1]}, To: {email_files['to'][1]}, Subject: {email_files['subject'][1]}")
-
-        # Send the email via Mailgun
-        logger.info("Attempting to send email via Mailgun...")
-        response = requests.post(
-            api_url,
-            auth=("api", MAILGUN_API_KEY),
-            files=email_files
-        )
-        
-        logger.info(f"Mailgun response status: {response.status_code}")
-        logger.info(f"Mailgun response headers: {dict(response.headers)}")
-        logger.info(f"Mailgun response body: {response.text}")
 
-        if response.status_code == 200:
-            logger.info("Email sent successfully!")
-            return {"success": True, "message": "Email sent successfully!"}
-        else:
-            logger.error(f"Failed to send email. Status code: {response.status_code}")
-            logger.error(f"Response text: {response.text}")
-            raise HTTPException(
-                status_code=500,
-                detail=f"Failed to send email. Status code: {response.status_code}, Response: {response.text}",
-            )
-    except requests.exceptions.RequestException as e:
-        logger.error(f"Network error when sending email: {str(e)}")
-        raise HTTPException(status_code=500, detail=f"Network error: {str(e)}")
-    except Exception as e:
-        logger.error(f"Unexpected error in report_issue endpoint: {str(e)}")
-        logger.error(f"Error type: {type(e).__name__}")
-        raise HTTPException(status_code=500, detail=f"Failed to send email: {str(e)}")
+    report = IssueReport(error_type=data.errorType, message=data.message, email=data.email)
+    if not mail_queue.submit(report):
+        raise HTTPException(status_code=503, detail="Too many pending reports, please try again later")
+
+    logger.info(f"Issue report queued ({mail_queue.pending()} pending)")
+    return {"success": True, "message": "Issue report received!"}
 
 
 # Root HEAD endpoint for health checks
@@ -302,4 +1050,7 @@ if __name__ == "__main__":
     # Retrieve the port dynamically from the environment or default to 8000 for local testing
     port = int(os.environ.get("PORT", 8000))
     logger.info(f"Starting server on host 0.0.0.0 and port {port}")
-    uvicorn.run(app, host="0.0.0.0", port=port)
+    # uvicorn loads .env before importing the app, so module-level settings see it;
+    # hosts that set the environment directly have no .env to load
+    env_file = ".env" if os.path.exists(".env") else None
+    uvicorn.run("backend.main:app", host="0.0.0.0", port=port, env_file=env_file)
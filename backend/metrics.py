@@ -0,0 +1,213 @@
+"""
+In-process request and database metrics in Prometheus text format.
+
+MetricsMiddleware records per-route latency, request counts, in-flight
+requests and the number of SQL statements each request ran; long-lived
+streams (/events) are only counted when they open. The database
+engines report pool checkout waits and statement counts through
+instrument_engine(). Metrics are per process; scrape every worker.
+"""
+import bisect
+import contextvars
+import threading
+import time
+
+from sqlalchemy import event
+
+from .request_log import STREAMING_PATHS, annotate
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 4, 8, 16, 32, 64, 128)
+
+_request_queries = contextvars.ContextVar("request_queries", default=None)
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _format_number(value):
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, values, value) for values, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *label_values, amount=1):
+        self.inc(*label_values, amount=-amount)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        # label values -> [per-bucket counts..., +Inf count, sum]
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            series[index] += 1
+            series[-1] += value
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + (float("inf"),), series[:-1]):
+                    cumulative += count
+                    samples.append((f"{self.name}_bucket", values + (_format_number(bound),), cumulative))
+                samples.append((f"{self.name}_count", values, cumulative))
+                samples.append((f"{self.name}_sum", values, series[-1]))
+        return samples
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        """Register a callable returning (name, kind, help, value) tuples read at scrape time."""
+        self._collectors.append(collector)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for name, values, value in metric.samples():
+                label_names = metric.labels + ("le",) if name.endswith("_bucket") else metric.labels
+                lines.append(f"{name}{_format_labels(label_names, values)} {_format_number(value)}")
+        for collector in self._collectors:
+            for name, kind, help_text, value in collector():
+                lines.append(f"# HELP {name} {help_text}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.append(f"{name} {_format_number(value)}")
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+request_latency = registry.register(Histogram(
+    "http_request_duration_seconds", "Request latency by route.", ("method", "route")))
+requests_total = registry.register(Counter(
+    "http_requests_total", "Requests by route and status code.", ("method", "route", "status")))
+requests_in_flight = registry.register(Gauge(
+    "http_requests_in_flight", "Requests currently being served.", ()))
+request_queries = registry.register(Histogram(
+    "http_request_db_queries", "SQL statements executed per request.", ("method", "route"), QUERY_COUNT_BUCKETS))
+db_queries_total = registry.register(Counter(
+    "db_queries_total", "SQL statements executed.", ()))
+pool_checkout_wait = registry.register(Histogram(
+    "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.", ("engine",), POOL_WAIT_BUCKETS))
+
+
+def observe_pool_wait(engine_name, seconds):
+    pool_checkout_wait.observe(seconds, engine_name)
+
+def _count_statement(*args):
+    db_queries_total.inc()
+    counter = _request_queries.get()
+    if counter is not None:
+        counter[0] += 1
+
+def instrument_engine(engine):
+    """Count every SQL statement the engine runs, globally and for the current request."""
+    event.listen(engine, "before_cursor_execute", _count_statement)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording latency, status, in-flight and per-request query counts."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] in STREAMING_PATHS:
+            await self._stream(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = [500]
+        queries = [0]
+        token = _request_queries.set(queries)
+        requests_in_flight.inc()
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                status[0] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            _request_queries.reset(token)
+            requests_in_flight.dec()
+            # The matched route template is only known once routing has run
+            route = getattr(scope.get("route"), "path", "unmatched")
+            request_latency.observe(elapsed, method, route)
+            requests_total.inc(method, route, str(status[0]))
+            request_queries.observe(queries[0], method, route)
+            annotate(db_queries=queries[0])
+
+    async def _stream(self, scope, receive, send):
+        """
+        Count a stream once, when its response starts. Hours of streaming
+        aren't request latency, and open streams have their own gauge
+        (events_clients).
+        """
+        async def send_counting(message):
+            if message["type"] == "http.response.start":
+                route = getattr(scope.get("route"), "path", "unmatched")
+                requests_total.inc(scope["method"], route, str(message["status"]))
+            await send(message)
+
+        await self.app(scope, receive, send_counting)
@@ -0,0 +1,178 @@
+"""
+SQL statement profiling and query budgets.
+
+profile_engine() hooks SQLAlchemy's cursor events so every statement run while
+a QueryProfile is active is recorded with its duration and row count. Profiles
+are bound to the current context, so one covers a request or a block of code:
+
+    with query_budget(max_queries=3, max_ms=50) as profile:
+        client.get("/menu_items", params={"date": "2026-02-02"})
+    print(profile.summary())
+
+query_budget() raises QueryBudgetExceeded (an AssertionError, so test runners
+report it as a failure) when the block runs more statements or takes longer
+than allowed. With QUERY_PROFILE=1, QueryProfileMiddleware profiles every
+request, adds an X-Query-Profile header and logs the statements at DEBUG.
+Row counts come from the DB-API cursor and are None where the driver doesn't
+report them for SELECTs (sqlite).
+"""
+from collections import namedtuple
+import contextlib
+import contextvars
+import logging
+import os
+import time
+
+from sqlalchemy import event
+
+logger = logging.getLogger("backend.query_profile")
+
+PROFILE_ENABLED = os.getenv("QUERY_PROFILE", "0") == "1"
+
+QueryRecord = namedtuple("QueryRecord", ["statement", "duration", "rows"])
+Budget = namedtuple("Budget", ["max_queries", "max_ms"])
+
+_active_profile = contextvars.ContextVar("query_profile", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+class QueryProfile:
+    """Statements recorded while active. Nested profiles also feed the enclosing one."""
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.records = []
+        self.started = time.perf_counter()
+        self.elapsed = None
+
+    def record(self, statement, duration, rows):
+        profile = self
+        while profile is not None:
+            profile.records.append(QueryRecord(statement, duration, rows))
+            profile = profile.parent
+
+    def finish(self):
+        self.elapsed = time.perf_counter() - self.started
+
+    @property
+    def count(self):
+        return len(self.records)
+
+    @property
+    def db_ms(self):
+        return sum(record.duration for record in self.records) * 1000
+
+    @property
+    def elapsed_ms(self):
+        elapsed = self.elapsed if self.elapsed is not None else time.perf_counter() - self.started
+        return elapsed * 1000
+
+    def header_value(self):
+        return f"queries={self.count}; db_ms={self.db_ms:.2f}"
+
+    def summary(self, limit=120):
+        """One line per statement, slowest first."""
+        lines = [f"{self.count} statements, {self.db_ms:.2f} ms in database, {self.elapsed_ms:.2f} ms total"]
+        for record in sorted(self.records, key=lambda record: record.duration, reverse=True):
+            statement = " ".join(record.statement.split())
+            if len(statement) > limit:
+                statement = statement[:limit - 3] + "..."
+            rows = "?" if record.rows is None else record.rows
+            lines.append(f"  {record.duration * 1000:8.2f} ms  rows={rows}  {statement}")
+        return "\n".join(lines)
+
+    def check(self, budget, label="block"):
+        """Raise QueryBudgetExceeded if this profile is over the given Budget."""
+        problems = []
+        if budget.max_queries is not None and self.count > budget.max_queries:
+            problems.append(f"{self.count} statements (budget {budget.max_queries})")
+        if budget.max_ms is not None and self.elapsed_ms > budget.max_ms:
+            problems.append(f"{self.elapsed_ms:.2f} ms (budget {budget.max_ms} ms)")
+        if problems:
+            raise QueryBudgetExceeded(f"{label} ran {' and '.join(problems)}\n{self.summary()}")
+
+
+def start_profile():
+    """Begin profiling the current context; returns the profile and a reset token."""
+    profile = QueryProfile(parent=_active_profile.get())
+    return profile, _active_profile.set(profile)
+
+def stop_profile(profile, token):
+    profile.finish()
+    _active_profile.reset(token)
+
+@contextlib.contextmanager
+def query_budget(max_queries=None, max_ms=None, label="block"):
+    """Profile the block and fail if it exceeds max_queries statements or max_ms wall time."""
+    profile, token = start_profile()
+    try:
+        yield profile
+    finally:
+        stop_profile(profile, token)
+    profile.check(Budget(max_queries, max_ms), label)
+
+
+def _profiled(context):
+    # Statements run with execution_options(query_profile=False) are bookkeeping
+    # (see db/generations.py), not part of what a route asks of the database
+    return context is None or context.execution_options.get("query_profile", True)
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _active_profile.get() is not None and _profiled(context):
+        conn.info.setdefault("query_profile_started", []).append(time.perf_counter())
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    profile = _active_profile.get()
+    started = conn.info.get("query_profile_started")
+    if profile is None or not started or not _profiled(context):
+        return
+    duration = time.perf_counter() - started.pop()
+    rows = cursor.rowcount if cursor.rowcount >= 0 else None
+    profile.record(statement, duration, rows)
+
+def profile_engine(engine):
+    """Record statements the engine runs into the active QueryProfile, if any."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+class QueryProfileMiddleware:
+    """
+    ASGI middleware that profiles each HTTP request, reports it in an
+    X-Query-Profile header and logs the statements at DEBUG. Requests to routes
+    listed in budgets that go over are logged as warnings.
+    """
+
+    def __init__(self, app, budgets=None):
+        self.app = app
+        self.budgets = budgets or {}
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        profile, token = start_profile()
+
+        async def send_with_profile(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-query-profile", profile.header_value().encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            stop_profile(profile, token)
+            route = getattr(scope.get("route"), "path", scope["path"])
+            logger.debug("%s %s: %s", scope["method"], route, profile.summary())
+            budget = self.budgets.get(route)
+            if budget is not None:
+                try:
+                    profile.check(budget, f"{scope['method']} {route}")
+                except QueryBudgetExceeded as e:
+                    logger.warning("Query budget exceeded: %s", e)
@@ -0,0 +1,137 @@
+"""
+Per-request summary logging.
+
+Instead of logging every step of a request, handlers and queries attach fields
+to the current request with annotate() and RequestSummaryMiddleware writes one
+record per request when it finishes. Per-item detail is logged at DEBUG and
+only for a sampled fraction of items (LOG_ITEM_SAMPLE_RATE).
+"""
+import contextvars
+import datetime
+import json
+import logging
+import os
+import random
+import time
+
+logger = logging.getLogger("backend.request")
+
+ITEM_SAMPLE_RATE = float(os.getenv("LOG_ITEM_SAMPLE_RATE", 0.01))
+
+# Long-lived streams (Server-Sent Events): their lifetime is a connection,
+# not a request, so they are logged on connect and disconnect and left out of
+# the request metrics
+STREAMING_PATHS = frozenset({"/events"})
+
+_summary = contextvars.ContextVar("request_summary", default=None)
+
+
+def annotate(**fields):
+    """Attach fields to the current request's summary record, if there is one."""
+    summary = _summary.get()
+    if summary is not None:
+        summary.update(fields)
+
+def add_timing(name, seconds):
+    """Accumulate a duration (reported in ms) and a call count on the current request."""
+    summary = _summary.get()
+    if summary is not None:
+        summary[f"{name}_ms"] = summary.get(f"{name}_ms", 0.0) + seconds * 1000
+        summary[f"{name}_calls"] = summary.get(f"{name}_calls", 0) + 1
+
+def sampled():
+    """True for roughly LOG_ITEM_SAMPLE_RATE of calls; gates per-item debug logging."""
+    return ITEM_SAMPLE_RATE >= 1 or random.random() < ITEM_SAMPLE_RATE
+
+
+class _Logfmt:
+    """Renders summary fields as key=value pairs, only if the record is actually emitted."""
+
+    __slots__ = ("fields",)
+
+    def __init__(self, fields):
+        self.fields = fields
+
+    def __str__(self):
+        parts = []
+        for key, value in self.fields.items():
+            if isinstance(value, float):
+                value = f"{value:.2f}"
+            elif isinstance(value, (list, tuple)):
+                value = ",".join(str(v) for v in value)
+            value = str(value)
+            parts.append(f'{key}="{value}"' if " " in value else f"{key}={value}")
+        return " ".join(parts)
+
+
+class RequestSummaryMiddleware:
+    """ASGI middleware that times each HTTP request and logs one summary record for it."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not logger.isEnabledFor(logging.INFO):
+            await self.app(scope, receive, send)
+            return
+        if scope["path"] in STREAMING_PATHS:
+            await self._stream(scope, receive, send)
+            return
+
+        fields = {"method": scope["method"], "path": scope["path"], "status": 500}
+        token = _summary.set(fields)
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                fields["status"] = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            fields["duration_ms"] = (time.perf_counter() - started) * 1000
+            for key, value in fields.items():
+                if key.endswith("_ms"):
+                    fields[key] = round(value, 3)
+            _summary.reset(token)
+            logger.info("%s", _Logfmt(fields), extra={"summary": fields})
+
+    async def _stream(self, scope, receive, send):
+        """One record when a stream's response starts and one when it closes."""
+        fields = {"method": scope["method"], "path": scope["path"], "status": 500}
+        token = _summary.set(fields)
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            if message["type"] == "http.response.start":
+                fields["status"] = message["status"]
+                opened = {**fields, "stream": "open"}
+                logger.info("%s", _Logfmt(opened), extra={"summary": opened})
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            _summary.reset(token)
+            closed = {**fields, "stream": "closed", "connected_s": round(time.perf_counter() - started, 3)}
+            logger.info("%s", _Logfmt(closed), extra={"summary": closed})
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; summary records carry their fields at the top level."""
+
+    def format(self, record):
+        payload = {
+            "time": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+        }
+        summary = getattr(record, "summary", None)
+        if summary is not None:
+            payload.update(summary)
+        else:
+            payload["message"] = record.getMessage()
+        if record.exc_info:
+            payload["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(payload, default=str)
@@ -0,0 +1,100 @@
+from collections import Counter, namedtuple
+import heapq
+import logging
+import re
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+SearchHit = namedtuple("SearchHit", ["item_id", "item_name", "score", "similarity"])
+# One built index; replaced whole, never modified
+SearchTables = namedtuple("SearchTables", ["ids", "names", "sizes", "postings", "generation"])
+
+_NON_WORD = re.compile(r"[^0-9a-z]+")
+
+
+def trigrams(text):
+    """
+    Trigrams of a name the way pg_trgm makes them: lowercased words, each padded
+    with two spaces in front and one behind, so short words and word starts count.
+    """
+    grams = set()
+    for word in _NON_WORD.split(text.lower()):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class ItemSearchIndex:
+    """
+    In-memory trigram index over menu item names.
+
+    A hit's score is the share of the query's trigrams found in the item name,
+    so "orange chicken" fully matches "Orange Chicken Bowl". Hits are ranked by
+    score, then by trigram similarity (shared / union) to prefer closer names.
+    """
+
+    def __init__(self, items=(), generation=None):
+        self.load(items, generation)
+
+    def load(self, items, generation):
+        """Rebuild the index from fresh (item_id, item_name) rows."""
+        ids = []
+        names = []
+        sizes = []
+        postings = {}
+        for item_id, item_name in items:
+            grams = trigrams(item_name)
+            position = len(ids)
+            ids.append(item_id)
+            names.append(item_name)
+            sizes.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(position)
+
+        # load runs in a worker thread while searches run on the event loop:
+        # publish the finished tables with one assignment, so a search, which
+        # reads them once, never pairs positions from one build with another's
+        self._tables = SearchTables(ids, names, sizes, postings, generation)
+        if ids:
+            logger.info(f"Item search index loaded: {len(ids)} items, {len(postings)} trigrams")
+
+    @property
+    def generation(self):
+        return self._tables.generation
+
+    def __len__(self):
+        return len(self._tables.ids)
+
+    def search(self, query, limit=10, min_score=0.5):
+        """Return up to limit SearchHits for query, best first."""
+        grams = trigrams(query)
+        if not grams:
+            return []
+
+        tables = self._tables
+        postings = tables.postings
+        shared = Counter()
+        for gram in grams:
+            posting = postings.get(gram)
+            if posting:
+                shared.update(posting)
+
+        wanted = len(grams)
+        sizes = tables.sizes
+        scored = []
+        for position, count in shared.items():
+            score = count / wanted
+            if score >= min_score:
+                similarity = count / (wanted + sizes[position] - count)
+                scored.append((score, similarity, -position))
+
+        return [
+            SearchHit(tables.ids[-position], tables.names[-position], round(score, 3), round(similarity, 3))
+            for score, similarity, position in heapq.nlargest(limit, scored)
+        ]
+
+
+# Rebuilt whenever the data generation changes
+item_search = ItemSearchIndex()
@@ -0,0 +1,312 @@
+"""
+Versioned, memory-mapped snapshot of everything the API reads.
+
+Rewritten by parse_json.py and generate_description.py at the end of every
+run that changes the data, whenever SNAPSHOT_FILE is set, or by hand:
+
+    python -m backend.snapshot --output /var/lib/menu/menu.snapshot
+    python -m backend.snapshot --inspect /var/lib/menu/menu.snapshot
+
+With SNAPSHOT_FILE pointing at it, every uvicorn worker maps the file
+read-only and serves reads from it instead of the database, so N workers share
+one copy in the page cache and open no connections for reads. The file is
+replaced atomically (write to a temp file, then rename), and workers notice the
+new inode within SNAPSHOT_CHECK_SECONDS and switch to it.
+
+Layout, little-endian:
+
+    header   magic b"BDHSNAP\\0", format version (u32), data generation (i64),
+             table of contents offset and length (u64, u64)
+    sections compact JSON blobs, back to back
+    toc      JSON object mapping section name to [offset, length, etag, rows]
+
+Sections hold the reference tables, the unfiltered menu of every cycle-day
+(menu/<day_id>) and the rows the cycle calendar, search index and item schedule
+are built from. Unfiltered menus and reference tables are sent as views of the
+mapped bytes, with the ETag stored alongside, so no worker keeps its own copy;
+other sections are decoded when a request needs them.
+"""
+import argparse
+import datetime
+import json
+import logging
+import mmap
+import os
+import struct
+import time
+
+from dotenv import load_dotenv
+
+from .cache import CachedResponse, encode_json
+
+# Configure logger for this module
+logger = logging.getLogger(__name__)
+
+MAGIC = b"BDHSNAP\0"
+FORMAT_VERSION = 2
+HEADER = struct.Struct("<8sIqQQ")
+
+SNAPSHOT_FILE = os.getenv("SNAPSHOT_FILE")
+SNAPSHOT_CHECK_SECONDS = float(os.getenv("SNAPSHOT_CHECK_SECONDS", 5))
+
+# Reference tables stored as the query helpers return them
+REFERENCE_SECTIONS = ["locations", "meal_types", "allergens", "always_available_items", "days"]
+# Row lists the in-memory indexes are built from
+ROW_SECTIONS = ["menu_days", "cycle_days", "menu_item_names", "item_occurrences"]
+# Recent generations kept for /events catch-up
+GENERATION_HISTORY = 64
+
+
+class SectionResponse(CachedResponse):
+    """
+    A section served as it sits in the map. The body is a view of the mapped
+    bytes, shared with every other worker; data is decoded only when asked for.
+    """
+
+    __slots__ = ("rows",)
+
+    def __init__(self, body, etag, rows):
+        self.body = body
+        self.etag = etag
+        self.rows = rows
+
+    @property
+    def data(self):
+        return json.loads(bytes(self.body))
+
+    def __len__(self):
+        return self.rows
+
+
+class MenuSnapshot:
+    """
+    A read-only mapping of one snapshot file. Answers the queries.py functions
+    the API uses by name, so async_queries.run_query can hand a snapshot the
+    same calls it would run against a database session.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self.stat = os.fstat(f.fileno())
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, generation, toc_offset, toc_length = HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a menu snapshot")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"{path} has snapshot format {version}, expected {FORMAT_VERSION}")
+        self.path = path
+        self.generation = generation
+        self._toc = json.loads(self._map[toc_offset:toc_offset + toc_length])
+        self._decoded = {}
+
+    def __len__(self):
+        return self.stat.st_size
+
+    def raw(self, name):
+        """The encoded bytes of a section, or None when the snapshot lacks it."""
+        entry = self._toc.get(name)
+        if entry is None:
+            return None
+        offset, length = entry[:2]
+        return self._map[offset:offset + length]
+
+    def response(self, name):
+        """A section as a SectionResponse, or an empty CachedResponse when the snapshot lacks it."""
+        entry = self._toc.get(name)
+        if entry is None:
+            return CachedResponse([])
+        offset, length, etag, rows = entry
+        return SectionResponse(memoryview(self._map)[offset:offset + length], etag, rows)
+
+    def section(self, name, default=None):
+        if name not in self._decoded:
+            raw = self.raw(name)
+            self._decoded[name] = default if raw is None else json.loads(raw)
+        return self._decoded[name]
+
+    def sections(self):
+        return {name: entry[1] for name, entry in self._toc.items()}
+
+    # queries.py equivalents. Each returns the same shape as its namesake.
+
+    def get_data_generation(self):
+        return self.generation
+
+    def get_locations(self):
+        return self.section("locations", [])
+
+    def get_meal_types(self):
+        return self.section("meal_types", [])
+
+    def get_allergens(self):
+        return self.section("allergens", [])
+
+    def get_always_available_items(self):
+        return self.section("always_available_items", [])
+
+    def get_days(self):
+        return self.section("days", [])
+
+    def get_menu_days(self):
+        return [tuple(row) for row in self.section("menu_days", [])]
+
+    def get_cycles(self):
+        return [
+            (cycle_id, cycle_identifier, datetime.date.fromisoformat(start_date))
+            for cycle_id, cycle_identifier, start_date in self.section("cycles", [])
+        ]
+
+    def get_cycle_days(self):
+        return [tuple(row) for row in self.section("cycle_days", [])]
+
+    def get_menu_item_names(self):
+        return [tuple(row) for row in self.section("menu_item_names", [])]
+
+    def get_item_occurrences(self):
+        return [tuple(row) for row in self.section("item_occurrences", [])]
+
+    def get_generations_since(self, generation):
+        return [tuple(row) for row in self.section("generations", []) if row[0] > generation]
+
+    def build_menu_items(self, day_id, location_ids, meal_type_ids):
+        # Decoded per call rather than kept, since menu_cache holds the results
+        raw = self.raw(f"menu/{day_id}")
+        items = json.loads(raw) if raw is not None else []
+        if location_ids:
+            items = [item for item in items if item["location_id"] in location_ids]
+        if meal_type_ids:
+            items = [item for item in items if item["meal_type_id"] in meal_type_ids]
+        return items
+
+    def build_week_menu_items(self, day_ids, location_ids, meal_type_ids):
+        return {day_id: self.build_menu_items(day_id, location_ids, meal_type_ids) for day_id in sorted(set(day_ids))}
+
+
+class SnapshotStore:
+    """
+    The snapshot a worker currently serves from. Checks the file for a new
+    inode at most once per check interval and swaps the mapping in one
+    assignment, so each request sees one consistent version.
+    """
+
+    def __init__(self, path, check_interval):
+        self.path = path
+        self.check_interval = check_interval
+        self.snapshot = None
+        self.swaps = 0
+        self._checked_at = None
+
+    def current(self):
+        """The latest snapshot, or None when the file is missing or unreadable."""
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.check_interval:
+            return self.snapshot
+        first_check = self._checked_at is None
+        self._checked_at = now
+        try:
+            stat = os.stat(self.path)
+            if self.snapshot is None or (stat.st_ino, stat.st_mtime_ns) != (self.snapshot.stat.st_ino, self.snapshot.stat.st_mtime_ns):
+                snapshot = MenuSnapshot(self.path)
+                if self.snapshot is not None:
+                    logger.info(f"Switching snapshot from generation {self.snapshot.generation} to {snapshot.generation}")
+                    self.swaps += 1
+                else:
+                    logger.info(f"Serving from snapshot {self.path} (generation {snapshot.generation}, {len(snapshot)} bytes)")
+                self.snapshot = snapshot
+        except (OSError, ValueError) as e:
+            if first_check:
+                logger.warning(f"Menu snapshot unavailable, reading from the database: {str(e)}")
+        return self.snapshot
+
+    def stats(self):
+        snapshot = self.snapshot
+        return {
+            "path": self.path,
+            "generation": snapshot.generation if snapshot else None,
+            "bytes": len(snapshot) if snapshot else 0,
+            "swaps": self.swaps,
+        }
+
+
+snapshot_store = SnapshotStore(SNAPSHOT_FILE, SNAPSHOT_CHECK_SECONDS) if SNAPSHOT_FILE else None
+
+
+def collect_sections(db):
+    """Every section of a snapshot, read from db in one transaction."""
+    from .db import queries
+
+    sections = {name: getattr(queries, f"get_{name}")(db) for name in REFERENCE_SECTIONS + ROW_SECTIONS}
+    # The reference helpers return a FailedQuery on errors; never publish a snapshot
+    # missing a table. An empty table is fine.
+    failed = [name for name in REFERENCE_SECTIONS if isinstance(sections[name], queries.FailedQuery)]
+    if failed:
+        raise RuntimeError(f"Refusing to write a snapshot with failed tables: {', '.join(failed)}")
+    sections["cycles"] = [
+        (cycle_id, cycle_identifier, start_date.isoformat())
+        for cycle_id, cycle_identifier, start_date in queries.get_cycles(db)
+    ]
+    generation = queries.get_data_generation(db)
+    sections["generations"] = queries.get_generations_since(db, max(generation - GENERATION_HISTORY, 0))
+    for _, day_id in sections["menu_days"]:
+        sections[f"menu/{day_id}"] = queries.build_menu_items(db, day_id, None, None)
+    return generation, sections
+
+def write_snapshot(path, generation, sections):
+    """Write the snapshot next to path and rename it into place."""
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    toc = {}
+    with open(temp_path, "wb") as f:
+        f.write(b"\0" * HEADER.size)
+        for name, data in sections.items():
+            encoded = CachedResponse(data)
+            toc[name] = [f.tell(), len(encoded.body), encoded.etag, len(data)]
+            f.write(encoded.body)
+        toc_offset = f.tell()
+        toc_blob = encode_json(toc)
+        f.write(toc_blob)
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, generation, toc_offset, len(toc_blob)))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temp_path, path)
+    return os.path.getsize(path)
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Write or inspect the menu snapshot workers serve from.")
+    parser.add_argument("--output", default=os.getenv("SNAPSHOT_FILE"), help="Snapshot path (default: SNAPSHOT_FILE)")
+    parser.add_argument("--inspect", metavar="PATH", help="Print a snapshot's header and sections instead")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+    if args.inspect:
+        snapshot = MenuSnapshot(args.inspect)
+        sections = snapshot.sections()
+        print(json.dumps({
+            "generation": snapshot.generation,
+            "format": FORMAT_VERSION,
+            "bytes": len(snapshot),
+            "menus": sum(name.startswith("menu/") for name in sections),
+            "sections": {name: length for name, length in sections.items() if not name.startswith("menu/")},
+        }, indent=2))
+        return
+    if not args.output:
+        parser.error("--output or SNAPSHOT_FILE is required")
+
+    from .db import database
+
+    engine = database.init_engines()
+    started = time.perf_counter()
+    db = database.SessionLocal()
+    try:
+        if engine.dialect.name == "postgresql":
+            # One consistent view of the data across every section
+            db.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+        generation, sections = collect_sections(db)
+    finally:
+        db.close()
+    size = write_snapshot(args.output, generation, sections)
+    logger.info(f"Wrote snapshot of generation {generation} to {args.output}: {size} bytes, {len(sections)} sections in {time.perf_counter() - started:.2f}s")
+
+if __name__ == "__main__":
+    main()
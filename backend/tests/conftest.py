@@ -0,0 +1,63 @@
+"""
+Shared setup for the backend tests: a SQLite database seeded from the
+checked-in dining_menu.json (see backend/benchmarks/seed.py), and a helper
+that runs requests against the app in-process.
+
+The backend reads most of its settings on import, so DATABASE_URL and the
+others are fixed here, before any test module imports the app.
+"""
+import asyncio
+import os
+import tempfile
+
+import pytest
+
+_DATABASE_DIR = tempfile.mkdtemp(prefix="menu-tests-")
+DATABASE_URL = f"sqlite:///{os.path.join(_DATABASE_DIR, 'menu.db')}"
+os.environ.update({
+    "DATABASE_URL": DATABASE_URL,
+    "DB_ASYNC": "0",
+    "MENU_CACHE_WARM_ON_STARTUP": "0",
+    "MENU_GENERATIONS": "0",
+    "SNAPSHOT_FILE": "",
+})
+
+from backend.benchmarks.seed import load_menu, scale_menu, seed_database  # noqa: E402
+
+seed_database(DATABASE_URL, load_menu())
+
+# A date on the seeded menus (cycle 1 starts on CYCLE_REFERENCE_DATE)
+MENU_DATE = "2026-02-02"
+
+
+def seeded_database(name, **scale):
+    """Seed another database with the menu scaled up (see scale_menu); returns its URL."""
+    url = f"sqlite:///{os.path.join(_DATABASE_DIR, name)}"
+    seed_database(url, scale_menu(load_menu(), **scale))
+    return url
+
+
+def run_with_app(check):
+    """
+    Run the app's lifespan and await check(client), an httpx client bound to
+    the app in-process. Requests run on this event loop, so a query_budget()
+    inside check sees their statements and none of startup's.
+    """
+    import httpx
+    from backend.benchmarks.concurrency import running_app
+    from backend.main import app
+
+    async def run():
+        async with running_app(app) as transport:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await check(client)
+
+    return asyncio.run(run())
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    from backend.cache import menu_cache, reference_cache
+    menu_cache.clear()
+    reference_cache.clear()
+    yield
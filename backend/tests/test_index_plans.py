@@ -0,0 +1,102 @@
+"""
+Index plans for the menu queries: EXPLAIN the exact statements
+build_menu_items issues, for every combination of filters, and fail if
+menu_availability or menu_item_allergen is read with a full table scan.
+
+SQLite is checked with EXPLAIN QUERY PLAN on the seeded test database.
+Set TEST_POSTGRES_URL to a scratch Postgres database to check it too; the
+test drops and reseeds its tables. Sequential scans are disabled there
+(SET LOCAL enable_seqscan = off): the sample tables are small enough that
+the planner would otherwise prefer them, so the check proves an index can
+serve each access path, not that the planner picks it at every table size.
+"""
+import os
+import re
+
+import pytest
+from sqlalchemy import create_engine, func, text
+from sqlalchemy.orm import Session
+
+from backend.benchmarks.seed import load_menu, seed_database
+from backend.db.models import MenuAvailability
+from backend.db.queries import menu_allergens_query, menu_items_query
+
+from .conftest import DATABASE_URL
+
+INDEXED_TABLES = ("menu_availability", "menu_item_allergen")
+
+POSTGRES_URL = os.getenv("TEST_POSTGRES_URL")
+
+QUERIES = {"menu_items": menu_items_query, "menu_allergens": menu_allergens_query}
+
+FILTERS = ["day", "day+location", "day+meal_type", "day+location+meal_type"]
+
+
+def sqlite_scans(connection, sql):
+    plan = [row[-1] for row in connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {sql}")]
+    scans = [
+        detail for detail in plan
+        if re.match(rf"SCAN (TABLE )?({'|'.join(INDEXED_TABLES)})\b", detail)
+    ]
+    return scans, plan
+
+def postgres_scans(connection, sql):
+    connection.execute(text("SET LOCAL enable_seqscan = off"))
+    plan = connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {sql}").scalar()
+    nodes = []
+
+    def walk(node):
+        if node.get("Relation Name") in INDEXED_TABLES:
+            nodes.append(f"{node['Node Type']} on {node['Relation Name']}" + (f" using {node['Index Name']}" if "Index Name" in node else ""))
+        for child in node.get("Plans", []):
+            walk(child)
+
+    walk(plan[0]["Plan"])
+    return [node for node in nodes if node.startswith("Seq Scan")], nodes
+
+
+@pytest.fixture(
+    scope="module",
+    params=[
+        "sqlite",
+        pytest.param("postgresql", marks=pytest.mark.skipif(not POSTGRES_URL, reason="TEST_POSTGRES_URL is not set")),
+    ],
+)
+def engine(request):
+    if request.param == "sqlite":
+        engine = create_engine(DATABASE_URL)
+    else:
+        seed_database(POSTGRES_URL, load_menu())
+        engine = create_engine(POSTGRES_URL)
+    yield engine
+    engine.dispose()
+
+def sample_filters(db, label):
+    """(day_id, location_ids, meal_type_ids) for the busiest cycle-day, with one location and meal type."""
+    day_id, location_id, meal_type_id = (
+        db.query(
+            MenuAvailability.day_id,
+            func.min(MenuAvailability.location_id),
+            func.min(MenuAvailability.meal_type_id),
+        )
+        .group_by(MenuAvailability.day_id)
+        .order_by(func.count().desc())
+        .first()
+    )
+    return (
+        day_id,
+        [location_id] if "location" in label else None,
+        [meal_type_id] if "meal_type" in label else None,
+    )
+
+
+@pytest.mark.parametrize("filters", FILTERS)
+@pytest.mark.parametrize("query", QUERIES)
+def test_menu_query_uses_indexes(engine, query, filters):
+    explain = postgres_scans if engine.dialect.name == "postgresql" else sqlite_scans
+    with Session(engine) as db:
+        statement = QUERIES[query](db, *sample_filters(db, filters)).statement
+    sql = str(statement.compile(dialect=engine.dialect, compile_kwargs={"literal_binds": True}))
+    with engine.begin() as connection:
+        scans, plan = explain(connection, sql)
+    assert not scans, f"{query} filtered by {filters} scans {scans}; plan: {plan}"
@@ -0,0 +1,159 @@
+import asyncio
+import socket
+import time
+
+from backend import mailer
+from backend.mail_stub import MailgunStandIn
+from backend.mailer import IssueReport, MailQueue
+
+
+def report(n):
+    return IssueReport(error_type=f"Problem {n}", message=f"Details {n}", email="student@example.com")
+
+def make_queue(url, **options):
+    options = {"backoff_base": 0.01, "backoff_max": 0.05, "timeout": 2.0, **options}
+    return MailQueue(url, "test-key", "dev@example.com", **options)
+
+def unused_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def test_delivers_every_report():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, workers=2)
+        await queue.start()
+        assert all(queue.submit(report(n)) for n in range(3))
+        await queue.stop()
+        return queue.stats()
+
+    with MailgunStandIn() as stand_in:
+        stats = asyncio.run(run(stand_in))
+
+    assert stats == {"running": False, "pending": 0, "sent": 3, "failed": 0, "retries": 0, "rejected": 0}
+    assert sorted(message["subject"] for message in stand_in.received) == [f"Issue Reported: Problem {n}" for n in range(3)]
+    assert all(message["to"] == "dev@example.com" for message in stand_in.received)
+
+
+def test_retries_server_errors():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, max_attempts=5)
+        await queue.start()
+        queue.submit(report(1))
+        await queue.stop()
+        return queue.stats()
+
+    with MailgunStandIn(fail_first=2, fail_status=503) as stand_in:
+        stats = asyncio.run(run(stand_in))
+
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (1, 0, 2)
+    assert stand_in.requests == 3
+    assert len(stand_in.received) == 1
+
+
+def test_gives_up_after_max_attempts():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, max_attempts=3)
+        await queue.start()
+        queue.submit(report(1))
+        await queue.stop()
+        return queue.stats()
+
+    with MailgunStandIn(fail_first=10, fail_status=429) as stand_in:
+        stats = asyncio.run(run(stand_in))
+
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (0, 1, 2)
+    assert stand_in.requests == 3
+
+
+def test_does_not_retry_client_errors():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, max_attempts=5)
+        await queue.start()
+        queue.submit(report(1))
+        await queue.stop()
+        return queue.stats()
+
+    with MailgunStandIn(fail_first=1, fail_status=400) as stand_in:
+        stats = asyncio.run(run(stand_in))
+
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (0, 1, 0)
+    assert stand_in.requests == 1
+
+
+def test_retries_network_errors():
+    async def run():
+        queue = make_queue(f"http://127.0.0.1:{unused_port()}/messages", max_attempts=3)
+        await queue.start()
+        queue.submit(report(1))
+        await queue.stop()
+        return queue.stats()
+
+    stats = asyncio.run(run())
+
+    assert (stats["sent"], stats["failed"], stats["retries"]) == (0, 1, 2)
+
+
+def test_backoff_doubles_up_to_the_cap(monkeypatch):
+    # No jitter: the delays are exactly backoff_base * 2 ** (attempt - 1), capped
+    monkeypatch.setattr(mailer.random, "uniform", lambda low, high: high)
+
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, max_attempts=4, backoff_base=0.1, backoff_max=0.15)
+        await queue.start()
+        started = time.perf_counter()
+        queue.submit(report(1))
+        await queue.stop()
+        return time.perf_counter() - started
+
+    with MailgunStandIn(fail_first=3) as stand_in:
+        elapsed = asyncio.run(run(stand_in))
+
+    # 0.1 + 0.15 + 0.15 rather than 0.1 + 0.2 + 0.4
+    assert 0.4 <= elapsed < 0.7
+    assert len(stand_in.received) == 1
+
+
+def test_batches_reports_within_the_window():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, batch_size=5, batch_window=0.5)
+        await queue.start()
+        for n in range(7):
+            queue.submit(report(n))
+        await queue.stop()
+        return queue.stats()
+
+    with MailgunStandIn() as stand_in:
+        stats = asyncio.run(run(stand_in))
+
+    assert stats["sent"] == 7
+    assert [message["subject"] for message in stand_in.received] == ["5 Issues Reported", "2 Issues Reported"]
+    assert all(f"Problem {n}" in stand_in.received[0]["html"] for n in range(5))
+
+
+def test_rejects_reports_when_full():
+    async def run(stand_in):
+        queue = make_queue(stand_in.url, max_size=2)
+        await queue.start()
+        assert queue.submit(report(0))
+        # Let the worker take the first report; the stand-in holds it while the queue fills
+        await asyncio.sleep(0.1)
+        accepted = [queue.submit(report(n)) for n in range(1, 5)]
+        pending = queue.pending()
+        await queue.stop()
+        return accepted, pending, queue.stats()
+
+    with MailgunStandIn(delay=0.3) as stand_in:
+        accepted, pending, stats = asyncio.run(run(stand_in))
+
+    assert accepted == [True, True, False, False]
+    assert pending == 2
+    assert (stats["sent"], stats["rejected"]) == (3, 2)
+
+
+def test_rejects_reports_when_stopped():
+    queue = make_queue("http://127.0.0.1:1/messages")
+
+    assert not queue.submit(report(1))
+    assert queue.stats()["rejected"] == 1
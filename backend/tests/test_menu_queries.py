@@ -0,0 +1,67 @@
+import datetime
+
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.orm import Session
+
+from backend.cache import menu_cache
+from backend.db import queries
+from backend.db.models import MenuAvailability
+from backend.query_profile import profile_engine, query_budget
+
+from .conftest import DATABASE_URL, MENU_DATE, run_with_app, seeded_database
+
+# /menu_items on a cold cache: data generation, the availability rows with
+# their names, and the allergens for all of them
+MENU_ITEMS_MAX_QUERIES = 3
+
+
+def test_menu_items_query_count_is_flat_across_a_week():
+    start = datetime.date.fromisoformat(MENU_DATE)
+
+    async def check(client):
+        for offset in range(7):
+            date = (start + datetime.timedelta(days=offset)).isoformat()
+            menu_cache.clear()
+            with query_budget(MENU_ITEMS_MAX_QUERIES, label=f"GET /menu_items?date={date}"):
+                response = await client.get("/menu_items", params={"date": date})
+            assert response.status_code == 200
+            assert response.json()
+
+    run_with_app(check)
+
+
+def test_menu_range_loads_its_cycle_days_together():
+    async def check(client):
+        with query_budget(MENU_ITEMS_MAX_QUERIES, label="GET /menu_items/range"):
+            response = await client.get("/menu_items/range", params={"start": "2026-02-02", "end": "2026-03-31"})
+        assert response.status_code == 200
+        assert len(response.json()["menus"]) == 35
+
+    run_with_app(check)
+
+
+def build_menu_statements(database_url):
+    """Statements build_menu_items runs for the busiest cycle-day, and that day's item count."""
+    engine = create_engine(database_url)
+    profile_engine(engine)
+    try:
+        with Session(engine) as db:
+            day_id, items = db.execute(
+                select(MenuAvailability.day_id, func.count())
+                .group_by(MenuAvailability.day_id)
+                .order_by(func.count().desc())
+                .limit(1)
+            ).one()
+            with query_budget(label="build_menu_items") as profile:
+                menu = queries.build_menu_items(db, day_id, None, None)
+            assert len(menu) == items
+            return profile.count, items
+    finally:
+        engine.dispose()
+
+
+def test_build_menu_items_query_count_does_not_grow_with_items():
+    small = build_menu_statements(DATABASE_URL)
+    large = build_menu_statements(seeded_database("menu-10x.db", items=10))
+    assert large[1] >= 10 * small[1]
+    assert small[0] == large[0] <= MENU_ITEMS_MAX_QUERIES - 1
@@ -0,0 +1,20 @@
+from sqlalchemy import create_engine, inspect
+
+from backend.db import migrate
+from backend.db.models import Base
+
+
+def test_migrations_build_the_current_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'migrated.db'}")
+    try:
+        assert migrate.upgrade(engine) == [version for version, _ in migrate.load_migrations()]
+        assert migrate.upgrade(engine) == []
+
+        inspector = inspect(engine)
+        for table in Base.metadata.sorted_tables:
+            columns = {column["name"] for column in inspector.get_columns(table.name)}
+            indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+            assert columns == {column.name for column in table.columns}, table.name
+            assert {index.name for index in table.indexes} <= indexes, table.name
+    finally:
+        engine.dispose()
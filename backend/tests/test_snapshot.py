@@ -0,0 +1,84 @@
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import Session
+
+from backend import main
+from backend.cache import menu_cache
+from backend.snapshot import SectionResponse, SnapshotStore, collect_sections, write_snapshot
+
+from .conftest import DATABASE_URL, MENU_DATE, run_with_app, seeded_database
+
+
+def collect(url=DATABASE_URL):
+    engine = create_engine(url)
+    try:
+        with Session(engine) as db:
+            return collect_sections(db)
+    finally:
+        engine.dispose()
+
+@pytest.fixture
+def snapshot_path(tmp_path):
+    generation, sections = collect()
+    path = str(tmp_path / "menu.snapshot")
+    write_snapshot(path, generation, sections)
+    return path
+
+def fetch(paths):
+    async def check(client):
+        responses = {path: await client.get(path) for path in paths}
+        health = (await client.get("/health")).json()
+        return responses, health
+
+    return run_with_app(check)
+
+
+PATHS = [f"/menu_items?date={MENU_DATE}", "/locations", "/allergens"]
+
+
+def test_serves_sections_from_the_snapshot(snapshot_path, monkeypatch):
+    from_database, _ = fetch(PATHS)
+    menu_cache.clear()
+
+    store = SnapshotStore(snapshot_path, check_interval=60)
+    monkeypatch.setattr(main, "snapshot_store", store)
+    from_snapshot, health = fetch(PATHS)
+
+    for path in PATHS:
+        assert from_snapshot[path].status_code == 200
+        assert from_snapshot[path].content == from_database[path].content, path
+        assert from_snapshot[path].headers["etag"] == from_database[path].headers["etag"], path
+    assert health["snapshot"]["generation"] == store.current().generation
+    # Unfiltered menus aren't copied into the worker's menu cache
+    assert health["menu_cache"]["entries"] == 0
+
+    response = store.current().response("locations")
+    assert isinstance(response, SectionResponse)
+    assert isinstance(response.body, memoryview)
+    assert len(response) == len(response.data)
+
+
+def test_switches_to_a_rewritten_snapshot(snapshot_path):
+    store = SnapshotStore(snapshot_path, check_interval=0)
+    first = store.current()
+
+    generation, sections = collect()
+    write_snapshot(snapshot_path, generation + 1, sections)
+
+    assert store.current().generation == first.generation + 1
+    assert store.stats()["swaps"] == 1
+
+
+def test_writes_a_snapshot_with_an_empty_reference_table(tmp_path):
+    url = seeded_database("menu-no-allergens.db")
+    engine = create_engine(url)
+    try:
+        with engine.begin() as connection:
+            connection.execute(text("DELETE FROM menu_item_allergen"))
+            connection.execute(text("DELETE FROM allergen"))
+    finally:
+        engine.dispose()
+
+    generation, sections = collect(url)
+    assert sections["allergens"] == []
+    write_snapshot(str(tmp_path / "menu.snapshot"), generation, sections)
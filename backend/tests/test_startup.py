@@ -0,0 +1,134 @@
+import json
+import os
+import subprocess
+import sys
+
+from sqlalchemy import create_engine, insert
+
+from backend.benchmarks.seed import build_rows, load_menu
+from backend.db import migrate
+from backend.db.migrations import v0001_baseline
+from backend.db.models import DataGeneration
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Imports the app with no DATABASE_URL, runs its lifespan and reports /ready
+# once the first warmup attempt has failed
+READY_WITHOUT_DATABASE = """
+import asyncio, json
+import httpx
+from backend.main import app, startup_state
+
+async def run():
+    async with app.router.lifespan_context(app):
+        while not startup_state["attempts"] or startup_state["last_error"] is None:
+            await asyncio.sleep(0.01)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/ready")
+            print(json.dumps({**response.json(), "status_code": response.status_code}))
+
+asyncio.run(run())
+"""
+
+# Runs the app's lifespan until warmup has found the schema unmigrated and
+# reports /ready and /locations
+READY_WITHOUT_MIGRATIONS = """
+import asyncio, json
+import httpx
+from backend.main import app, startup_state
+
+async def run():
+    async with app.router.lifespan_context(app):
+        while startup_state["migration_required"] is None:
+            await asyncio.sleep(0.01)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            ready = await client.get("/ready")
+            locations = await client.get("/locations")
+            print(json.dumps({
+                "ready": {**ready.json(), "status_code": ready.status_code},
+                "locations": {**locations.json(), "status_code": locations.status_code},
+            }))
+
+asyncio.run(run())
+"""
+
+# Runs the app's lifespan until warmup is done and reports /ready and /locations
+READY_AFTER_WARMUP = """
+import asyncio, json
+import httpx
+from backend.main import app
+
+async def run():
+    async with app.router.lifespan_context(app):
+        await asyncio.wait_for(app.state.ready_event.wait(), 30)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            ready = await client.get("/ready")
+            locations = await client.get("/locations")
+            print(json.dumps({"ready": ready.status_code, "locations": locations.status_code, "rows": len(locations.json())}))
+
+asyncio.run(run())
+"""
+
+
+def test_missing_database_url_shows_up_through_ready():
+    env = {name: value for name, value in os.environ.items() if name != "DATABASE_URL"}
+    result = subprocess.run(
+        [sys.executable, "-c", READY_WITHOUT_DATABASE],
+        capture_output=True, text=True, cwd=REPO_ROOT, env=env, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    ready = json.loads(result.stdout.strip().splitlines()[-1])
+    assert ready["status_code"] == 503
+    assert ready["ready"] is False
+    assert "DATABASE_URL" in ready["last_error"]
+
+
+def baseline_database(path):
+    """A database holding the tables the backend created on import before migrations, with data."""
+    database_url = f"sqlite:///{path}"
+    engine = create_engine(database_url)
+    try:
+        with engine.begin() as connection:
+            for model, rows in build_rows(load_menu()).items():
+                if model is DataGeneration:
+                    continue
+                table = v0001_baseline.metadata.tables[model.__tablename__]
+                table.create(connection)
+                if rows:
+                    connection.execute(insert(table), rows)
+    finally:
+        engine.dispose()
+    return database_url
+
+def run_app(script, database_url):
+    result = subprocess.run(
+        [sys.executable, "-c", script],
+        capture_output=True, text=True, cwd=REPO_ROOT, env={**os.environ, "DATABASE_URL": database_url}, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def test_migrating_a_baseline_database_makes_the_app_ready(tmp_path):
+    database_url = baseline_database(tmp_path / "baseline.db")
+    engine = create_engine(database_url)
+    try:
+        assert migrate.upgrade(engine) == [version for version, _ in migrate.load_migrations()]
+    finally:
+        engine.dispose()
+
+    status = run_app(READY_AFTER_WARMUP, database_url)
+    assert status["ready"] == 200
+    assert status["locations"] == 200
+    assert status["rows"] > 0
+
+def test_unmigrated_database_reports_migration_required(tmp_path):
+    status = run_app(READY_WITHOUT_MIGRATIONS, baseline_database(tmp_path / "baseline.db"))
+    assert status["ready"]["status"] == "migration_required"
+    assert status["ready"]["status_code"] == 503
+    assert "python -m backend.db.migrate" in status["ready"]["migration_required"]
+    assert status["locations"]["status_code"] == 503
+    assert status["locations"]["detail"] == status["ready"]["migration_required"]
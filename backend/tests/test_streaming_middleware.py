@@ -0,0 +1,55 @@
+import asyncio
+import logging
+
+from backend.metrics import MetricsMiddleware, request_latency, requests_in_flight, requests_total
+from backend.request_log import RequestSummaryMiddleware
+
+
+# requests_in_flight while the stream was open
+in_flight_during = []
+
+
+async def streaming_app(scope, receive, send):
+    """Stands in for /events: starts the response and streams a little before closing."""
+    in_flight_during.append(requests_in_flight._values.get((), 0))
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"event: hello\n\n", "more_body": True})
+    await send({"type": "http.response.body", "body": b""})
+
+
+def serve(app, path):
+    scope = {"type": "http", "method": "GET", "path": path, "headers": []}
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def test_metrics_count_a_stream_once_and_keep_it_out_of_latency():
+    in_flight_before = requests_in_flight._values.get((), 0)
+    total_before = requests_total._values.get(("GET", "unmatched", "200"), 0)
+
+    sent = serve(MetricsMiddleware(streaming_app), "/events")
+
+    assert len(sent) == 3
+    assert requests_total._values.get(("GET", "unmatched", "200"), 0) == total_before + 1
+    assert in_flight_during[-1] == in_flight_before
+    assert requests_in_flight._values.get((), 0) == in_flight_before
+    assert not [labels for labels in request_latency._series if labels[1] in ("/events", "unmatched")]
+
+
+def test_request_log_records_stream_open_and_close(caplog):
+    with caplog.at_level(logging.INFO, logger="backend.request"):
+        serve(RequestSummaryMiddleware(streaming_app), "/events")
+
+    summaries = [record.summary for record in caplog.records if hasattr(record, "summary")]
+    assert [summary["stream"] for summary in summaries] == ["open", "closed"]
+    assert all(summary["status"] == 200 for summary in summaries)
+    assert "duration_ms" not in summaries[1]
+    assert summaries[1]["connected_s"] >= 0
@@ -1,4 +1,6 @@
-from datetime import datetime, time
+from datetime import datetime, time, timedelta
+import json
+import os
 from sqlalchemy.orm import Session
 from models import Allergen, MenuAvailability, AlwaysAvailable, Cycle, Day, MenuItem, Location, MealType, MenuAvailability, MenuItem, MenuItemAllergen
 from models import SessionLocal
@@ -10,6 +12,29 @@ def get_session():
     finally:
         session.close()
 
+DINING_HOURS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend", "data", "dining_hours.json")
+DAY_NAMES = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+def load_dining_hours(path=DINING_HOURS_FILE):
+    """
+    Read the shared dining hours as {location: {day name: {meal: (start, end)}}},
+    expanding ranges like "Monday-Friday" into one entry per day.
+    """
+    with open(path) as f:
+        hours = json.load(f)
+    dining_hours = {}
+    for location, by_days in hours["locations"].items():
+        days = dining_hours.setdefault(location, {})
+        for day_spec, meals in by_days.items():
+            first, _, last = day_spec.partition("-")
+            start, end = DAY_NAMES.index(first), DAY_NAMES.index(last or first)
+            for day_name in DAY_NAMES[start:end + 1]:
+                days[day_name] = {
+                    meal: (time.fromisoformat(opens), time.fromisoformat(closes))
+                    for meal, (opens, closes) in meals.items()
+                }
+    return dining_hours
+
 # 1. Query today's menu for all locations or a specific location
 def get_today_menu(location_name=None):
     # Get today's date and time
@@ -17,73 +42,13 @@ def get_today_menu(location_name=None):
     day_name = today.strftime("%A")
     current_time = today.time()
 
-    # Define dining hours
-    dining_hours = {
-        "Parkside": {
-            "Monday-Friday": {
-                "Breakfast": (time(7, 0), time(10, 0)),
-                "Lunch": (time(11, 0), time(14, 30)),
-                "Dinner": (time(16, 0), time(20, 30)),
-                # "210 Block Plan": (time(7, 0), time(20, 30)),
-            },
-            "Saturday": {
-                "Brunch": (time(9, 30), time(13, 30)),
-                "Dinner": (time(16, 0), time(19, 30)),
-                "210 Block Plan": (time(9, 30), time(19, 30)),
-            },
-            "Sunday": {
-                "Brunch": (time(9, 30), time(13, 30)),
-                "Dinner": (time(16, 0), time(19, 30)),
-                # "210 Block Plan": (time(9, 30), time(19, 30)),
-            },
-        },
-        "Hillside": {
-            "Monday-Friday": {
-                "Breakfast": (time(7, 0), time(10, 0)),
-                "Lunch": (time(11, 0), time(14, 30)),
-                "Dinner": (time(16, 0), time(20, 30)),
-                # "210 Block Plan": (time(7, 0), time(20, 30)),
-            },
-            "Saturday": {
-                "Brunch": (time(9, 30), time(13, 30)),
-                "Dinner": (time(16, 0), time(19, 30)),
-                # "210 Block Plan": (time(9, 30), time(19, 30)),
-            },
-            "Sunday": {
-                "Brunch": (time(9, 30), time(13, 30)),
-                "Dinner": (time(16, 0), time(19, 30)),
-                # "210 Block Plan": (time(9, 30), time(19, 30)),
-            },
-        },
-        "Beachside": {
-            "Monday-Friday": {
-                "Breakfast": (time(6, 30), time(9, 0)),
-                "Lunch": (time(11, 0), time(13, 30)),
-                "Dinner": (time(17, 0), time(20, 30)),
-                # "210 Block Plan": (time(6, 30), time(20, 30)),
-            },
-            "Saturday-Sunday": {
-                "Brunch": (time(11, 0), time(13, 30)),
-                "Dinner": (time(17, 0), time(19, 30)),
-                # "210 Block Plan": (time(11, 0), time(19, 30)),
-            },
-        },
-    }
-
-    # Determine which meal type to query based on current time
+    # Dining hours for the day, from the schedule shared with the backend
     meal_type = None
-    location_schedule = dining_hours.get(location_name, dining_hours["Parkside"])
-    
-    if day_name in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday"]:
-        schedule = location_schedule["Monday-Friday"]
-    elif day_name == "Saturday":
-        schedule = location_schedule["Saturday"]
-    else:  # Sunday
-        schedule = location_schedule["Sunday"]
+    dining_hours = load_dining_hours()
+    schedule = dining_hours.get(location_name, dining_hours["Parkside"]).get(day_name, {})
 
     # Check current time against dining hours to find the meal type
-    for meal, hours in schedule.items():
-        start, end = hours
+    for meal, (start, end) in schedule.items():
         if start <= current_time <= end:
             meal_type = meal
             break
@@ -176,13 +141,27 @@ def get_allergens_for_item(item_name):
         allergens = session.query(MenuItemAllergen).join(MenuItem).filter(MenuItem.item_name == item_name).all()
         return allergens
 
-# 5. Query weekly menu
-def get_weekly_menu():
+# 5. Query the menu for the week containing date (default today), from that week's cycle
+def get_weekly_menu(date=None):
+    date = date or datetime.today().date()
+    menu_by_day = {day_name: [] for day_name in DAY_NAMES}
     with SessionLocal() as session:
-        menu_by_day = {}
-        for day_name in ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]:
-            daily_menu = session.query(MenuAvailability).join(Day).filter(Day.day_name == day_name).all()
-            menu_by_day[day_name] = daily_menu
+        week = session.query(Cycle).filter(
+            Cycle.start_date <= date,
+            Cycle.start_date > date - timedelta(days=7)
+        ).order_by(Cycle.start_date.desc()).first()
+        if not week:
+            return menu_by_day
+
+        # Menus hang off the first cycle row with the week's identifier
+        cycle = session.query(Cycle).filter(
+            Cycle.cycle_identifier == week.cycle_identifier
+        ).order_by(Cycle.cycle_id).first()
+        rows = session.query(Day.day_name, MenuAvailability).join(
+            MenuAvailability, MenuAvailability.day_id == Day.day_id
+        ).filter(Day.cycle_id == cycle.cycle_id).all()
+        for day_name, availability in rows:
+            menu_by_day.setdefault(day_name, []).append(availability)
         return menu_by_day
 
 # 6. Query items available for a specific meal type (e.g., breakfast)
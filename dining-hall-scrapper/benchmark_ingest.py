@@ -0,0 +1,98 @@
+"""
+Timing comparison of parse_json.py's row-by-row and --bulk modes on the
+checked-in dining_menu.json.
+
+    python benchmark_ingest.py --rounds 3 --rtt-ms 30
+
+Each round empties the menu tables, runs parse_json.py in each mode and
+records its wall time, the statements it sent and the rows it left behind.
+A local database hides network latency, so every record also carries the
+time the same run would take with --rtt-ms of round trip per statement, as
+against a hosted database. Connects the way parse_json.py does, and
+TRUNCATEs the menu tables: only point it at a scratch database.
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from parse_json import connect
+
+MENU_TABLES = [
+    "menu_item_allergen", "menu_availability", "always_available", "menu_item",
+    "allergen", "day", "cycle", "location", "meal_type",
+]
+FINISHED = re.compile(r"Ingestion finished: (\d+) statements in ([\d.]+)s")
+BUSIEST = re.compile(r"Busiest connection path: (\d+) statements")
+MODES = {"row": ["--restart"], "bulk": ["--bulk", "--restart"]}
+
+
+def reset(conn):
+    with conn.cursor() as cur:
+        cur.execute(f"TRUNCATE TABLE {', '.join(MENU_TABLES)} RESTART IDENTITY CASCADE")
+    conn.commit()
+
+def row_counts(conn):
+    with conn.cursor() as cur:
+        counts = {}
+        for table in ("menu_item", "always_available", "menu_availability", "menu_item_allergen"):
+            cur.execute(f"SELECT COUNT(*) FROM {table}")
+            counts[table] = cur.fetchone()[0]
+    conn.commit()
+    return counts
+
+def run_parse_json(flags, env=None):
+    """(process wall time, statements, ingest seconds, statements on the busiest connection)."""
+    # Never rewrite a snapshot the backend serves with the scratch data, nor time it
+    env = {**(env or os.environ), "SNAPSHOT_FILE": ""}
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "parse_json.py", *flags],
+        capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__)), env=env
+    )
+    wall = time.perf_counter() - started
+    if result.returncode != 0:
+        raise RuntimeError(f"parse_json.py {' '.join(flags)} failed:\n{result.stderr[-2000:]}")
+    match = FINISHED.search(result.stderr)
+    busiest = BUSIEST.search(result.stderr)
+    statements = int(match.group(1))
+    return wall, statements, float(match.group(2)), int(busiest.group(1)) if busiest else statements
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare row-by-row and bulk ingestion.")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="Round trip to project a hosted database with")
+    args = parser.parse_args()
+
+    conn = connect()
+    try:
+        results = {mode: [] for mode in MODES}
+        counts = {}
+        for _ in range(args.rounds):
+            for mode, flags in MODES.items():
+                reset(conn)
+                results[mode].append(run_parse_json(flags))
+                counts[mode] = row_counts(conn)
+    finally:
+        conn.close()
+
+    for mode, runs in results.items():
+        statements = runs[0][1]
+        ingest = sorted(seconds for _, _, seconds, _ in runs)[len(runs) // 2]
+        print(json.dumps({
+            "mode": mode,
+            "rounds": args.rounds,
+            "statements": statements,
+            "ingest_s": round(ingest, 3),
+            "process_s": round(sorted(wall for wall, _, _, _ in runs)[len(runs) // 2], 3),
+            f"projected_s_at_{args.rtt_ms:g}ms_rtt": round(ingest + statements * args.rtt_ms / 1000, 2),
+            "rows": counts[mode],
+        }), flush=True)
+    if counts["row"] != counts["bulk"]:
+        sys.exit(f"Row counts differ between modes: {counts}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Wall time of parse_json.py --workers against worker count, on a synthetic
+menu --scale times the size of dining_menu.json, with a round trip injected
+between parse_json.py and the database.
+
+    python benchmark_workers.py --scale 10 --workers 1,2,4,8 --rounds 3 --rtt-ms 30
+
+The synthetic menu repeats every Daily Menus cycle under new cycle
+identifiers (with matching Cycle Dates weeks) and the same item names, so the
+extra cycles all share their Menu_Item rows, the case parallel workers must
+not race on. A local database hides the round trips that parallelism saves
+against a hosted one, so parse_json.py connects through a LatencyProxy (see
+latency_proxy.py) adding --rtt-ms to every round trip; --rtt-ms 0 connects
+directly. Each round empties the menu tables and runs parse_json.py once per
+worker count, and the records carry the ingest time and speedup measured that
+way. The run exits with an error if the loaded menus differ between worker
+counts. Like benchmark_ingest.py it TRUNCATEs the menu tables: only point it
+at a scratch database.
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import tempfile
+
+from psycopg2.extensions import make_dsn
+
+from benchmark_ingest import reset, row_counts, run_parse_json
+from latency_proxy import LatencyProxy
+from parse_json import connect, load_menu
+
+# Every menu slot with its item and allergens, by name; ids of the cycle-days
+# are assigned before the workers start, so they are stable between runs
+FINGERPRINT_QUERY = """
+    SELECT md5(string_agg(slot, E'\\n' ORDER BY slot)) FROM (
+        SELECT concat_ws('|', a.day_id, mt.meal_type_name, l.location_name, i.item_name,
+                         string_agg(al.allergen_code, ',' ORDER BY al.allergen_code)) AS slot
+        FROM Menu_Availability a
+        JOIN Menu_Item i ON i.item_id = a.item_id
+        JOIN Meal_Type mt ON mt.meal_type_id = a.meal_type_id
+        JOIN Location l ON l.location_id = a.location_id
+        LEFT JOIN Menu_Item_Allergen x ON x.availability_id = a.availability_id
+        LEFT JOIN Allergen al ON al.allergen_id = x.allergen_id
+        GROUP BY a.availability_id, a.day_id, mt.meal_type_name, l.location_name, i.item_name
+    ) slots
+"""
+
+
+def synthetic_menu(data, scale):
+    """data with scale - 1 extra copies of every cycle, as cycles '<n>.<copy>'."""
+    data = copy.deepcopy(data)
+    for weeks in data["Cycle Dates"].values():
+        weeks.extend([
+            {**week, "menu_cycle": f"{week['menu_cycle']}.{n}"}
+            for n in range(1, scale) for week in weeks
+        ])
+    daily_menus = data["Daily Menus"]
+    for cycle, days_menu in list(daily_menus.items()):
+        words = cycle.split()
+        for n in range(1, scale):
+            daily_menus[" ".join([words[0], f"{words[1]}.{n}", *words[2:]])] = copy.deepcopy(days_menu)
+    return data
+
+def proxied_env(port):
+    """The environment for parse_json.py, with its database address pointed at the proxy on port."""
+    env = dict(os.environ)
+    if env.get("DATABASE_URL"):
+        env["DATABASE_URL"] = make_dsn(env["DATABASE_URL"], host="127.0.0.1", port=port)
+    else:
+        env.update(DATABASE_HOST="127.0.0.1", DATABASE_PORT=str(port))
+    return env
+
+def menu_fingerprint(conn):
+    with conn.cursor() as cur:
+        cur.execute(FINGERPRINT_QUERY)
+        fingerprint = cur.fetchone()[0]
+    conn.commit()
+    return fingerprint
+
+def main():
+    parser = argparse.ArgumentParser(description="Time parallel ingestion against worker count.")
+    parser.add_argument("--scale", type=int, default=10, help="Copies of dining_menu.json's cycles to load")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma separated worker counts")
+    parser.add_argument("--bulk", action="store_true", help="Time the --bulk loader instead of row by row")
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--rtt-ms", type=float, default=30.0, help="Round trip to add to parse_json.py's connections (0 for none)")
+    args = parser.parse_args()
+    worker_counts = [int(workers) for workers in args.workers.split(",")]
+
+    data = synthetic_menu(load_menu(), args.scale)
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(data, f)
+    conn = connect()
+    proxy = LatencyProxy(conn.info.host, conn.info.port, args.rtt_ms).start() if args.rtt_ms else None
+    env = proxied_env(proxy.port) if proxy else None
+    try:
+        results = {workers: [] for workers in worker_counts}
+        loaded = {}
+        for _ in range(args.rounds):
+            for workers in worker_counts:
+                reset(conn)
+                flags = ["--file", f.name, "--restart", "--workers", str(workers)]
+                results[workers].append(run_parse_json(flags + (["--bulk"] if args.bulk else []), env))
+                loaded[workers] = (row_counts(conn), menu_fingerprint(conn))
+    finally:
+        if proxy:
+            proxy.stop()
+        conn.close()
+        os.unlink(f.name)
+
+    serial = None
+    for workers, runs in results.items():
+        ingest = sorted(seconds for _, _, seconds, _ in runs)[len(runs) // 2]
+        wall = sorted(wall for wall, _, _, _ in runs)[len(runs) // 2]
+        serial = serial or ingest
+        print(json.dumps({
+            "workers": workers,
+            "mode": "bulk" if args.bulk else "row",
+            "scale": args.scale,
+            "cycles": len(data["Daily Menus"]),
+            "rounds": args.rounds,
+            "rtt_ms": args.rtt_ms,
+            "statements": runs[0][1],
+            "busiest_connection_statements": runs[0][3],
+            "ingest_s": round(ingest, 3),
+            "wall_s": round(wall, 3),
+            "speedup": round(serial / ingest, 2),
+            "rows": loaded[workers][0],
+        }), flush=True)
+    if len({json.dumps(menus, sort_keys=True) for menus in loaded.values()}) > 1:
+        sys.exit(f"Loaded menus differ between worker counts: {loaded}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Set-based loading of the menu sections of dining_menu.json.
+
+parse_json.py inserts the Always Available and Daily Menus sections one row
+at a time: a lookup and an insert per item, per availability and per allergen,
+around 10,000 statements for a term of menus. Against a remote database each
+is a network round trip. With --bulk it calls these functions instead, which
+flatten the JSON in Python, stream it into temporary staging tables with COPY
+and merge it with a handful of INSERT ... SELECT statements, so the statement
+count no longer grows with the size of the menu.
+
+The merge keeps the row-by-row semantics: existing rows are left alone
+(ON CONFLICT DO NOTHING), allergens are only attached to availabilities this
+run created, and rows whose cycle, day, meal type or location is unknown are
+logged and skipped.
+"""
+import csv
+import io
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def copy_rows(cur, table, columns, rows):
+    """Stream rows into table with a single COPY."""
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+
+def flatten_daily_menus(daily_menus):
+    """One (cycle_identifier, day, meal type, location, item, allergen codes) row per menu entry."""
+    for cycle, days in daily_menus.items():
+        cycle_identifier = cycle.split()[1]
+        for day, meals in days.items():
+            for meal_type, locations in meals.items():
+                for location, items in locations.items():
+                    for item_name, allergen_codes in items.items():
+                        yield (cycle_identifier, day, meal_type, location, item_name, ",".join(allergen_codes))
+
+def load_always_available(cur, always_available):
+    """Insert the Always Available section; returns the number of staged rows."""
+    rows = [(meal_type, item_name) for meal_type, items in always_available.items() for item_name in items]
+    cur.execute(
+        "CREATE TEMP TABLE staging_always_available (meal_type_name TEXT, item_name TEXT) ON COMMIT DROP"
+    )
+    copy_rows(cur, "staging_always_available", ["meal_type_name", "item_name"], rows)
+    cur.execute(
+        """
+        INSERT INTO Menu_Item (item_name)
+        SELECT DISTINCT item_name FROM staging_always_available
+        ON CONFLICT (item_name) DO NOTHING
+        """
+    )
+    cur.execute(
+        """
+        INSERT INTO Always_Available (meal_type_id, item_id)
+        SELECT DISTINCT mt.meal_type_id, mi.item_id
+        FROM staging_always_available s
+        JOIN Meal_Type mt ON mt.meal_type_name = s.meal_type_name
+        JOIN Menu_Item mi ON mi.item_name = s.item_name
+        ON CONFLICT DO NOTHING
+        """
+    )
+    return len(rows)
+
+def load_daily_menus(cur, daily_menus):
+    """
+    Insert the Daily Menus section. Returns (rows staged, day_ids that gained
+    menu rows).
+    """
+    rows = list(flatten_daily_menus(daily_menus))
+    cur.execute(
+        """
+        CREATE TEMP TABLE staging_menu (
+            cycle_identifier TEXT,
+            day_name TEXT,
+            meal_type_name TEXT,
+            location_name TEXT,
+            item_name TEXT,
+            allergen_codes TEXT
+        ) ON COMMIT DROP
+        """
+    )
+    copy_rows(
+        cur, "staging_menu",
+        ["cycle_identifier", "day_name", "meal_type_name", "location_name", "item_name", "allergen_codes"],
+        rows,
+    )
+
+    # Resolve names to ids once for every row. Like the row-by-row path, a
+    # cycle identifier maps to its first Cycle row.
+    cur.execute(
+        """
+        CREATE TEMP TABLE staging_slot ON COMMIT DROP AS
+        SELECT s.cycle_identifier, s.day_name, s.meal_type_name, s.location_name,
+               d.day_id, mt.meal_type_id, l.location_id, s.item_name, s.allergen_codes
+        FROM staging_menu s
+        LEFT JOIN (
+            SELECT cycle_identifier, MIN(cycle_id) AS cycle_id FROM Cycle GROUP BY cycle_identifier
+        ) c ON c.cycle_identifier = s.cycle_identifier
+        LEFT JOIN Day d ON d.cycle_id = c.cycle_id AND d.day_name = s.day_name
+        LEFT JOIN Meal_Type mt ON mt.meal_type_name = s.meal_type_name
+        LEFT JOIN Location l ON l.location_name = s.location_name
+        """
+    )
+    cur.execute(
+        """
+        DELETE FROM staging_slot
+        WHERE day_id IS NULL OR meal_type_id IS NULL OR location_id IS NULL
+        RETURNING cycle_identifier, day_name, meal_type_name, location_name
+        """
+    )
+    for cycle_identifier, day, meal_type, location in sorted(set(cur.fetchall())):
+        logger.error(f"Skipping menu for unknown cycle/day/meal type/location: {cycle_identifier}/{day}/{meal_type}/{location}")
+
+    cur.execute(
+        """
+        INSERT INTO Menu_Item (item_name)
+        SELECT DISTINCT item_name FROM staging_slot
+        ON CONFLICT (item_name) DO NOTHING
+        """
+    )
+    # Allergens are attached only to the availabilities inserted here, as
+    # the row-by-row path does
+    cur.execute(
+        """
+        WITH inserted AS (
+            INSERT INTO Menu_Availability (day_id, meal_type_id, location_id, item_id)
+            SELECT s.day_id, s.meal_type_id, s.location_id, mi.item_id
+            FROM staging_slot s
+            JOIN Menu_Item mi ON mi.item_name = s.item_name
+            ON CONFLICT (day_id, meal_type_id, location_id, item_id) DO NOTHING
+            RETURNING availability_id, day_id, meal_type_id, location_id, item_id
+        ), allergens AS (
+            INSERT INTO Menu_Item_Allergen (availability_id, allergen_id)
+            SELECT DISTINCT i.availability_id, a.allergen_id
+            FROM inserted i
+            JOIN Menu_Item mi ON mi.item_id = i.item_id
+            JOIN staging_slot s
+              ON s.day_id = i.day_id AND s.meal_type_id = i.meal_type_id
+             AND s.location_id = i.location_id AND s.item_name = mi.item_name
+            CROSS JOIN LATERAL unnest(string_to_array(s.allergen_codes, ',')) AS code(allergen_code)
+            JOIN Allergen a ON a.allergen_code = code.allergen_code
+            ON CONFLICT DO NOTHING
+        )
+        SELECT DISTINCT day_id FROM inserted
+        """
+    )
+    changed_day_ids = {day_id for day_id, in cur.fetchall()}
+    return len(rows), changed_day_ids
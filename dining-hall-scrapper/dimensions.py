@@ -0,0 +1,64 @@
+from psycopg2.extras import execute_values
+
+
+class DimensionKeys:
+    """
+    The ids of a small lookup table (Meal_Type, Location, Day, Allergen, ...)
+    keyed by their natural key, loaded with one SELECT. parse_json.py resolves
+    names against these in memory instead of querying once per row.
+
+    The key is the first len(key_columns) insert columns: a single value for
+    one-column keys, a tuple otherwise.
+    """
+
+    def __init__(self, cur, table, id_column, key_columns):
+        self.table = table
+        self.id_column = id_column
+        self.key_columns = list(key_columns)
+        cur.execute(f"SELECT {id_column}, {', '.join(self.key_columns)} FROM {table} ORDER BY {id_column}")
+        self.ids = {}
+        for row in cur.fetchall():
+            # Same key can occur more than once (Cycle has no unique key); keep
+            # the lowest id, the row bulk_load's MIN(cycle_id) resolves to
+            self.ids.setdefault(self._key(row[1:]), row[0])
+
+    def _key(self, values):
+        return values[0] if len(self.key_columns) == 1 else tuple(values[:len(self.key_columns)])
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, key):
+        return key in self.ids
+
+    def __getitem__(self, key):
+        return self.ids[key]
+
+    def get(self, key, default=None):
+        return self.ids.get(key, default)
+
+    def ensure(self, cur, rows, columns=None):
+        """
+        Insert the rows whose key is not loaded yet, all in one statement, and
+        add their ids. rows are tuples of columns (key columns first, default
+        key_columns). Returns the number of rows inserted.
+        """
+        columns = list(columns or self.key_columns)
+        missing = {}
+        for row in rows:
+            key = self._key(row)
+            if key not in self.ids:
+                missing.setdefault(key, tuple(row))
+        if not missing:
+            return 0
+        inserted = execute_values(
+            cur,
+            f"INSERT INTO {self.table} ({', '.join(columns)}) VALUES %s "
+            f"RETURNING {self.id_column}, {', '.join(self.key_columns)}",
+            list(missing.values()),
+            page_size=len(missing),
+            fetch=True,
+        )
+        for row in inserted:
+            self.ids[self._key(row[1:])] = row[0]
+        return len(inserted)
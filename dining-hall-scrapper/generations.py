@@ -0,0 +1,169 @@
+"""
+Menu generations: a complete copy of the menu tables in their own schema
+(menu_gen_<n>), so an ingestion run never writes into the tables the backend
+is reading.
+
+parse_json.py --new-generation copies the live generation (or public, before
+the first one) into a new schema, loads the file into it through search_path,
+and makes it live in one short transaction that retires the old generation and
+bumps the data generation together. Backends started with MENU_GENERATIONS=1
+pin the live schema at the start of every transaction while holding a share
+lock on Menu_Generation (backend/db/generations.py), and the swap takes that
+table's exclusive lock. So no request sees the new data generation number with
+the old tables, and once the swap commits nothing still reads the old schema.
+The previous generations beyond --keep-generations are then dropped.
+
+Menu_Generation is created by the backend's migrations (0004). Its status is
+one of:
+    loading   being built; resumed by a rerun of the same file
+    live      what the backend serves (at most one row)
+    retired   replaced, kept for rollback until collected
+    failed    abandoned load, dropped by the next collection
+    dropped   schema removed
+"""
+import logging
+
+from psycopg2 import sql
+
+logger = logging.getLogger(__name__)
+
+# Tables copied into each generation, parents before children
+MENU_TABLES = [
+    "cycle", "day", "meal_type", "location", "allergen", "menu_item",
+    "always_available", "menu_availability", "menu_item_allergen",
+]
+# How long the swap waits for in-flight backend transactions before giving up;
+# rerunning the same file resumes the loaded generation and retries the swap
+SWAP_LOCK_TIMEOUT = "5s"
+
+
+def live_schema(cur):
+    """The schema the backend reads: the live generation's, or public before the first one."""
+    cur.execute("SELECT schema_name FROM Menu_Generation WHERE status = 'live'")
+    row = cur.fetchone()
+    return row[0] if row else "public"
+
+def copy_tables(cur, source, target):
+    """
+    Create target as a copy of the menu tables in source: columns, defaults
+    (so ids keep coming from the same sequences), indexes, constraints and
+    rows, then the foreign keys between them.
+    """
+    cur.execute(sql.SQL("CREATE SCHEMA {}").format(sql.Identifier(target)))
+    for table in MENU_TABLES:
+        cur.execute(sql.SQL("CREATE TABLE {target}.{table} (LIKE {source}.{table} INCLUDING ALL)").format(
+            target=sql.Identifier(target), source=sql.Identifier(source), table=sql.Identifier(table)
+        ))
+        cur.execute(sql.SQL("INSERT INTO {target}.{table} SELECT * FROM {source}.{table}").format(
+            target=sql.Identifier(target), source=sql.Identifier(source), table=sql.Identifier(table)
+        ))
+
+    # LIKE leaves out foreign keys. Their definitions name the referenced table
+    # unqualified while source is the search_path, and resolve to target's
+    # copy once target is.
+    cur.execute("SELECT current_setting('search_path')")
+    search_path = cur.fetchone()[0]
+    cur.execute("SELECT set_config('search_path', %s, true)", (sql.Identifier(source).as_string(cur),))
+    cur.execute(
+        """
+        SELECT c.conrelid::regclass::text, c.conname, pg_get_constraintdef(c.oid)
+        FROM pg_constraint c
+        WHERE c.contype = 'f' AND c.connamespace = %s::regnamespace AND c.conrelid::regclass::text = ANY(%s)
+        ORDER BY 1, 2
+        """,
+        (sql.Identifier(source).as_string(cur), MENU_TABLES)
+    )
+    foreign_keys = cur.fetchall()
+    cur.execute("SELECT set_config('search_path', %s, true)", (sql.Identifier(target).as_string(cur),))
+    for table, name, definition in foreign_keys:
+        cur.execute(sql.SQL("ALTER TABLE {} ADD CONSTRAINT {} ").format(sql.Identifier(table), sql.Identifier(name)) + sql.SQL(definition))
+    cur.execute("SELECT set_config('search_path', %s, true)", (search_path,))
+
+def start_generation(cur, checksum, resume=True):
+    """
+    The (generation_id, schema, resumed) to load into: with resume, a
+    generation an interrupted run of the same file left loading; otherwise a
+    fresh copy of the live tables. Other unfinished loads are marked failed.
+    """
+    if resume:
+        cur.execute(
+            """
+            SELECT generation_id, schema_name FROM Menu_Generation
+            WHERE status = 'loading' AND checksum = %s
+            ORDER BY generation_id DESC LIMIT 1
+            """,
+            (checksum,)
+        )
+        row = cur.fetchone()
+        if row:
+            logger.info(f"Resuming menu generation {row[0]} in schema {row[1]}")
+            cur.execute(
+                "UPDATE Menu_Generation SET status = 'failed' WHERE status = 'loading' AND generation_id <> %s",
+                (row[0],)
+            )
+            return row[0], row[1], True
+    cur.execute("UPDATE Menu_Generation SET status = 'failed' WHERE status = 'loading'")
+
+    source = live_schema(cur)
+    cur.execute(
+        """
+        INSERT INTO Menu_Generation (generation_id, schema_name, status, checksum)
+        SELECT id, 'menu_gen_' || id, 'loading', %s
+        FROM nextval(pg_get_serial_sequence('menu_generation', 'generation_id')) AS id
+        RETURNING generation_id, schema_name
+        """,
+        (checksum,)
+    )
+    generation_id, schema = cur.fetchone()
+    copy_tables(cur, source, schema)
+    logger.info(f"Started menu generation {generation_id} in schema {schema}, copied from {source}")
+    return generation_id, schema, False
+
+def use_schema(cur, schema):
+    """Point the session's unqualified table names at schema, ahead of the shared tables in public."""
+    cur.execute(
+        "SELECT set_config('search_path', %s || ', ' || current_setting('search_path'), false)",
+        (sql.Identifier(schema).as_string(cur),)
+    )
+
+def publish_generation(cur, generation_id):
+    """
+    Make a loaded generation live and retire the current one. Runs in the
+    caller's transaction, which should commit right after: the exclusive lock
+    holds new backend transactions back until then.
+    """
+    cur.execute(f"SET LOCAL lock_timeout = '{SWAP_LOCK_TIMEOUT}'")
+    cur.execute("LOCK TABLE Menu_Generation IN ACCESS EXCLUSIVE MODE")
+    cur.execute(
+        "UPDATE Menu_Generation SET status = 'retired', retired_at = now() WHERE status = 'live' RETURNING schema_name"
+    )
+    retired = cur.fetchone()
+    cur.execute(
+        "UPDATE Menu_Generation SET status = 'live', activated_at = now() WHERE generation_id = %s AND status = 'loading'",
+        (generation_id,)
+    )
+    if cur.rowcount != 1:
+        raise RuntimeError(f"Menu generation {generation_id} is no longer loading; another run replaced it")
+    return retired[0] if retired else None
+
+def collect_generations(cur, keep=1):
+    """Drop failed generations and all but the newest keep retired ones. Returns the schemas dropped."""
+    cur.execute(
+        """
+        SELECT schema_name FROM (
+            SELECT schema_name, status,
+                   ROW_NUMBER() OVER (PARTITION BY status ORDER BY generation_id DESC) AS age
+            FROM Menu_Generation
+            WHERE status IN ('retired', 'failed')
+        ) g
+        WHERE status = 'failed' OR age > %s
+        ORDER BY schema_name
+        """,
+        (keep,)
+    )
+    dropped = [row[0] for row in cur.fetchall()]
+    for schema in dropped:
+        cur.execute(sql.SQL("DROP SCHEMA IF EXISTS {} CASCADE").format(sql.Identifier(schema)))
+    if dropped:
+        cur.execute("UPDATE Menu_Generation SET status = 'dropped' WHERE schema_name = ANY(%s)", (dropped,))
+    return dropped
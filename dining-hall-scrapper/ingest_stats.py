@@ -0,0 +1,56 @@
+import time
+
+from psycopg2.extensions import cursor
+
+
+class CountingCursor(cursor):
+    """
+    A psycopg2 cursor that counts the statements it sends. Every execute and
+    COPY is one round trip to the server, so the count is what a remote
+    database (Supabase) makes an ingestion run pay in latency.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.statements = 0
+        self.started = time.perf_counter()
+
+    def execute(self, query, vars=None):
+        self.statements += 1
+        return super().execute(query, vars)
+
+    def executemany(self, query, vars_list):
+        # psycopg2 sends one statement per parameter set
+        vars_list = list(vars_list)
+        self.statements += len(vars_list)
+        return super().executemany(query, vars_list)
+
+    def copy_expert(self, sql, file, size=8192):
+        self.statements += 1
+        return super().copy_expert(sql, file, size)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started
+
+
+class PhaseTimer:
+    """
+    Wall time and statements sent per ingestion phase, for the summary log.
+    start() ends the running phase, so a script can mark phases in sequence.
+    """
+
+    def __init__(self, cur):
+        self.cur = cur
+        self.phases = []
+        self._running = None
+
+    def start(self, name):
+        self.stop()
+        self._running = (name, self.cur.statements, time.perf_counter())
+
+    def stop(self):
+        if self._running is not None:
+            name, statements, started = self._running
+            self.phases.append((name, self.cur.statements - statements, time.perf_counter() - started))
+            self._running = None
+
@@ -0,0 +1,91 @@
+"""
+TCP proxy that adds a fixed delay to everything it forwards, to time
+ingestion against a local database as if it were a hosted one:
+
+    with LatencyProxy("127.0.0.1", 5432, rtt_ms=30) as proxy:
+        ...  # connect to 127.0.0.1:proxy.port
+
+Each chunk is held for half of rtt_ms in each direction, so a statement's
+round trip gains rtt_ms. Chunks are delayed from when they arrive rather than
+one after another, so the proxy adds latency without limiting throughput, like
+`tc qdisc add dev lo root netem delay`. Runs its own event loop in a daemon
+thread.
+"""
+import asyncio
+import threading
+import time
+
+
+class LatencyProxy:
+    def __init__(self, upstream_host, upstream_port, rtt_ms, host="127.0.0.1", port=0):
+        self.upstream_host = upstream_host
+        self.upstream_port = upstream_port
+        self.delay = rtt_ms / 2000
+        self.host = host
+        self.port = port
+        self.connections = 0
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    async def _forward(self, reader, writer):
+        """Copy reader to writer, each chunk written self.delay seconds after it was read."""
+        chunks = asyncio.Queue()
+
+        async def send():
+            while True:
+                due, chunk = await chunks.get()
+                await asyncio.sleep(due - time.monotonic())
+                if not chunk:
+                    break
+                writer.write(chunk)
+                await writer.drain()
+
+        sender = asyncio.create_task(send())
+        try:
+            while True:
+                chunk = await reader.read(65536)
+                chunks.put_nowait((time.monotonic() + self.delay, chunk))
+                if not chunk:
+                    break
+            await sender
+        except (ConnectionError, asyncio.CancelledError):
+            sender.cancel()
+        finally:
+            writer.close()
+
+    async def _handle(self, client_reader, client_writer):
+        self.connections += 1
+        try:
+            upstream_reader, upstream_writer = await asyncio.open_connection(self.upstream_host, self.upstream_port)
+        except OSError:
+            client_writer.close()
+            return
+        await asyncio.gather(
+            self._forward(client_reader, upstream_writer),
+            self._forward(upstream_reader, client_writer),
+            return_exceptions=True,
+        )
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        self._server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        async def close():
+            self._server.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(close(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
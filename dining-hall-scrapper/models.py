@@ -3,7 +3,7 @@ from dotenv import load_dotenv
 from sqlalchemy import create_engine
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy import Column, Integer, String, Date, CHAR, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, CHAR, ForeignKey, Index
 from sqlalchemy.orm import relationship
 
 # Load environment variables from the .env file
@@ -70,6 +70,10 @@ class Cycle(Base):
 # Day Model
 class Day(Base):
     __tablename__ = 'day'
+    # Kept in step with backend/db/models.py; backend/db/migrations owns the schema
+    __table_args__ = (
+        Index('uq_day_cycle_day_name', 'cycle_id', 'day_name', unique=True),
+    )
 
     day_id = Column(Integer, primary_key=True)
     day_name = Column(String(10), nullable=False)
@@ -112,6 +116,9 @@ class MealType(Base):
 # MenuAvailability Model
 class MenuAvailability(Base):
     __tablename__ = 'menu_availability'
+    __table_args__ = (
+        Index('uq_menu_availability_slot', 'day_id', 'meal_type_id', 'location_id', 'item_id', unique=True),
+    )
 
     availability_id = Column(Integer, primary_key=True)
     day_id = Column(Integer, ForeignKey('day.day_id'), nullable=True)
@@ -147,6 +154,9 @@ class MenuItem(Base):
 # MenuItemAllergen Model
 class MenuItemAllergen(Base):
     __tablename__ = 'menu_item_allergen'
+    __table_args__ = (
+        Index('ix_menu_item_allergen_allergen_id', 'allergen_id'),
+    )
 
     availability_id = Column(Integer, ForeignKey('menu_availability.availability_id'), primary_key=True)
     allergen_id = Column(Integer, ForeignKey('allergen.allergen_id'), primary_key=True)
@@ -1,340 +1,612 @@
+"""
+Load dining_menu.json into the menu database.
+
+    python parse_json.py [--bulk] [--workers N] [--file dining_menu.json] [--restart]
+
+Importable as well: ingest(data, conn) runs the whole pipeline on an open
+psycopg2 connection and returns an IngestResult.
+
+The reference tables, cycles and Always Available items are committed first,
+then each cycle of Daily Menus is committed on its own together with a
+checkpoint row in Ingest_Checkpoint. A run that dies part way resumes at the
+first cycle it had not committed; the checkpoint is keyed by a checksum of the
+menu file, so a different file starts from scratch. The data generation is
+bumped, and the checkpoint deleted, in the final commit.
+
+With --workers N the cycles are loaded by up to N threads, each on its own
+connection. Cycles sharing an identifier share Day rows, so they stay in one
+worker, in file order; every menu item is inserted before the workers start,
+so they never race for the same Menu_Item row and item ids do not depend on
+scheduling.
+
+With SNAPSHOT_FILE set, the backend's menu snapshot is rewritten once the
+new data generation is committed, so workers serving from it switch to the
+new data.
+
+With --new-generation (or MENU_GENERATIONS=1) the run loads into a fresh copy
+of the menu tables and swaps it in atomically at the end instead of writing
+into the live tables; see generations.py.
+
+Progress is reported per phase and per cycle through a callback; the CLI logs
+one line for each.
+"""
+import argparse
+import hashlib
 import json
+import logging
 import os
-import psycopg2
+import queue
 import re
-import logging
+import subprocess
+import sys
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime
+from urllib.parse import quote
+
+import psycopg2
 from dotenv import load_dotenv
 
-# Set up logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler()
-    ]
+from bulk_load import load_always_available, load_daily_menus
+from dimensions import DimensionKeys
+from generations import (
+    MENU_TABLES, collect_generations, publish_generation, start_generation, use_schema,
 )
+from ingest_stats import CountingCursor, PhaseTimer
+
 logger = logging.getLogger(__name__)
 
-logger.info("Starting parse_json.py script")
-
-# Load JSON data
-logger.info("Loading JSON data from dining_menu.json")
-try:
-    with open('dining_menu.json') as f:
-        data = json.load(f)
-    logger.info(f"JSON data loaded successfully. Found {len(data)} main sections")
-    logger.info(f"Sections: {list(data.keys())}")
-except Exception as e:
-    logger.error(f"Failed to load JSON data: {e}")
-    raise
-
-# Connect to the database using environment variables
-logger.info("Loading environment variables")
-load_dotenv()
-
-# Log connection parameters (without password)
-logger.info(f"Database connection parameters:")
-logger.info(f"  HOST: {os.getenv('DATABASE_HOST')}")
-logger.info(f"  PORT: {os.getenv('DATABASE_PORT')}")
-logger.info(f"  DATABASE: {os.getenv('DATABASE_NAME')}")
-logger.info(f"  USER: {os.getenv('DATABASE_USER')}")
-logger.info(f"  PASSWORD: {'*' * len(os.getenv('DATABASE_PASSWORD', '')) if os.getenv('DATABASE_PASSWORD') else 'NOT SET'}")
-
-logger.info("Attempting database connection...")
-try:
+DAYS_OF_WEEK = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+MEAL_TYPES = ["Breakfast", "Brunch", "Lunch", "Dinner"]
+LOCATIONS = ["Beachside", "Hillside", "Parkside"]
+ALLERGENS = {
+    "E": "Eggs", "M": "Milk", "W": "Wheat", "S": "Soy",
+    "P": "Peanuts", "TN": "Tree Nuts", "F": "Fish", "SF": "Crustacean", "SS": "Sesame Seeds"
+}
+
+# Where `python -m backend.*` runs from
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The backend migration (python -m backend.db.migrate) that created the newest
+# table this script writes: Ingest_Checkpoint
+SCHEMA_VERSION = 5
+
+
+class Progress(namedtuple("Progress", ["phase", "done", "total", "rows", "seconds", "statements"])):
+    """
+    One progress report: a phase, or one cycle of the daily menus phase
+    (done/total count cycles). rows and seconds cover just that step.
+    """
+
+    __slots__ = ()
+
+    @property
+    def rows_per_second(self):
+        return self.rows / self.seconds if self.seconds else 0.0
+
+
+IngestResult = namedtuple(
+    "IngestResult",
+    [
+        "generation", "cycles_loaded", "cycles_skipped", "changed_day_ids", "statements", "seconds", "phases",
+        "menu_schema", "critical_statements",
+    ],
+)
+# Dimension ids the row-by-row path resolves names against
+MenuKeys = namedtuple("MenuKeys", ["first_cycle_ids", "days", "meal_types", "locations", "allergens", "menu_items"])
+
+
+def load_menu(path="dining_menu.json"):
+    with open(path) as f:
+        return json.load(f)
+
+def menu_checksum(data):
+    """Identifies a menu file's contents, independent of key order and formatting."""
+    return hashlib.sha256(json.dumps(data, sort_keys=True).encode("utf-8")).hexdigest()
+
+def connect():
+    """Connect with DATABASE_URL, or the individual DATABASE_* settings."""
+    load_dotenv()
     # Prefer a full DATABASE_URL if provided (supports Supabase connection strings)
     db_url = os.getenv("DATABASE_URL")
     sslmode = os.getenv("DATABASE_SSLMODE", "require")
+    if db_url:
+        return psycopg2.connect(dsn=db_url, sslmode=sslmode)
+    return psycopg2.connect(
+        dbname=os.getenv("DATABASE_NAME"),
+        user=os.getenv("DATABASE_USER"),
+        password=os.getenv("DATABASE_PASSWORD"),
+        host=os.getenv("DATABASE_HOST"),
+        port=os.getenv("DATABASE_PORT"),
+        sslmode=sslmode
+    )
 
+def database_url():
+    """The URL connect() uses, for the backend tools: DATABASE_URL, or one built from the DATABASE_* settings."""
+    load_dotenv()
+    db_url = os.getenv("DATABASE_URL")
     if db_url:
-        logger.info("Using DATABASE_URL from environment")
-        conn = psycopg2.connect(dsn=db_url, sslmode=sslmode)
-    else:
-        conn = psycopg2.connect(
-            dbname=os.getenv("DATABASE_NAME"),
-            user=os.getenv("DATABASE_USER"),
-            password=os.getenv("DATABASE_PASSWORD"),
-            host=os.getenv("DATABASE_HOST"),
-            port=os.getenv("DATABASE_PORT"),
-            sslmode=sslmode
-        )
-    cur = conn.cursor()
-    logger.info("Database connection successful!")
-except Exception as e:
-    logger.error(f"Database connection failed: {e}")
-    raise
+        return db_url
+    user = quote(os.getenv("DATABASE_USER", ""), safe="")
+    password = quote(os.getenv("DATABASE_PASSWORD", ""), safe="")
+    host = os.getenv("DATABASE_HOST", "")
+    if os.getenv("DATABASE_PORT"):
+        host += f":{os.getenv('DATABASE_PORT')}"
+    dbname = quote(os.getenv("DATABASE_NAME", ""), safe="")
+    sslmode = os.getenv("DATABASE_SSLMODE", "require")
+    return f"postgresql://{user}:{password}@{host}/{dbname}?sslmode={sslmode}"
+
+def write_snapshot(path, new_generation=False, db_url=None):
+    """
+    Rewrite the backend's menu snapshot (backend/snapshot.py) from the
+    database at db_url (default: database_url()). Workers serving from
+    SNAPSHOT_FILE only see new data once it has been rewritten. Raises
+    CalledProcessError when the snapshot can't be written.
+    """
+    env = dict(os.environ)
+    env["DATABASE_URL"] = db_url or database_url()
+    if new_generation:
+        # Read the generation this run just made live
+        env["MENU_GENERATIONS"] = "1"
+    subprocess.run(
+        [sys.executable, "-m", "backend.snapshot", "--output", os.path.abspath(path)],
+        cwd=REPO_ROOT, env=env, check=True,
+    )
 
 # Month abbreviation fix function
 def fix_month_abbr(week_of):
     return week_of.replace("Sept", "Sep")  # Convert "Sept" to "Sep"
 
-# Insert into Cycle and Day tables
-logger.info("=== PROCESSING CYCLE DATES ===")
-cycle_count = 0
-total_cycles = len(data["Cycle Dates"].items())
-logger.info(f"Found {total_cycles} cycles to process")
-
-for cycle_name, cycle_data in data["Cycle Dates"].items():
-    cycle_count += 1
-    logger.info(f"Processing cycle {cycle_count}/{total_cycles}: {cycle_name}")
-    
-    # Extract the year from the cycle_name
-    year_match = re.search(r"\b\d{4}\b", cycle_name)
-    year = year_match.group() if year_match else "2025"  # Default to 2025 if not found
-    
-    entry_count = 0
-    for entry in cycle_data:
-        entry_count += 1
-        week_of = fix_month_abbr(entry["week_of"]) 
-        cycle_identifier = entry["menu_cycle"]
-        
-        logger.debug(f"  Processing entry {entry_count}: {week_of} - Cycle {cycle_identifier}")
-        
-        # Construct the full date string with the year
-        full_date_str = f"{week_of} {year}"
-        start_date = datetime.strptime(full_date_str, "%b %d %Y")  # Includes the year now
-
-        # Insert into Cycle table with the cycle identifier
-        try:
+def cycle_rows(cycle_dates):
+    """(cycle_name, cycle_identifier, start_date) for every week in Cycle Dates."""
+    rows = []
+    for cycle_name, cycle_data in cycle_dates.items():
+        # Extract the year from the cycle_name
+        year_match = re.search(r"\b\d{4}\b", cycle_name)
+        year = year_match.group() if year_match else "2025"  # Default to 2025 if not found
+        for entry in cycle_data:
+            week_of = fix_month_abbr(entry["week_of"])
+            start_date = datetime.strptime(f"{week_of} {year}", "%b %d %Y").date()
+            rows.append((cycle_name, entry["menu_cycle"], start_date))
+    return rows
+
+def menu_item_names(data):
+    names = [item_name for items in data["Always Available"].values() for item_name in items]
+    for days_menu in data["Daily Menus"].values():
+        for meals in days_menu.values():
+            for locations_menu in meals.values():
+                for items in locations_menu.values():
+                    names.extend(items)
+    return names
+
+def load_dimensions(cur, data, with_menu_items=True):
+    """
+    Load every dimension table once and insert what the file adds, one
+    statement per table. The serial bulk path resolves item names in SQL, so
+    it skips the menu item map.
+    """
+    cycles = DimensionKeys(cur, "Cycle", "cycle_id", ["cycle_name", "cycle_identifier", "start_date"])
+    days = DimensionKeys(cur, "Day", "day_id", ["day_name", "cycle_id"])
+    meal_types = DimensionKeys(cur, "Meal_Type", "meal_type_id", ["meal_type_name"])
+    locations = DimensionKeys(cur, "Location", "location_id", ["location_name"])
+    allergens = DimensionKeys(cur, "Allergen", "allergen_id", ["allergen_code"])
+
+    weeks = cycle_rows(data["Cycle Dates"])
+    inserted = cycles.ensure(cur, weeks)
+    inserted += days.ensure(cur, [(day, cycles[row]) for row in weeks for day in DAYS_OF_WEEK])
+    inserted += meal_types.ensure(cur, [(meal_type,) for meal_type in MEAL_TYPES])
+    inserted += locations.ensure(cur, [(location,) for location in LOCATIONS])
+    inserted += allergens.ensure(cur, ALLERGENS.items(), ["allergen_code", "description"])
+
+    menu_items = None
+    if with_menu_items:
+        menu_items = DimensionKeys(cur, "Menu_Item", "item_id", ["item_name"])
+        inserted += menu_items.ensure(cur, [(item_name,) for item_name in menu_item_names(data)])
+
+    # The menus refer to a cycle by identifier, which maps to its first Cycle row
+    first_cycle_ids = {}
+    for (cycle_name, cycle_identifier, start_date), cycle_id in cycles.ids.items():
+        first_cycle_ids[cycle_identifier] = min(cycle_id, first_cycle_ids.get(cycle_identifier, cycle_id))
+    return MenuKeys(first_cycle_ids, days, meal_types, locations, allergens, menu_items), inserted
+
+def insert_always_available(cur, keys, always_available):
+    count = 0
+    for meal_type, items in always_available.items():
+        meal_type_id = keys.meal_types[meal_type]
+        for item_name in items:
+            count += 1
             cur.execute(
-                """
-                INSERT INTO Cycle (cycle_name, cycle_identifier, start_date) 
-                VALUES (%s, %s, %s) 
-                ON CONFLICT DO NOTHING 
-                RETURNING cycle_id
-                """,
-                (cycle_name, cycle_identifier, start_date)
+                "INSERT INTO Always_Available (meal_type_id, item_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
+                (meal_type_id, keys.menu_items[item_name])
             )
-            result = cur.fetchone()
-            
-            # Ensure cycle_id exists if the cycle already existed
-            if result:
-                cycle_id = result[0]
-            else:
-                cur.execute(
-                    "SELECT cycle_id FROM Cycle WHERE cycle_name = %s AND cycle_identifier = %s",
-                    (cycle_name, cycle_identifier)
-                )
-                cycle_id = cur.fetchone()[0]
-
-            # Insert related days for this cycle entry
-            days_of_week = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
-            for day in days_of_week:
-                cur.execute(
-                    """
-                    INSERT INTO Day (day_name, cycle_id) 
-                    VALUES (%s, %s) 
-                    ON CONFLICT (day_name, cycle_id) DO NOTHING 
-                    RETURNING day_id
-                    """,
-                    (day, cycle_id)
-                )
-        except Exception as e:
-            logger.error(f"Error processing cycle {cycle_name}, entry {entry_count}: {e}")
-            raise
-
-logger.info(f"Completed processing {cycle_count} cycles")
-
-# Insert distinct Meal Types
-logger.info("=== PROCESSING MEAL TYPES ===")
-meal_types = ["Breakfast", "Brunch", "Lunch", "Dinner"]
-for meal_type in meal_types:
-    logger.info(f"Inserting meal type: {meal_type}")
-    cur.execute(
-        "INSERT INTO Meal_Type (meal_type_name) VALUES (%s) ON CONFLICT DO NOTHING RETURNING meal_type_id",
-        (meal_type,)
-    )
-
-# Insert distinct Locations
-logger.info("=== PROCESSING LOCATIONS ===")
-locations = ["Beachside", "Hillside", "Parkside"]
-for location in locations:
-    logger.info(f"Inserting location: {location}")
-    cur.execute(
-        "INSERT INTO Location (location_name) VALUES (%s) ON CONFLICT DO NOTHING RETURNING location_id",
-        (location,)
-    )
-
-# Insert Menu Items and Allergens (to avoid duplicates)
-logger.info("=== PROCESSING ALWAYS AVAILABLE ITEMS ===")
-always_available_count = 0
-for meal_type, items in data["Always Available"].items():
-    logger.info(f"Processing Always Available for meal type: {meal_type} ({len(items)} items)")
-    cur.execute("SELECT meal_type_id FROM Meal_Type WHERE meal_type_name = %s", (meal_type,))
-    meal_type_id = cur.fetchone()[0]
-
-    for item_name in items:
-        always_available_count += 1
-        if always_available_count % 10 == 0:
-            logger.info(f"  Processed {always_available_count} always available items")
-            
-        cur.execute(
-            "INSERT INTO Menu_Item (item_name) VALUES (%s) ON CONFLICT DO NOTHING RETURNING item_id",
-            (item_name,)
-        )
-        result = cur.fetchone()
-        
-        # Fetch the item_id if it already exists
-        if result:
-            item_id = result[0]
-        else:
-            cur.execute("SELECT item_id FROM Menu_Item WHERE item_name = %s", (item_name,))
-            item_id = cur.fetchone()[0]
-        
-        # Insert into Always_Available
-        cur.execute(
-            "INSERT INTO Always_Available (meal_type_id, item_id) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-            (meal_type_id, item_id)
-        )
-
-logger.info(f"Completed processing {always_available_count} always available items")
-
-# Insert Allergens into Allergen table
-logger.info("=== PROCESSING ALLERGENS ===")
-allergens = {
-    "E": "Eggs", "M": "Milk", "W": "Wheat", "S": "Soy",
-    "P": "Peanuts", "TN": "Tree Nuts", "F": "Fish", "SF": "Crustacean", "SS": "Sesame Seeds"
-}
-for code, description in allergens.items():
-    logger.info(f"Inserting allergen: {code} - {description}")
-    cur.execute(
-        "INSERT INTO Allergen (allergen_code, description) VALUES (%s, %s) ON CONFLICT DO NOTHING",
-        (code, description)
-    )
-
-# Insert Daily Menus with support for multiple allergens
-logger.info("=== PROCESSING DAILY MENUS ===")
-logger.info("This is the most complex section and may take some time...")
-
-daily_menu_cycles = len(data["Daily Menus"])
-logger.info(f"Found {daily_menu_cycles} cycles in Daily Menus")
+    return count
 
-cycle_counter = 0
-total_items_processed = 0
+def insert_daily_menu(cur, keys, cycle, days_menu):
+    """
+    Insert one cycle of Daily Menus row by row. Returns (items processed,
+    day_ids that gained menu rows).
+    """
+    items_processed = 0
+    # Days that gained menu rows, recorded with the data generation for the backend's /events
+    changed_day_ids = set()
 
-for cycle, days in data["Daily Menus"].items():
-    cycle_counter += 1
-    logger.info(f"Processing Daily Menu cycle {cycle_counter}/{daily_menu_cycles}: {cycle}")
-    
     cycle_identifier = cycle.split()[1]
-    cur.execute("SELECT cycle_id FROM Cycle WHERE cycle_identifier = %s", (cycle_identifier,))
-    cycle_result = cur.fetchone()
-    if not cycle_result:
+    cycle_id = keys.first_cycle_ids.get(cycle_identifier)
+    if cycle_id is None:
         logger.error(f"Could not find cycle_id for cycle_identifier: {cycle_identifier}")
-        continue
-    cycle_id = cycle_result[0]
-
-    day_counter = 0
-    for day, meals in days.items():
-        day_counter += 1
-        logger.info(f"  Processing day {day_counter}: {day}")
-        
-        cur.execute("SELECT day_id FROM Day WHERE day_name = %s AND cycle_id = %s", (day, cycle_id))
-        day_result = cur.fetchone()
-        if not day_result:
+        return items_processed, changed_day_ids
+
+    for day, meals in days_menu.items():
+        day_id = keys.days.get((day, cycle_id))
+        if day_id is None:
             logger.error(f"Could not find day_id for day: {day}, cycle_id: {cycle_id}")
             continue
-        day_id = day_result[0]
-
-        meal_counter = 0
-        for meal_type, locations in meals.items():
-            meal_counter += 1
-            logger.info(f"    Processing meal {meal_counter}: {meal_type}")
-            
-            cur.execute("SELECT meal_type_id FROM Meal_Type WHERE meal_type_name = %s", (meal_type,))
-            meal_type_result = cur.fetchone()
-            if not meal_type_result:
+
+        for meal_type, locations_menu in meals.items():
+            meal_type_id = keys.meal_types.get(meal_type)
+            if meal_type_id is None:
                 logger.error(f"Could not find meal_type_id for meal_type: {meal_type}")
                 continue
-            meal_type_id = meal_type_result[0]
-
-            location_counter = 0
-            for location, items in locations.items():
-                location_counter += 1
-                logger.info(f"      Processing location {location_counter}: {location} ({len(items)} items)")
-                
-                cur.execute("SELECT location_id FROM Location WHERE location_name = %s", (location,))
-                location_result = cur.fetchone()
-                if not location_result:
+
+            for location, items in locations_menu.items():
+                location_id = keys.locations.get(location)
+                if location_id is None:
                     logger.error(f"Could not find location_id for location: {location}")
                     continue
-                location_id = location_result[0]
 
-                item_counter = 0
                 for item_name, allergen_codes in items.items():
-                    item_counter += 1
-                    total_items_processed += 1
-                    
-                    if item_counter % 50 == 0:
-                        logger.info(f"        Processed {item_counter}/{len(items)} items in {location}")
-                    
-                    if total_items_processed % 100 == 0:
-                        logger.info(f"*** TOTAL PROGRESS: {total_items_processed} items processed ***")
-                    
-                    try:
-                        # Insert menu item if not already present
-                        cur.execute(
-                            "INSERT INTO Menu_Item (item_name) VALUES (%s) ON CONFLICT (item_name) DO NOTHING RETURNING item_id",
-                            (item_name,)
-                        )
-                        item_id_result = cur.fetchone()
-                        if item_id_result:
-                            item_id = item_id_result[0]
-                        else:
-                            # The item already exists, so fetch its ID
-                            cur.execute("SELECT item_id FROM Menu_Item WHERE item_name = %s", (item_name,))
-                            item_id = cur.fetchone()[0]
-
-                        # Insert availability with unique day_id, meal_type_id, location_id, and item_id
-                        cur.execute(
-                            """
-                            INSERT INTO Menu_Availability (day_id, meal_type_id, location_id, item_id) 
-                            VALUES (%s, %s, %s, %s)
-                            ON CONFLICT (day_id, meal_type_id, location_id, item_id) DO NOTHING 
-                            RETURNING availability_id
-                            """,
-                            (day_id, meal_type_id, location_id, item_id)
-                        )
-                        availability_result = cur.fetchone()
-                        
-                        # If availability was inserted, insert allergens for that availability_id
-                        if availability_result:
-                            availability_id = availability_result[0]
-                            # Insert each allergen for this availability
-                            for allergen_code in allergen_codes:
-                                cur.execute("SELECT allergen_id FROM Allergen WHERE allergen_code = %s", (allergen_code,))
-                                allergen_result = cur.fetchone()
-                                if allergen_result:
-                                    allergen_id = allergen_result[0]
-                                    cur.execute(
-                                        """
-                                        INSERT INTO Menu_Item_Allergen (availability_id, allergen_id) 
-                                        VALUES (%s, %s) 
-                                        ON CONFLICT DO NOTHING
-                                        """,
-                                        (availability_id, allergen_id)
-                                    )
-                                    
-                    except Exception as e:
-                        logger.error(f"Error processing item '{item_name}' in {location}/{meal_type}/{day}: {e}")
-                        continue
-
-logger.info(f"Completed processing Daily Menus. Total items processed: {total_items_processed}")
-
-# Commit all changes and close the connection
-logger.info("=== FINALIZING ===")
-logger.info("Committing changes to database...")
-try:
-    conn.commit()
-    logger.info("Changes committed successfully!")
-except Exception as e:
-    logger.error(f"Error committing changes: {e}")
-    raise
-
-logger.info("Closing database connection...")
-cur.close()
-conn.close()
-logger.info("Database connection closed")
-
-logger.info("=== SCRIPT COMPLETED SUCCESSFULLY ===")
+                    items_processed += 1
+                    # Insert availability with unique day_id, meal_type_id, location_id, and item_id
+                    cur.execute(
+                        """
+                        INSERT INTO Menu_Availability (day_id, meal_type_id, location_id, item_id)
+                        VALUES (%s, %s, %s, %s)
+                        ON CONFLICT (day_id, meal_type_id, location_id, item_id) DO NOTHING
+                        RETURNING availability_id
+                        """,
+                        (day_id, meal_type_id, location_id, keys.menu_items[item_name])
+                    )
+                    availability_result = cur.fetchone()
+
+                    # If availability was inserted, insert allergens for that availability_id
+                    if availability_result:
+                        changed_day_ids.add(day_id)
+                        availability_id = availability_result[0]
+                        for allergen_code in allergen_codes:
+                            allergen_id = keys.allergens.get(allergen_code)
+                            if allergen_id is not None:
+                                cur.execute(
+                                    """
+                                    INSERT INTO Menu_Item_Allergen (availability_id, allergen_id)
+                                    VALUES (%s, %s)
+                                    ON CONFLICT DO NOTHING
+                                    """,
+                                    (availability_id, allergen_id)
+                                )
+    return items_processed, changed_day_ids
+
+def check_schema(cur):
+    """Fail early, with what to run, if the backend migrations haven't created this script's tables."""
+    cur.execute("SELECT to_regclass('schema_version') IS NOT NULL")
+    version = None
+    if cur.fetchone()[0]:
+        cur.execute("SELECT MAX(version) FROM schema_version")
+        version = cur.fetchone()[0]
+    if version is None or version < SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Database schema is at version {version or 0}, parse_json.py needs {SCHEMA_VERSION}: "
+            "run `python -m backend.db.migrate` from the repository root first"
+        )
+
+def read_checkpoint(cur, checksum):
+    """(completed cycles, changed day_ids) of an interrupted run of this file."""
+    cur.execute("SELECT completed_cycles, day_ids FROM Ingest_Checkpoint WHERE checksum = %s", (checksum,))
+    row = cur.fetchone()
+    if row is None:
+        return set(), set()
+    return set(json.loads(row[0])), set(json.loads(row[1]))
+
+def save_checkpoint(cur, checksum, completed_cycles, changed_day_ids):
+    """
+    Add cycles and their changed day_ids to this file's checkpoint. Merged
+    with what is saved already, so parallel workers can each save their own.
+    """
+    cur.execute(
+        """
+        INSERT INTO Ingest_Checkpoint (checksum, completed_cycles, day_ids) VALUES (%s, %s, %s)
+        ON CONFLICT (checksum) DO UPDATE
+        SET completed_cycles = (
+                SELECT json_agg(cycle ORDER BY cycle)::text FROM (
+                    SELECT json_array_elements_text(Ingest_Checkpoint.completed_cycles::json)
+                    UNION SELECT json_array_elements_text(EXCLUDED.completed_cycles::json)
+                ) AS cycles (cycle)
+            ),
+            day_ids = COALESCE((
+                SELECT json_agg(day_id ORDER BY day_id)::text FROM (
+                    SELECT json_array_elements_text(Ingest_Checkpoint.day_ids::json)::int
+                    UNION SELECT json_array_elements_text(EXCLUDED.day_ids::json)::int
+                ) AS days (day_id)
+            ), '[]'),
+            updated_at = now()
+        """,
+        (checksum, json.dumps(sorted(completed_cycles)), json.dumps(sorted(changed_day_ids)))
+    )
+
+def load_cycle(cur, keys, bulk, cycle, days_menu):
+    """Load one cycle of Daily Menus; returns (rows, day_ids that gained menu rows)."""
+    if bulk:
+        return load_daily_menus(cur, {cycle: days_menu})
+    return insert_daily_menu(cur, keys, cycle, days_menu)
+
+def cycle_partitions(daily_menus, completed_cycles):
+    """
+    The cycles left to load, grouped by cycle identifier. Cycles sharing one
+    resolve to the same Day rows, so the first of them wins each menu slot
+    as in a serial run only if they load in file order on one connection.
+    """
+    partitions = {}
+    for cycle, days_menu in daily_menus.items():
+        if cycle not in completed_cycles:
+            partitions.setdefault(cycle.split()[1], []).append((cycle, days_menu))
+    return list(partitions.values())
+
+def load_cycles_parallel(partitions, keys, bulk, checksum, workers, worker_connect, on_loaded, menu_schema=None):
+    """
+    Load cycle partitions on a pool of at most workers connections, each cycle
+    committed with its checkpoint as in the serial loop. on_loaded is called
+    in the calling thread with (cycle, rows, day_ids, seconds, statements) as
+    partitions finish. Returns the statements each connection sent.
+
+    The partitions write disjoint Menu_Availability rows and only read the
+    dimension rows committed before, so workers do not block each other
+    except briefly on the checkpoint row.
+    """
+    idle = queue.Queue()
+    cursors = []
+    executor = ThreadPoolExecutor(max_workers=min(workers, len(partitions)), thread_name_prefix="ingest")
+    try:
+        for _ in range(min(workers, len(partitions))):
+            worker_conn = worker_connect()
+            cur = worker_conn.cursor(cursor_factory=CountingCursor)
+            if menu_schema is not None:
+                use_schema(cur, menu_schema)
+            worker_conn.commit()
+            cursors.append(cur)
+            idle.put(cur)
+
+        def run(partition):
+            cur = idle.get()
+            try:
+                loaded = []
+                for cycle, days_menu in partition:
+                    started, statements = time.perf_counter(), cur.statements
+                    rows, day_ids = load_cycle(cur, keys, bulk, cycle, days_menu)
+                    save_checkpoint(cur, checksum, [cycle], day_ids)
+                    cur.connection.commit()
+                    loaded.append((cycle, rows, day_ids, time.perf_counter() - started, cur.statements - statements))
+                return loaded
+            except Exception:
+                cur.connection.rollback()
+                raise
+            finally:
+                idle.put(cur)
+
+        for future in as_completed([executor.submit(run, partition) for partition in partitions]):
+            for loaded in future.result():
+                on_loaded(*loaded)
+        return [cur.statements for cur in cursors]
+    finally:
+        # A failed cycle stops the partitions not started yet; the others keep
+        # what they committed, with the checkpoint to resume from
+        executor.shutdown(wait=True, cancel_futures=True)
+        for cur in cursors:
+            cur.connection.close()
+
+def ingest(
+    data, conn, bulk=False, resume=True, progress=None, source="parse_json",
+    new_generation=False, keep_generations=1, workers=1, worker_connect=connect,
+):
+    """
+    Load a parsed menu file through conn, committing per cycle. With resume,
+    cycles a previous interrupted run of the same file committed are skipped.
+    progress, if given, is called with a Progress after every phase and cycle.
+    With new_generation the file is loaded into a new menu generation that
+    replaces the live one at the end, keeping keep_generations retired ones.
+    With workers > 1 the cycles load in parallel on connections opened with
+    worker_connect. With SNAPSHOT_FILE set, the snapshot is rewritten last; a
+    failure there is logged, since the menu is already published.
+    """
+    cur = conn.cursor(cursor_factory=CountingCursor)
+    timer = PhaseTimer(cur)
+    checksum = menu_checksum(data)
+    # Statements the worker connections sent alongside the busiest one
+    overlapped_statements = 0
+
+    def report(phase, done, total, rows, started, statements):
+        if progress is not None:
+            progress(Progress(phase, done, total, rows, time.perf_counter() - started, cur.statements - statements))
+
+    # Set before anything can fail: the finally block reads them
+    menu_schema = search_path = None
+    try:
+        # Reference data, cycles and Always Available, in one commit
+        timer.start("dimensions")
+        started, statements = time.perf_counter(), cur.statements
+        check_schema(cur)
+        if new_generation:
+            cur.execute("SELECT current_setting('search_path')")
+            search_path = cur.fetchone()[0]
+            generation_id, menu_schema, resumed = start_generation(cur, checksum, resume)
+            # A checkpoint only describes the generation it was loading into
+            resume = resumed
+            conn.commit()
+            # Every unqualified menu table below now means the new generation's copy
+            use_schema(cur, menu_schema)
+        if resume:
+            completed_cycles, changed_day_ids = read_checkpoint(cur, checksum)
+        else:
+            cur.execute("DELETE FROM Ingest_Checkpoint WHERE checksum = %s", (checksum,))
+            completed_cycles, changed_day_ids = set(), set()
+        # Parallel workers must find every menu item committed already: two
+        # transactions inserting the same name wait on each other (deadlocking
+        # when they meet in opposite orders), and ids would follow scheduling
+        keys, inserted = load_dimensions(cur, data, with_menu_items=not bulk or workers > 1)
+        report("dimensions", 1, 1, inserted, started, statements)
+
+        timer.start("always available")
+        started, statements = time.perf_counter(), cur.statements
+        if bulk:
+            rows = load_always_available(cur, data["Always Available"])
+        else:
+            rows = insert_always_available(cur, keys, data["Always Available"])
+        conn.commit()
+        report("always available", 1, 1, rows, started, statements)
+
+        # Daily Menus, one commit per cycle
+        timer.start("daily menus")
+        daily_menus = data["Daily Menus"]
+        skipped = [cycle for cycle in daily_menus if cycle in completed_cycles]
+        if skipped:
+            logger.info(f"Resuming from checkpoint: {len(skipped)} of {len(daily_menus)} cycles already loaded")
+        partitions = cycle_partitions(daily_menus, completed_cycles)
+        if workers > 1 and len(partitions) > 1:
+            logger.info(f"Loading {len(partitions)} cycle partitions on {min(workers, len(partitions))} workers")
+
+            def on_loaded(cycle, rows, day_ids, seconds, statements):
+                changed_day_ids.update(day_ids)
+                completed_cycles.add(cycle)
+                if progress is not None:
+                    progress(Progress("daily menus", len(completed_cycles), len(daily_menus), rows, seconds, statements))
+
+            worker_statements = load_cycles_parallel(
+                partitions, keys, bulk, checksum, workers, worker_connect, on_loaded,
+                menu_schema if new_generation else None,
+            )
+            # Counted with this run's statements; only the busiest connection's add up in latency
+            cur.statements += sum(worker_statements)
+            overlapped_statements = sum(worker_statements) - max(worker_statements)
+        else:
+            for done, (cycle, days_menu) in enumerate(daily_menus.items(), 1):
+                if cycle in completed_cycles:
+                    continue
+                started, statements = time.perf_counter(), cur.statements
+                rows, day_ids = load_cycle(cur, keys, bulk, cycle, days_menu)
+                changed_day_ids |= day_ids
+                completed_cycles.add(cycle)
+                save_checkpoint(cur, checksum, completed_cycles, changed_day_ids)
+                conn.commit()
+                report("daily menus", done, len(daily_menus), rows, started, statements)
+
+        # Bump the data generation so running backends drop their cached menus
+        timer.start("data generation")
+        started, statements = time.perf_counter(), cur.statements
+        if new_generation:
+            # Statistics for the new tables before the backend plans against them
+            cur.execute(f"ANALYZE {', '.join(MENU_TABLES)}")
+            retired = publish_generation(cur, generation_id)
+        cur.execute(
+            "INSERT INTO Data_Generation (source, day_ids) VALUES (%s, %s) RETURNING generation_id",
+            (source, json.dumps(sorted(changed_day_ids)))
+        )
+        generation = cur.fetchone()[0]
+        cur.execute("DELETE FROM Ingest_Checkpoint WHERE checksum = %s", (checksum,))
+        conn.commit()
+        report("data generation", 1, 1, len(changed_day_ids), started, statements)
+
+        if new_generation:
+            logger.info(f"Menu generation {generation_id} ({menu_schema}) is live, replacing {retired or 'public'}")
+            timer.start("collect generations")
+            started, statements = time.perf_counter(), cur.statements
+            dropped = collect_generations(cur, keep_generations)
+            conn.commit()
+            report("collect generations", 1, 1, len(dropped), started, statements)
+
+        snapshot_file = os.getenv("SNAPSHOT_FILE")
+        if snapshot_file:
+            timer.start("snapshot")
+            # The menu is published already, so this doesn't fail the run;
+            # `python -m backend.snapshot` rewrites the snapshot later
+            try:
+                write_snapshot(snapshot_file, new_generation)
+            except subprocess.CalledProcessError as e:
+                logger.warning(f"Could not rewrite {snapshot_file}, the snapshot is stale: {e}")
+        timer.stop()
+    except Exception:
+        # Cycles committed so far stay, with the checkpoint to resume from
+        if not conn.closed:
+            conn.rollback()
+        raise
+    finally:
+        if menu_schema is not None and not conn.closed:
+            # Best effort: an error here must not replace the one being raised
+            try:
+                cur.execute("SELECT set_config('search_path', %s, false)", (search_path,))
+                conn.commit()
+            except psycopg2.Error as e:
+                logger.warning(f"Could not restore search_path after loading {menu_schema}: {e}")
+        if not cur.closed:
+            cur.close()
+
+    return IngestResult(
+        generation=generation,
+        cycles_loaded=len(daily_menus) - len(skipped),
+        cycles_skipped=len(skipped),
+        changed_day_ids=sorted(changed_day_ids),
+        statements=cur.statements,
+        seconds=cur.elapsed(),
+        phases=timer.phases,
+        menu_schema=menu_schema,
+        critical_statements=cur.statements - overlapped_statements,
+    )
+
+def log_progress(event):
+    step = f" {event.done}/{event.total}" if event.total > 1 else ""
+    logger.info(
+        f"{event.phase}{step}: {event.rows} rows, {event.statements} statements in {event.seconds:.2f}s "
+        f"({event.rows_per_second:.0f} rows/s)"
+    )
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load dining_menu.json into the menu database.")
+    parser.add_argument("--file", default="dining_menu.json", help="Menu file written by scrapper.py")
+    parser.add_argument(
+        "--bulk", action="store_true",
+        help="Load the menus through COPY into staging tables and set-based merges instead of row by row"
+    )
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint of an interrupted run")
+    parser.add_argument(
+        "--workers", type=int, default=1, help="Connections to load cycles on in parallel (default 1, serial)"
+    )
+    parser.add_argument(
+        "--new-generation", action="store_true", default=os.getenv("MENU_GENERATIONS", "0") == "1",
+        help="Load into a new menu generation and swap it in when done (default: MENU_GENERATIONS=1)"
+    )
+    parser.add_argument(
+        "--keep-generations", type=int, default=1, help="Retired generations to keep for rollback (default 1)"
+    )
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    data = load_menu(args.file)
+    logger.info(f"Loaded {args.file}: {len(data['Daily Menus'])} cycles of daily menus ({'bulk' if args.bulk else 'row-by-row'} mode)")
+    conn = connect()
+    try:
+        result = ingest(
+            data, conn, bulk=args.bulk, resume=not args.restart, progress=log_progress,
+            new_generation=args.new_generation, keep_generations=args.keep_generations, workers=args.workers,
+        )
+    finally:
+        conn.close()
+
+    for name, statements, seconds in result.phases:
+        logger.info(f"  {name:<18} {statements:>6} statements  {seconds:7.3f}s")
+    logger.info(f"New data generation: {result.generation} ({len(result.changed_day_ids)} days changed)")
+    logger.info(f"Ingestion finished: {result.statements} statements in {result.seconds:.2f}s")
+    if result.critical_statements != result.statements:
+        logger.info(f"Busiest connection path: {result.critical_statements} statements")
+
+if __name__ == "__main__":
+    main()
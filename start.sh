@@ -1,2 +1,6 @@
 #!/usr/bin/env bash
-uvicorn backend.main:app --host 0.0.0.0 --port $PORT
+set -e
+# Apply pending schema migrations first; they take an advisory lock and skip
+# applied versions, so this is safe on every boot
+python -m backend.db.migrate
+exec uvicorn backend.main:app --host 0.0.0.0 --port $PORT